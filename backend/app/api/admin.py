@@ -1,32 +1,31 @@
 """管理后台 API"""
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from app.core.cache import DATA_VERSION, RULES_VERSION, bump_version
+from app.core import loop_monitor, query_profiler, request_profiler, singleflight, tracing
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.police_alert import PoliceAlert
-from app.models.call_record import CallRecord
-from app.models.risk_supervision import RiskSupervision
-from app.models.dispute_management import DisputeManagement
+from app.core.responses import ORJSONResponse, ORJSONRoute
 from app.models.display_rule import DisplayRule
 from app.schemas.display_rule import DisplayRuleCreate, DisplayRuleResponse
+from app.services import data_import, display_rule, push, upload
 from app.utils.constants import (
-    PROBLEM_TYPE_OPTIONS, PROBLEM_TYPE_DEFAULT, normalize_problem_type,
+    PROBLEM_TYPE_OPTIONS,
     CASE_TYPE_OPTIONS, RISK_TYPE_OPTIONS, RISK_ISSUE_OPTIONS,
     RISK_LEVEL_OPTIONS, DISPUTE_STATUS_OPTIONS
 )
-import pandas as pd
 from datetime import datetime, date
 from io import BytesIO
-from typing import List
+from typing import List, Optional
 from urllib.parse import quote
 import json
 
-router = APIRouter(prefix="/admin", tags=["管理后台"])
+router = APIRouter(prefix="/admin", tags=["管理后台"], route_class=ORJSONRoute)
 
 
 @router.get("/template")
-async def download_template():
+def download_template():
     """
     下载包含所有数据类型的多sheet模板
     """
@@ -175,7 +174,7 @@ async def download_template():
 
 
 @router.post("/import")
-async def import_data(
+def import_data(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -184,181 +183,18 @@ async def import_data(
     """
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="只支持 Excel 文件")
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail=f"文件超过大小限制 {settings.MAX_UPLOAD_SIZE} 字节，请使用分块上传（上限 {settings.UPLOAD_MAX_TOTAL_SIZE} 字节）")
 
     try:
-        # 读取所有sheet
-        excel_file = pd.ExcelFile(file.file, engine='openpyxl')
-
-        result = {
-            "risk_supervision": 0,
-            "dispute_management": 0,
-            "police_alert": 0,
-            "call_record": 0,
-            "risk_supervision_defaulted": 0  # 问题类型使用默认值的记录数
-        }
-
-        # ==================== 导入执法问题盯办 ====================
-        if "执法问题盯办" in excel_file.sheet_names:
-            df = pd.read_excel(excel_file, sheet_name="执法问题盯办")
-
-            defaulted_count = 0  # 使用默认值的记录数
-
-            for _, row in df.iterrows():
-                if pd.isna(row['案件编号']):  # 跳过空行
-                    continue
-
-                case_time = pd.to_datetime(row['案发时间']) if pd.notna(row['案发时间']) else datetime.now()
-                deadline = pd.to_datetime(row['整改期限']) if pd.notna(row['整改期限']) else datetime.now()
-                risk_issues = str(row['风险问题']) if pd.notna(row['风险问题']) else '[]'
-
-                # 处理问题类型（兼容旧模板）
-                raw_value = row.get('问题类型') if '问题类型' in df.columns else None
-                problem_type, used_default = normalize_problem_type(raw_value)
-                if used_default:
-                    defaulted_count += 1
-
-                stmt = sqlite_insert(RiskSupervision).values(
-                    case_number=str(row['案件编号']),
-                    case_name=str(row['案件名称']),
-                    case_time=case_time,
-                    case_type=str(row['案件类型']),
-                    risk_type=str(row['风险类型']),
-                    risk_issues=risk_issues,
-                    problem_type=problem_type,
-                    deadline=deadline,
-                    officer_name=str(row['责任民警'])
-                )
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=["case_number"],
-                    set_={
-                        "case_name": stmt.excluded.case_name,
-                        "case_time": stmt.excluded.case_time,
-                        "case_type": stmt.excluded.case_type,
-                        "risk_type": stmt.excluded.risk_type,
-                        "risk_issues": stmt.excluded.risk_issues,
-                        "problem_type": stmt.excluded.problem_type,
-                        "deadline": stmt.excluded.deadline,
-                        "officer_name": stmt.excluded.officer_name,
-                        "updated_at": datetime.now()
-                    }
-                )
-                db.execute(stmt)
-                result["risk_supervision"] += 1
-
-            result["risk_supervision_defaulted"] = defaulted_count
-
-        # ==================== 导入矛盾纠纷管理 ====================
-        if "矛盾纠纷管理" in excel_file.sheet_names:
-            df = pd.read_excel(excel_file, sheet_name="矛盾纠纷管理")
-
-            for _, row in df.iterrows():
-                if pd.isna(row['事件名称']):  # 跳过空行
-                    continue
-
-                event_time = pd.to_datetime(row['事发时间']) if pd.notna(row['事发时间']) else datetime.now()
-
-                stmt = sqlite_insert(DisputeManagement).values(
-                    event_name=str(row['事件名称']),
-                    event_type=str(row['事件类型']),
-                    content=str(row['事件内容']),
-                    event_time=event_time,
-                    risk_level=str(row['风险等级']),
-                    officer_name=str(row['责任民警']),
-                    status=str(row['处置进度'])
-                )
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=["event_name", "event_time", "officer_name"],
-                    set_={
-                        "event_type": stmt.excluded.event_type,
-                        "content": stmt.excluded.content,
-                        "risk_level": stmt.excluded.risk_level,
-                        "status": stmt.excluded.status,
-                        "updated_at": datetime.now()
-                    }
-                )
-                db.execute(stmt)
-                result["dispute_management"] += 1
-
-        # ==================== 导入警情态势追踪 ====================
-        if "警情态势追踪" in excel_file.sheet_names:
-            from app.utils.alert_category import SUB_TYPE_TO_ALERT_TYPE
-            df = pd.read_excel(excel_file, sheet_name="警情态势追踪")
-
-            for _, row in df.iterrows():
-                # 支持新模板（警情子类列）和旧模板（警情类型列）
-                sub_type = None
-                if '警情子类' in df.columns and pd.notna(row.get('警情子类')):
-                    sub_type = str(row['警情子类'])
-                elif '警情类型' in df.columns and pd.notna(row.get('警情类型')):
-                    sub_type = str(row['警情类型'])
-
-                if pd.isna(row['日期']) or sub_type is None or pd.isna(row['地点']):
-                    continue
-
-                # 子类映射为数据库 alert_type，未匹配则原值写入
-                alert_type = SUB_TYPE_TO_ALERT_TYPE.get(sub_type, sub_type)
-
-                alert_date = pd.to_datetime(row['日期']).date()
-                count = int(row['次数']) if pd.notna(row['次数']) else 0
-
-                # 只导入次数大于0的记录
-                if count > 0:
-                    stmt = sqlite_insert(PoliceAlert).values(
-                        alert_date=alert_date,
-                        alert_type=alert_type,
-                        location=str(row['地点']),
-                        count=count
-                    )
-                    stmt = stmt.on_conflict_do_update(
-                        index_elements=["alert_date", "alert_type", "location"],
-                        set_={
-                            "count": PoliceAlert.count + stmt.excluded.count
-                        }
-                    )
-                    db.execute(stmt)
-                    result["police_alert"] += 1
-
-        # ==================== 导入重复报警记录 ====================
-        if "重复报警记录" in excel_file.sheet_names:
-            df = pd.read_excel(excel_file, sheet_name="重复报警记录")
-
-            for _, row in df.iterrows():
-                if pd.isna(row['日期']) or pd.isna(row['报警地点']) or str(row['报警地点']).strip() == '':
-                    continue
-
-                call_date = pd.to_datetime(row['日期']).date()
-                count = int(row['次数']) if pd.notna(row['次数']) else 0
-
-                # 只导入次数大于0的记录
-                if count > 0:
-                    stmt = sqlite_insert(CallRecord).values(
-                        call_date=call_date,
-                        call_address=str(row['报警地点']),
-                        count=count
-                    )
-                    stmt = stmt.on_conflict_do_update(
-                        index_elements=["call_date", "call_address"],
-                        set_={
-                            "count": CallRecord.count + stmt.excluded.count
-                        }
-                    )
-                    db.execute(stmt)
-                    result["call_record"] += 1
-
+        result = data_import.import_workbook(db, file.file)
+        bump_version(DATA_VERSION, db)
         db.commit()
 
         return {
             "code": 200,
             "message": "导入成功",
-            "data": {
-                "执法问题盯办": result["risk_supervision"],
-                "矛盾纠纷管理": result["dispute_management"],
-                "警情态势追踪": result["police_alert"],
-                "重复报警记录": result["call_record"],
-                "总计": sum([result["risk_supervision"], result["dispute_management"],
-                           result["police_alert"], result["call_record"]]),
-                "问题类型默认填充数": result["risk_supervision_defaulted"]
-            }
+            "data": data_import.format_import_result(result)
         }
 
     except Exception as e:
@@ -366,33 +202,210 @@ async def import_data(
         raise HTTPException(status_code=500, detail=f"导入失败: {str(e)}")
 
 
+# ==================== 分块上传 API ====================
+
+@router.post("/uploads")
+def create_upload(upload_data: dict):
+    """
+    创建分块上传会话
+
+    请求体: {filename, total_size, checksum(sha256)}
+    """
+    try:
+        status = upload.create_upload(
+            upload_data.get("filename", ""),
+            int(upload_data.get("total_size", 0)),
+            upload_data.get("checksum", "")
+        )
+    except upload.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    return {"code": 200, "message": "success", "data": status}
+
+
+@router.get("/uploads/{upload_id}")
+def get_upload_status(upload_id: str):
+    """
+    查询上传进度（断线后从 received 处续传）
+    """
+    try:
+        status = upload.get_upload_status(upload_id)
+    except upload.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    return {"code": 200, "message": "success", "data": status}
+
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="分块起始偏移")
+):
+    """
+    上传一个分块（请求体为原始字节流）
+    """
+    try:
+        status = await upload.write_chunk(upload_id, offset, request.stream())
+    except upload.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    return {"code": 200, "message": "success", "data": status}
+
+
+@router.post("/uploads/{upload_id}/complete")
+def complete_upload(upload_id: str, db: Session = Depends(get_db)):
+    """
+    校验上传文件并导入
+    """
+    try:
+        path = upload.verify_upload(upload_id)
+    except upload.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    try:
+        result = data_import.import_workbook(db, path)
+        bump_version(DATA_VERSION, db)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"导入失败: {str(e)}")
+
+    upload.delete_upload(upload_id)
+
+    return {
+        "code": 200,
+        "message": "导入成功",
+        "data": data_import.format_import_result(result)
+    }
+
+
+@router.delete("/uploads/{upload_id}")
+def cancel_upload(upload_id: str):
+    """
+    取消上传并删除暂存文件
+    """
+    try:
+        upload.delete_upload(upload_id)
+    except upload.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    return {"code": 200, "message": "删除成功", "data": None}
+
+
+# ==================== 数据推送 ====================
+
+@router.get("/push/stats")
+def get_push_stats():
+    """
+    获取数据推送（SSE）的连接与扇出指标
+    """
+    return {"code": 200, "message": "success", "data": push.hub.metrics()}
+
+
+@router.get("/coalescing/stats")
+def get_coalescing_stats():
+    """
+    获取并发请求合并的统计（shared 为共享进行中结果、节省的执行次数）
+    """
+    return {"code": 200, "message": "success", "data": singleflight.get_stats()}
+
+
+@router.get("/tracing/stats")
+def get_tracing_stats():
+    """
+    获取链路追踪的导出统计（已导出、队列满丢弃、导出失败的 span 数）
+    """
+    if tracing.tracer is None:
+        raise HTTPException(status_code=404, detail="链路追踪未启用")
+    return {"code": 200, "message": "success", "data": tracing.tracer.stats()}
+
+
+@router.get("/queries/slow")
+def get_slow_queries():
+    """
+    获取最近的慢查询，以及数据库耗时过长或存在 N+1 查询的请求（新的在前）
+    """
+    if query_profiler.query_log is None:
+        raise HTTPException(status_code=404, detail="查询分析未启用")
+    return {"code": 200, "message": "success", "data": query_profiler.query_log.snapshot()}
+
+
+@router.delete("/queries/slow")
+def clear_slow_queries():
+    """
+    清空慢查询记录
+    """
+    if query_profiler.query_log is None:
+        raise HTTPException(status_code=404, detail="查询分析未启用")
+    query_profiler.query_log.clear()
+    return {"code": 200, "message": "清空成功", "data": None}
+
+
+@router.get("/loop/stats")
+def get_loop_stats(include_stacks: bool = Query(True, description="是否包含阻塞时的调用栈")):
+    """
+    获取事件循环延迟分位数与阻塞记录（阻塞位置按总阻塞时长排序，最近记录新的在前）
+    """
+    if loop_monitor.monitor is None:
+        raise HTTPException(status_code=404, detail="事件循环延迟监测未启用")
+    return {"code": 200, "message": "success", "data": loop_monitor.monitor.snapshot(include_stacks)}
+
+
+@router.delete("/loop/stats")
+def clear_loop_stats():
+    """
+    清空事件循环延迟样本与阻塞记录
+    """
+    if loop_monitor.monitor is None:
+        raise HTTPException(status_code=404, detail="事件循环延迟监测未启用")
+    loop_monitor.monitor.clear()
+    return {"code": 200, "message": "清空成功", "data": None}
+
+
+def require_profile_token(
+    authorization: Optional[str] = Header(None),
+    token: Optional[str] = Query(None, description="剖析令牌（也可用请求头 Authorization: Bearer <令牌>）")
+):
+    """校验剖析令牌（剖析记录包含代码路径，须与触发剖析使用同一令牌）"""
+    if request_profiler.store is None:
+        raise HTTPException(status_code=404, detail="请求剖析未启用")
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[len("bearer "):].strip()
+    if not request_profiler.check_token(token):
+        raise HTTPException(status_code=403, detail="剖析令牌无效")
+
+
+@router.get("/profiles", dependencies=[Depends(require_profile_token)])
+def get_profiles():
+    """
+    获取请求剖析记录（新的在前）
+    """
+    return {"code": 200, "message": "success", "data": request_profiler.store.list()}
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_profile_token)])
+def download_profile(profile_id: str):
+    """
+    下载请求剖析记录（折叠栈格式，可用 flamegraph.pl、speedscope 等生成火焰图）
+    """
+    try:
+        path = request_profiler.store.path(profile_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="剖析记录不存在")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=f"{profile_id}.folded")
+
+
 # ==================== 规则管理 API ====================
 
-@router.get("/rules", response_model=dict)
-async def get_rules(db: Session = Depends(get_db)):
+@router.get("/rules")
+def get_rules(db: Session = Depends(get_db)):
     """
     获取所有显示规则
     """
     try:
         rules = db.query(DisplayRule).order_by(DisplayRule.priority.desc()).all()
-
-        # 转换为响应格式
-        rules_data = []
-        for rule in rules:
-            rule_dict = {
-                "id": rule.id,
-                "page_code": rule.page_code,
-                "table_code": rule.table_code,
-                "rule_type": rule.rule_type,
-                "rule_name": rule.rule_name,
-                "description": rule.description,
-                "priority": rule.priority,
-                "is_enabled": rule.is_enabled,
-                "rule_config": json.loads(rule.rule_config) if rule.rule_config else {},
-                "created_at": rule.created_at.isoformat() if rule.created_at else None,
-                "updated_at": rule.updated_at.isoformat() if rule.updated_at else None
-            }
-            rules_data.append(rule_dict)
+        rules_data = [display_rule.serialize_rule(rule) for rule in rules]
 
         return {
             "code": 200,
@@ -403,8 +416,65 @@ async def get_rules(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"获取规则失败: {str(e)}")
 
 
-@router.get("/rules/{rule_id}", response_model=dict)
-async def get_rule(rule_id: int, db: Session = Depends(get_db)):
+@router.post("/rules/bulk")
+def bulk_rules(payload: dict, db: Session = Depends(get_db)):
+    """
+    批量执行规则操作（create / update / delete / reorder），在一个事务中提交
+
+    请求体: {"operations": [...]}，操作格式见 display_rule.apply_rule_operations
+    """
+    try:
+        results = display_rule.apply_rule_operations(db, payload.get("operations"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量操作失败: {str(e)}")
+
+    return {
+        "code": 200,
+        "message": "操作成功",
+        "data": results
+    }
+
+
+@router.get("/rules/export")
+def export_rules(db: Session = Depends(get_db)):
+    """
+    导出全部规则（JSON 文件）
+    """
+    content = display_rule.export_rules(db)
+    filename = quote(f"显示规则_{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    return ORJSONResponse(
+        content,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"}
+    )
+
+
+@router.post("/rules/import")
+def import_rules(
+    payload: dict,
+    mode: str = Query("replace", description="replace 替换全部规则；merge 按页面、表格与规则名称合并"),
+    db: Session = Depends(get_db)
+):
+    """
+    导入规则（导出文件的内容），在一个事务中提交
+    """
+    try:
+        summary = display_rule.import_rules(db, payload, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"导入规则失败: {str(e)}")
+
+    return {
+        "code": 200,
+        "message": "导入成功",
+        "data": summary
+    }
+
+
+@router.get("/rules/{rule_id}")
+def get_rule(rule_id: int, db: Session = Depends(get_db)):
     """
     获取单个规则详情
     """
@@ -412,19 +482,7 @@ async def get_rule(rule_id: int, db: Session = Depends(get_db)):
     if not rule:
         raise HTTPException(status_code=404, detail="规则不存在")
 
-    rule_dict = {
-        "id": rule.id,
-        "page_code": rule.page_code,
-        "table_code": rule.table_code,
-        "rule_type": rule.rule_type,
-        "rule_name": rule.rule_name,
-        "description": rule.description,
-        "priority": rule.priority,
-        "is_enabled": rule.is_enabled,
-        "rule_config": json.loads(rule.rule_config) if rule.rule_config else {},
-        "created_at": rule.created_at.isoformat() if rule.created_at else None,
-        "updated_at": rule.updated_at.isoformat() if rule.updated_at else None
-    }
+    rule_dict = display_rule.serialize_rule(rule)
 
     return {
         "code": 200,
@@ -433,8 +491,8 @@ async def get_rule(rule_id: int, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/rules", response_model=dict)
-async def create_rule(rule_data: dict, db: Session = Depends(get_db)):
+@router.post("/rules")
+def create_rule(rule_data: dict, db: Session = Depends(get_db)):
     """
     创建新规则
     """
@@ -454,6 +512,7 @@ async def create_rule(rule_data: dict, db: Session = Depends(get_db)):
         )
 
         db.add(new_rule)
+        bump_version(RULES_VERSION, db)
         db.commit()
         db.refresh(new_rule)
 
@@ -469,8 +528,8 @@ async def create_rule(rule_data: dict, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"创建规则失败: {str(e)}")
 
 
-@router.put("/rules/{rule_id}", response_model=dict)
-async def update_rule(rule_id: int, rule_data: dict, db: Session = Depends(get_db)):
+@router.put("/rules/{rule_id}")
+def update_rule(rule_id: int, rule_data: dict, db: Session = Depends(get_db)):
     """
     更新规则
     """
@@ -494,6 +553,7 @@ async def update_rule(rule_id: int, rule_data: dict, db: Session = Depends(get_d
 
         rule.updated_at = datetime.now()
 
+        bump_version(RULES_VERSION, db)
         db.commit()
 
         return {
@@ -508,8 +568,8 @@ async def update_rule(rule_id: int, rule_data: dict, db: Session = Depends(get_d
         raise HTTPException(status_code=500, detail=f"更新规则失败: {str(e)}")
 
 
-@router.delete("/rules/{rule_id}", response_model=dict)
-async def delete_rule(rule_id: int, db: Session = Depends(get_db)):
+@router.delete("/rules/{rule_id}")
+def delete_rule(rule_id: int, db: Session = Depends(get_db)):
     """
     删除规则
     """
@@ -519,6 +579,7 @@ async def delete_rule(rule_id: int, db: Session = Depends(get_db)):
 
     try:
         db.delete(rule)
+        bump_version(RULES_VERSION, db)
         db.commit()
 
         return {
@@ -1,12 +1,67 @@
 """数据 API 路由"""
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services import risk_supervision, dispute_management, situation
+from app.core.cache import DATA_VERSION, GEOCODING_VERSION, RULES_VERSION
+from app.core.database import get_read_db
+from app.core.http_cache import Conditional
+from app.core.responses import ORJSONRoute
+from app.services import risk_supervision, dispute_management, situation, export, push
 from app.models.display_rule import DisplayRule
-from typing import Optional
+from datetime import date
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
+
+# 条件请求（ETag 由数据/规则版本与查询参数计算，命中时返回 304 且不执行查询）
+# 列表与态势数据每次轮询都需确认是否更新（no-cache 仍可用 304）；筛选项变化少，允许短时间直接复用
+RISK_LIST_CACHE = Conditional(DATA_VERSION, RULES_VERSION, cache_control="no-cache", epoch=risk_supervision.time_epoch)
+DISPUTE_LIST_CACHE = Conditional(DATA_VERSION, RULES_VERSION, cache_control="no-cache")
+SITUATION_CACHE = Conditional(
+    DATA_VERSION, RULES_VERSION, GEOCODING_VERSION, cache_control="no-cache", epoch=situation.time_epoch
+)
+OPTIONS_CACHE = Conditional(DATA_VERSION, cache_control="max-age=60, must-revalidate")
+# 盯办分面可按紧急程度筛选，分档依赖剩余天数规则且随时间推移变化
+RISK_FACETS_CACHE = Conditional(
+    DATA_VERSION, RULES_VERSION, cache_control="max-age=60, must-revalidate", epoch=risk_supervision.time_epoch
+)
+DISPLAY_RULES_CACHE = Conditional(RULES_VERSION, cache_control="max-age=60, must-revalidate")
+
+
+def _export_response(stmt, export_format: str, sheet_name: str, headers: List[str]) -> StreamingResponse:
+    """
+    构建流式导出响应
+
+    XLSX 先统计行数，超过 Excel 单个 sheet 的上限时返回 400（提示改用 csv）；
+    XLSX 需整个写完后才输出响应体，大量数据建议使用 csv。
+    """
+    if export_format == "xlsx":
+        total = export.count_rows(stmt)
+        if total + 1 > export.XLSX_MAX_ROWS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"共 {total} 行，超过 Excel 单个 sheet 的行数上限 {export.XLSX_MAX_ROWS}，请使用 format=csv 导出"
+            )
+
+    rows = export.stream_rows(stmt)
+    if export_format == "csv":
+        content = export.iter_csv(headers, rows)
+        media_type = "text/csv; charset=utf-8"
+    else:
+        content = export.iter_xlsx(sheet_name, headers, rows)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    # 对中文文件名进行 URL 编码
+    encoded_filename = quote(f"{sheet_name}.{export_format}")
+
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
+        }
+    )
 
 
 @router.get("/risk-supervision", tags=["数据"])
@@ -19,29 +74,130 @@ def get_risk_supervision(
     sort_field: str = Query("days_remaining", description="排序字段"),
     sort_order: str = Query("asc", regex="^(asc|desc)$", description="排序方向"),
     include_rules: bool = Query(True, description="是否包含规则"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor），传入后忽略 page"),
+    include_total: bool = Query(True, description="是否返回总数"),
+    q: Optional[str] = Query(None, max_length=100, description="全文检索关键词（空格分隔多个关键词）"),
+    urgency: Optional[List[str]] = Query(None, description="紧急程度分档筛选（可多选，如 overdue、lt_3）"),
+    include_summary: bool = Query(True, description="是否返回各紧急程度分档数量"),
+    issue: Optional[str] = Query(None, description="风险问题筛选"),
+    fields: Optional[str] = Query(None, description="返回字段（逗号分隔），不传时返回全部字段"),
+    etag: str = Depends(RISK_LIST_CACHE),
+    db: Session = Depends(get_read_db)
 ):
     """获取执法问题风险盯办列表"""
-    items, total, rules = risk_supervision.list_risk_supervision(
-        db, page, page_size, case_type, problem_type, officer_name, sort_field, sort_order, include_rules
+    try:
+        data = _risk_supervision_data(
+            db, page, page_size, case_type, problem_type, officer_name, sort_field, sort_order, include_rules,
+            cursor, include_total, q, urgency, include_summary, issue, fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return RISK_LIST_CACHE.respond({"code": 200, "data": data}, etag)
+
+
+def _risk_supervision_data(
+    db: Session,
+    page: int = 1,
+    page_size: int = 50,
+    case_type: Optional[str] = None,
+    problem_type: Optional[str] = None,
+    officer_name: Optional[str] = None,
+    sort_field: str = "days_remaining",
+    sort_order: str = "asc",
+    include_rules: bool = True,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    q: Optional[str] = None,
+    urgency: Optional[List[str]] = None,
+    include_summary: bool = True,
+    issue: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Dict[str, Any]:
+    """执法问题风险盯办列表数据（列表接口与数据推送共用）"""
+    items, total, rules, next_cursor = risk_supervision.list_risk_supervision(
+        db, page, page_size, case_type, problem_type, officer_name, sort_field, sort_order, include_rules,
+        cursor, include_total, q, urgency, issue, fields
     )
 
+    # 分档统计不受分档筛选影响，便于切换
+    urgency_summary = None
+    if include_summary:
+        urgency_summary = risk_supervision.get_urgency_summary(db, case_type, problem_type, officer_name, issue)
+
     return {
-        "code": 200,
-        "data": {
-            "total": total,
-            "items": items,
-            "rules": rules if include_rules else []
-        }
+        "total": total,
+        "items": items,
+        "rules": rules if include_rules else [],
+        "next_cursor": next_cursor,
+        "urgency_summary": urgency_summary
     }
 
 
+@router.get("/risk-supervision/export", tags=["数据"])
+def export_risk_supervision(
+    export_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$", description="导出格式"),
+    case_type: Optional[str] = Query(None, description="案件类型筛选"),
+    problem_type: Optional[str] = Query(None, description="问题类型筛选"),
+    officer_name: Optional[str] = Query(None, description="责任民警筛选"),
+    sort_field: str = Query("days_remaining", description="排序字段"),
+    sort_order: str = Query("asc", pattern="^(asc|desc)$", description="排序方向"),
+    issue: Optional[str] = Query(None, description="风险问题筛选"),
+    q: Optional[str] = Query(None, max_length=100, description="全文检索关键词（空格分隔多个关键词）"),
+    urgency: Optional[List[str]] = Query(None, description="紧急程度分档筛选（可多选，如 overdue、lt_3）"),
+    db: Session = Depends(get_read_db)
+):
+    """导出执法问题风险盯办（筛选条件与列表一致）"""
+    try:
+        stmt = export.risk_supervision_select(
+            db, case_type, problem_type, officer_name, sort_field, sort_order, issue, q, urgency
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _export_response(stmt, export_format, "执法问题盯办", export.RISK_SUPERVISION_HEADERS)
+
+
 @router.get("/risk-supervision/filter-options", tags=["数据"])
-def get_risk_supervision_filter_options(db: Session = Depends(get_db)):
+def get_risk_supervision_filter_options(
+    etag: str = Depends(OPTIONS_CACHE),
+    db: Session = Depends(get_read_db)
+):
     """获取案件筛选选项"""
     officers = risk_supervision.get_officer_options(db)
     case_types = risk_supervision.get_case_type_options(db)
-    return {"code": 200, "data": {"officers": officers, "case_types": case_types}}
+    return OPTIONS_CACHE.respond({"code": 200, "data": {"officers": officers, "case_types": case_types}}, etag)
+
+
+@router.get("/risk-supervision/issue-stats", tags=["数据"])
+def get_risk_supervision_issue_stats(
+    case_type: Optional[str] = Query(None, description="案件类型筛选"),
+    problem_type: Optional[str] = Query(None, description="问题类型筛选"),
+    officer_name: Optional[str] = Query(None, description="责任民警筛选"),
+    etag: str = Depends(OPTIONS_CACHE),
+    db: Session = Depends(get_read_db)
+):
+    """获取风险问题频次统计（按案件数降序）"""
+    stats = risk_supervision.get_issue_stats(db, case_type, problem_type, officer_name)
+    return OPTIONS_CACHE.respond({"code": 200, "data": stats}, etag)
+
+
+@router.get("/risk-supervision/facets", tags=["数据"])
+def get_risk_supervision_facets(
+    case_type: Optional[str] = Query(None, description="案件类型筛选"),
+    problem_type: Optional[str] = Query(None, description="问题类型筛选"),
+    officer_name: Optional[str] = Query(None, description="责任民警筛选"),
+    q: Optional[str] = Query(None, max_length=100, description="全文检索关键词（空格分隔多个关键词）"),
+    urgency: Optional[List[str]] = Query(None, description="紧急程度分档筛选（可多选，如 overdue、lt_3）"),
+    issue: Optional[str] = Query(None, description="风险问题筛选"),
+    etag: str = Depends(RISK_FACETS_CACHE),
+    db: Session = Depends(get_read_db)
+):
+    """获取案件筛选分面及数量（每个分面在其他已选条件下计数，关键词、紧急程度、风险问题对所有分面生效）"""
+    try:
+        facets = risk_supervision.get_facets(db, case_type, problem_type, officer_name, q, issue, urgency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RISK_FACETS_CACHE.respond({"code": 200, "data": facets}, etag)
 
 
 @router.get("/dispute-management", tags=["数据"])
@@ -54,53 +210,144 @@ def get_dispute_management(
     sort_field: str = Query("event_time", description="排序字段"),
     sort_order: str = Query("desc", regex="^(asc|desc)$", description="排序方向"),
     include_rules: bool = Query(True, description="是否包含规则"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="游标（上一页返回的 next_cursor），传入后忽略 page"),
+    include_total: bool = Query(True, description="是否返回总数"),
+    q: Optional[str] = Query(None, max_length=100, description="全文检索关键词（空格分隔多个关键词）"),
+    fields: Optional[str] = Query(None, description="返回字段（逗号分隔），不传时返回全部字段"),
+    etag: str = Depends(DISPUTE_LIST_CACHE),
+    db: Session = Depends(get_read_db)
 ):
     """获取矛盾纠纷闭环管理列表"""
-    items, total, rules = dispute_management.list_dispute_management(
-        db, page, page_size, status, risk_level, officer_name, sort_field, sort_order, include_rules
-    )
+    try:
+        data = _dispute_management_data(
+            db, page, page_size, status, risk_level, officer_name, sort_field, sort_order, include_rules,
+            cursor, include_total, q, fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return DISPUTE_LIST_CACHE.respond({"code": 200, "data": data}, etag)
 
+
+def _dispute_management_data(
+    db: Session,
+    page: int = 1,
+    page_size: int = 50,
+    status: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    officer_name: Optional[str] = None,
+    sort_field: str = "event_time",
+    sort_order: str = "desc",
+    include_rules: bool = True,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    q: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Dict[str, Any]:
+    """矛盾纠纷闭环管理列表数据（列表接口与数据推送共用）"""
+    items, total, rules, next_cursor = dispute_management.list_dispute_management(
+        db, page, page_size, status, risk_level, officer_name, sort_field, sort_order, include_rules,
+        cursor, include_total, q, fields
+    )
     return {
-        "code": 200,
-        "data": {
-            "total": total,
-            "items": items,
-            "rules": rules if include_rules else []
-        }
+        "total": total,
+        "items": items,
+        "rules": rules if include_rules else [],
+        "next_cursor": next_cursor
     }
 
 
+@router.get("/dispute-management/export", tags=["数据"])
+def export_dispute_management(
+    export_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$", description="导出格式"),
+    status: Optional[str] = Query(None, description="处置进度筛选"),
+    risk_level: Optional[str] = Query(None, description="风险等级筛选"),
+    officer_name: Optional[str] = Query(None, description="责任民警筛选"),
+    sort_field: str = Query("event_time", description="排序字段"),
+    sort_order: str = Query("desc", pattern="^(asc|desc)$", description="排序方向"),
+    q: Optional[str] = Query(None, max_length=100, description="全文检索关键词（空格分隔多个关键词）"),
+    db: Session = Depends(get_read_db)
+):
+    """导出矛盾纠纷闭环管理（筛选条件与列表一致）"""
+    stmt = export.dispute_management_select(db, status, risk_level, officer_name, sort_field, sort_order, q)
+    return _export_response(stmt, export_format, "矛盾纠纷管理", export.DISPUTE_MANAGEMENT_HEADERS)
+
+
+@router.get("/police-alert/export", tags=["数据"])
+def export_police_alert(
+    export_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$", description="导出格式"),
+    alert_type: Optional[str] = Query(None, description="警情类型筛选"),
+    location: Optional[str] = Query(None, description="地点筛选"),
+    start_date: Optional[date] = Query(None, description="开始日期"),
+    end_date: Optional[date] = Query(None, description="结束日期")
+):
+    """导出警情态势追踪日清数据（导入时次数累加，导出文件不能再导入同一数据库）"""
+    stmt = export.police_alert_select(alert_type, location, start_date, end_date)
+    return _export_response(stmt, export_format, "警情态势追踪", export.POLICE_ALERT_HEADERS)
+
+
+@router.get("/call-record/export", tags=["数据"])
+def export_call_record(
+    export_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv)$", description="导出格式"),
+    call_address: Optional[str] = Query(None, description="报警地点筛选"),
+    start_date: Optional[date] = Query(None, description="开始日期"),
+    end_date: Optional[date] = Query(None, description="结束日期")
+):
+    """导出重复报警记录日清数据（导入时次数累加，导出文件不能再导入同一数据库）"""
+    stmt = export.call_record_select(call_address, start_date, end_date)
+    return _export_response(stmt, export_format, "重复报警记录", export.CALL_RECORD_HEADERS)
+
+
 @router.get("/dispute-management/filter-options", tags=["数据"])
-def get_dispute_management_filter_options(db: Session = Depends(get_db)):
+def get_dispute_management_filter_options(
+    etag: str = Depends(OPTIONS_CACHE),
+    db: Session = Depends(get_read_db)
+):
     """获取纠纷筛选选项"""
     officers = dispute_management.get_officer_options(db)
-    return {"code": 200, "data": {"officers": officers}}
+    return OPTIONS_CACHE.respond({"code": 200, "data": {"officers": officers}}, etag)
+
+
+@router.get("/dispute-management/facets", tags=["数据"])
+def get_dispute_management_facets(
+    status: Optional[str] = Query(None, description="处置进度筛选，不传时默认待化解、待关注"),
+    risk_level: Optional[str] = Query(None, description="风险等级筛选"),
+    officer_name: Optional[str] = Query(None, description="责任民警筛选"),
+    q: Optional[str] = Query(None, max_length=100, description="全文检索关键词（空格分隔多个关键词）"),
+    etag: str = Depends(OPTIONS_CACHE),
+    db: Session = Depends(get_read_db)
+):
+    """获取纠纷筛选分面及数量（每个分面在其他已选条件下计数，关键词对所有分面生效）"""
+    facets = dispute_management.get_facets(db, status, risk_level, officer_name, q)
+    return OPTIONS_CACHE.respond({"code": 200, "data": facets}, etag)
 
 
 @router.get("/situation", tags=["数据"])
 async def get_situation_data(
     time_period: str = Query("month", description="时间维度（week/month/year）"),
     alert_types: Optional[str] = Query("偷盗,诈骗", description="地图显示的警情类型，逗号分隔"),
-    db: Session = Depends(get_db)
+    etag: str = Depends(SITUATION_CACHE)
 ):
     """获取警情态势页面所需的所有数据（包含地图数据）"""
-    # 解析警情类型
-    types_list = [t.strip() for t in alert_types.split(",") if t.strip()]
-
-    # 获取态势数据（包含地图数据）
-    data = await situation.get_situation_data(db, time_period, types_list)
+    # 获取态势数据（包含地图数据，并发的相同请求合并为一次计算）
+    data = await situation.get_situation_data_shared(time_period, _parse_alert_types(alert_types))
 
-    return {
+    return SITUATION_CACHE.respond({
         "code": 200,
         "data": data
-    }
+    }, etag)
+
+
+def _parse_alert_types(alert_types: Optional[str]) -> List[str]:
+    """解析警情类型（逗号分隔）"""
+    return [t.strip() for t in (alert_types or "").split(",") if t.strip()]
 
 
 @router.get("/display-rules", tags=["数据"])
 def get_display_rules(
     page_code: Optional[str] = Query(None, description="页面代码"),
-    db: Session = Depends(get_db)
+    etag: str = Depends(DISPLAY_RULES_CACHE),
+    db: Session = Depends(get_read_db)
 ):
     """获取显示规则描述（用于页面底部提示）"""
     # 构建查询
@@ -116,9 +363,83 @@ def get_display_rules(
     descriptions = [rule.description for rule in rules if rule.description]
     display_text = " | ".join(descriptions) if descriptions else "暂无显示规则"
 
-    return {
+    return DISPLAY_RULES_CACHE.respond({
         "code": 200,
         "data": {
             "display_rules": display_text
         }
-    }
+    }, etag)
+
+
+# ==================== 数据推送（SSE） ====================
+
+def _check_page_params(params: Dict[str, Any]) -> None:
+    """校验推送订阅的分页参数（与列表接口的取值范围一致）"""
+    if params["page"] < 1 or not 1 <= params["page_size"] <= 100:
+        raise ValueError("页码须大于 0，每页数量须在 1~100 之间")
+
+
+def _push_risk_supervision(db: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+    _check_page_params(params)
+    return {"code": 200, "data": _risk_supervision_data(db, **params)}
+
+
+def _push_dispute_management(db: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+    _check_page_params(params)
+    return {"code": 200, "data": _dispute_management_data(db, **params)}
+
+
+async def _push_situation(db: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+    # 与同时到达的态势接口请求合并计算
+    data = await situation.get_situation_data_shared(params["time_period"], _parse_alert_types(params["alert_types"]))
+    return {"code": 200, "data": data}
+
+
+# 可订阅的页面：参数与对应数据接口一致（游标分页不支持订阅）
+push.hub.register("situation", push.PageSpec(
+    "/api/v1/data/situation", SITUATION_CACHE,
+    {"time_period": "month", "alert_types": "偷盗,诈骗"},
+    _push_situation
+))
+push.hub.register("risk-supervision", push.PageSpec(
+    "/api/v1/data/risk-supervision", RISK_LIST_CACHE,
+    {
+        "page": 1, "page_size": 50, "case_type": None, "problem_type": None, "officer_name": None,
+        "sort_field": "days_remaining", "sort_order": "asc", "include_rules": True, "include_total": True,
+        "q": None, "urgency": [], "include_summary": True, "issue": None, "fields": None
+    },
+    _push_risk_supervision
+))
+push.hub.register("dispute-management", push.PageSpec(
+    "/api/v1/data/dispute-management", DISPUTE_LIST_CACHE,
+    {
+        "page": 1, "page_size": 50, "status": None, "risk_level": None, "officer_name": None,
+        "sort_field": "event_time", "sort_order": "desc", "include_rules": True, "include_total": True,
+        "q": None, "fields": None
+    },
+    _push_dispute_management
+))
+
+
+@router.get("/stream", tags=["数据"])
+async def stream_page_data(
+    request: Request,
+    channel: str = Query(..., description="订阅的页面（situation / risk-supervision / dispute-management）")
+):
+    """
+    订阅页面数据推送（SSE）
+
+    其余查询参数（含列表页码 page）与对应数据接口一致。连接建立后先推送当前数据，
+    之后每当导入数据、修改规则等使数据变化时推送完整响应（event: update，data 与数据接口的响应相同）。
+    """
+    query_items = [(name, value) for name, value in request.query_params.multi_items() if name != "channel"]
+    try:
+        subscription = await push.hub.subscribe(channel, query_items, request.headers.get("last-event-id"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        push.hub.events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,184 @@
+"""进程内缓存与数据版本
+
+导入数据、修改规则后递增对应的版本号，依赖该版本的缓存与 ETag 自动失效。
+
+文件数据库的版本号记录在版本表 t_cache_version 中，与导入、规则修改在同一事务中递增，
+多进程（uvicorn --workers）时各进程读到的版本一致：某个进程处理导入后，其他进程的缓存同样失效。
+读取时先查询专用连接上的 PRAGMA data_version，只有其他连接提交过写入时才重新读取版本表。
+内存数据库只能单进程使用，版本号只在进程内记录。
+"""
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.core import metrics
+from app.core.database import IS_SQLITE_FILE, engine, read_engine
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import sqlite3
+
+# 数据版本：导入后递增
+DATA_VERSION = "data"
+# 规则版本：规则增删改后递增
+RULES_VERSION = "rules"
+# 地理编码版本：新坐标写入缓存后递增
+GEOCODING_VERSION = "geocoding"
+
+# 版本表（由迁移创建）
+VERSION_TABLE = "t_cache_version"
+
+_BUMP_SQL = text(
+    f"INSERT INTO {VERSION_TABLE} (name, version) VALUES (:name, 1) "
+    "ON CONFLICT(name) DO UPDATE SET version = version + 1"
+)
+
+# 内存数据库的进程内版本号
+_versions: Dict[str, int] = {DATA_VERSION: 0, RULES_VERSION: 0, GEOCODING_VERSION: 0}
+_versions_lock = Lock()
+
+# 版本变化监听函数（如数据推送），在递增版本的线程中调用；只能收到本进程的递增
+_listeners: List[Callable[[str, int], None]] = []
+
+
+class _VersionStore:
+    """版本表的读取缓存（常驻占用只读连接池中的一个连接）"""
+
+    def __init__(self):
+        self._connection = None
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            if self._connection is None:
+                self._connection = read_engine.raw_connection()
+            cursor = self._connection.cursor()
+            try:
+                # 本连接只读，其他连接（含其他进程）提交后 data_version 才会变化
+                data_version = cursor.execute("PRAGMA data_version").fetchone()[0]
+                if data_version != self._data_version:
+                    try:
+                        self._versions = dict(cursor.execute(f"SELECT name, version FROM {VERSION_TABLE}").fetchall())
+                    except sqlite3.OperationalError:  # 迁移前版本表尚不存在
+                        self._versions = {}
+                    self._data_version = data_version
+            finally:
+                cursor.close()
+            return self._versions.get(name, 0)
+
+
+_store = _VersionStore() if IS_SQLITE_FILE else None
+
+
+def get_version(name: str) -> int:
+    """获取版本号"""
+    if _store is not None:
+        return _store.get(name)
+    return _versions.get(name, 0)
+
+
+def _increment(name: str) -> None:
+    """进程内递增（内存数据库）"""
+    with _versions_lock:
+        _versions[name] = _versions.get(name, 0) + 1
+
+
+def _notify(name: str) -> None:
+    version = get_version(name)
+    for listener in list(_listeners):
+        listener(name, version)
+
+
+def bump_version(name: str, db: Optional[Session] = None) -> None:
+    """
+    递增版本号
+
+    Args:
+        name: 版本名称
+        db: 可选，写入会话；传入时在该会话的事务中递增，随数据一起提交（提交后通知监听函数），
+            不传时单独提交
+    """
+    def committed(session: Optional[Session] = None) -> None:
+        if _store is None:
+            _increment(name)
+        _notify(name)
+
+    if db is None:
+        if _store is not None:
+            with engine.begin() as conn:
+                conn.execute(_BUMP_SQL, {"name": name})
+        committed()
+        return
+
+    if _store is not None:
+        db.execute(_BUMP_SQL, {"name": name})
+    event.listen(db, "after_commit", committed, once=True)
+
+
+def add_version_listener(listener: Callable[[str, int], None]) -> None:
+    """注册版本变化监听函数，参数为 (版本名称, 新版本号)"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_version_listener(listener: Callable[[str, int], None]) -> None:
+    """移除版本变化监听函数"""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+class VersionedCache:
+    """
+    按版本失效的 LRU 缓存
+
+    Args:
+        version_name: 依赖的版本名称
+        max_entries: 最多缓存条数
+        name: 缓存名称（指标中的标签）
+    """
+
+    def __init__(self, version_name: str, max_entries: int = 256, name: str = "default"):
+        self.version_name = version_name
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        # 首次读取时确定版本（模块导入时数据库可能尚未迁移）
+        self._version: Optional[int] = None
+        self._lock = Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        读取缓存，未命中或版本变化时调用 compute 计算并写入
+
+        Args:
+            key: 缓存键（需可哈希）
+            compute: 计算函数
+
+        Returns:
+            缓存值
+        """
+        version = get_version(self.version_name)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                metrics.record_cache(self.name, True)
+                return self._entries[key]
+
+        metrics.record_cache(self.name, False)
+        value = compute()
+
+        with self._lock:
+            # 计算期间版本变化则不写入，避免缓存旧数据
+            if get_version(self.version_name) == self._version == version:
+                self._entries[key] = value
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
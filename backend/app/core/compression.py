@@ -0,0 +1,195 @@
+"""响应压缩中间件 - 按 Accept-Encoding 协商 brotli / gzip
+
+大屏通过较慢的局域网访问，JSON 与前端静态资源压缩后体积通常只有原来的 10%~20%。
+小于阈值的响应、已压缩的内容（图片、xlsx 等）、SSE 推送流不压缩。
+压缩后的响应是另一种表示，强 ETag 末尾追加编码后缀（如 "xxx-gzip"）。
+brotli 为可选依赖，未安装时只协商 gzip。
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, List, Optional
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+# 可压缩的内容类型（前缀匹配）
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+# 即使属于 text/* 也不压缩（流式推送需要逐条立即送达）
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+def supported_encodings() -> List[str]:
+    """服务端支持的编码（按优先级）"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    根据 Accept-Encoding 选择编码
+
+    支持 q 值与 *，q 值相同时优先 brotli。
+
+    Args:
+        accept_encoding: 请求头取值，如 "gzip, deflate, br;q=0.9"
+
+    Returns:
+        "br" / "gzip"，无可用编码时返回 None
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    """增量压缩器"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件
+
+    Args:
+        app: ASGI 应用
+        minimum_size: 压缩阈值（字节），一次性返回且小于阈值的响应不压缩
+        gzip_level: gzip 压缩级别 (1-9)
+        brotli_quality: brotli 压缩质量 (0-11)，动态内容取 4 左右兼顾速度
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """拦截 send：收到第一段响应体后决定是否压缩"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _should_compress(self, headers: Headers) -> bool:
+        if self.start_message["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        if content_type.startswith(EXCLUDED_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._should_compress(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.downstream(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            # 一次性返回的小响应不压缩
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                MutableHeaders(raw=self.start_message["headers"]).add_vary_header("Accept-Encoding")
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self.compressor = _Compressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/") and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+            if "content-length" in headers:
+                del headers["content-length"]
+            if not more_body:
+                data = self.compressor.compress(body) + self.compressor.flush()
+                headers["Content-Length"] = str(len(data))
+                await self.downstream(self.start_message)
+                await self.downstream({"type": "http.response.body", "body": data})
+                return
+            await self.downstream(self.start_message)
+
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.flush()
+        if data or not more_body:
+            await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
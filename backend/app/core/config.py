@@ -1,6 +1,6 @@
 """应用配置模块"""
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -13,14 +13,69 @@ class Settings(BaseSettings):
 
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./data.db"
+    SQL_ECHO: bool = False  # 输出每条 SQL（调试用，量大）
+
+    # SQLite 存储配置（每个连接建立时设置）
+    SQLITE_JOURNAL_MODE: str = "WAL"  # 读写互不阻塞
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # WAL 下 NORMAL 只在检查点同步，断电最多丢失最近提交
+    SQLITE_MMAP_SIZE: int = 268435456  # 内存映射读取上限 256MB，0 为关闭
+    SQLITE_CACHE_SIZE: int = -16384  # 每个连接的页缓存，负数单位为 KiB（16MB）
+    SQLITE_TEMP_STORE: str = "MEMORY"  # 排序、分组的临时数据放在内存
+    SQLITE_BUSY_TIMEOUT: int = 10000  # 等待写锁的毫秒数
+    DB_READ_POOL_SIZE: int = 8  # 只读连接池大小（另可临时溢出同样数量）
 
     # 地理编码API配置
     TIANDITU_API_KEY: str = ""
     AMAP_API_KEY: str = ""
+    GEOCODING_RETRY_SECONDS: int = 600  # 解析失败的地址在该时间内不再调用地理编码接口
 
     # 文件上传配置
     UPLOAD_DIR: str = "./uploads"
-    MAX_UPLOAD_SIZE: int = 10485760  # 10MB
+    MAX_UPLOAD_SIZE: int = 10485760  # 单次上传上限 10MB
+    UPLOAD_MAX_TOTAL_SIZE: int = 209715200  # 分块上传文件上限 200MB
+    UPLOAD_CHUNK_SIZE: int = 1048576  # 分块上传单块上限 1MB
+    UPLOAD_SESSION_TTL_HOURS: int = 24  # 超过该时间未更新的分块上传会话在启动时清理
+
+    # 响应压缩配置
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # 小于该字节数的响应不压缩
+    GZIP_COMPRESS_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
+    # 数据推送（SSE）配置
+    PUSH_HEARTBEAT_SECONDS: int = 15  # 心跳间隔，保持连接不被代理断开
+    PUSH_CHECK_INTERVAL: int = 30  # 定时检查间隔（跨日、地理编码重试等不递增数据版本的变化）
+    PUSH_QUEUE_SIZE: int = 4  # 每个连接待发送的消息上限，慢客户端只保留最新消息
+
+    # 查询分析配置
+    QUERY_PROFILER_ENABLED: bool = True  # Server-Timing 响应头与慢查询记录
+    SLOW_QUERY_MS: float = 100  # 慢查询阈值，请求的数据库总耗时超过该值也记录
+    QUERY_REPEAT_THRESHOLD: int = 10  # 同一语句在一个请求内执行达到该次数时记录（N+1 查询）
+    SLOW_QUERY_LOG_SIZE: int = 200  # 保留的最近记录数
+
+    # 事件循环延迟监测配置（调试用）
+    LOOP_MONITOR_ENABLED: Optional[bool] = None  # 未设置时随 DEBUG 启用
+    LOOP_MONITOR_INTERVAL_MS: float = 50  # 采样间隔
+    LOOP_BLOCK_THRESHOLD_MS: float = 100  # 延迟超过该值视为阻塞，记录调用栈
+    LOOP_MONITOR_WINDOW: int = 6000  # 计算分位数的最近样本数（按采样间隔约 5 分钟）
+    LOOP_BLOCK_LOG_SIZE: int = 100  # 保留的最近阻塞记录数
+
+    # 按需请求剖析配置（携带令牌的请求采样调用栈，保存为火焰图折叠栈文件）
+    PROFILING_TOKEN: str = ""  # 剖析令牌，为空时不启用
+    PROFILE_DIR: str = "./profiles"
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5  # 采样间隔
+    PROFILE_KEEP: int = 50  # 保留的剖析记录数
+
+    # 链路追踪配置（接口、服务函数、SQL 与地理编码的 span，OTLP/JSON 格式）
+    TRACE_EXPORTER: str = "none"  # none 不启用 / file 写入本地文件 / otlp 发送到 OTLP/HTTP 接收端
+    TRACE_SAMPLE_RATE: float = 0.05  # 接口请求的采样比例（携带 traceparent 时沿用上游决定）
+    TRACE_FILE: str = "./traces/spans.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACE_SERVICE_NAME: str = "police-alert"
+    TRACE_DB_SPANS: bool = True  # 为每条 SQL 语句创建 span
+    TRACE_QUEUE_SIZE: int = 4096  # 待导出 span 上限，超出时丢弃
+
+    # 监控指标配置（/metrics，Prometheus 格式）
+    METRICS_ENABLED: bool = True
 
     # CORS配置
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
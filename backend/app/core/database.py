@@ -1,27 +1,107 @@
-"""数据库连接模块"""
-from sqlalchemy import create_engine
+"""数据库连接模块
+
+SQLite 下使用两个引擎：
+- engine：写引擎，用于导入、坐标缓存写入、规则管理与建表迁移
+- read_engine：只读连接池，用于数据接口（连接设置 query_only，误写会直接报错）
+
+每个连接建立时按存储配置设置 PRAGMA。WAL 模式下读不阻塞写、写不阻塞读，
+导入期间大屏接口仍可读取提交前的数据；写锁冲突时按 busy_timeout 等待而不是立即报错。
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.DEBUG
-)
+_url = make_url(settings.DATABASE_URL)
+IS_SQLITE = _url.get_backend_name() == "sqlite"
+# 内存数据库每个连接各自独立，读写必须共用引擎
+_IS_MEMORY = IS_SQLITE and (not _url.database or _url.database == ":memory:" or "mode=memory" in _url.database)
+# 文件数据库可由多个进程（uvicorn --workers）共享
+IS_SQLITE_FILE = IS_SQLITE and not _IS_MEMORY
+
+
+def sqlite_pragmas(read_only: bool = False) -> list:
+    """
+    连接建立时执行的 PRAGMA（按存储配置生成）
+
+    Args:
+        read_only: 是否为只读连接（不切换日志模式、不设置同步级别）
+
+    Returns:
+        PRAGMA 语句列表
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT)}",
+        f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}",
+        f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # 日志模式记录在数据库文件中，由写连接设置
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        pragmas.insert(1, f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+    return pragmas
+
+
+def _apply_pragmas(target_engine, pragmas: list) -> None:
+    @event.listens_for(target_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _create_engine(**kwargs):
+    return create_engine(
+        settings.DATABASE_URL,
+        connect_args={"check_same_thread": False} if IS_SQLITE else {},
+        echo=settings.SQL_ECHO,
+        **kwargs
+    )
+
+
+# 写引擎
+engine = _create_engine()
+if IS_SQLITE:
+    _apply_pragmas(engine, sqlite_pragmas())
+
+# 只读引擎
+if IS_SQLITE_FILE:
+    read_engine = _create_engine(
+        pool_size=settings.DB_READ_POOL_SIZE,
+        max_overflow=settings.DB_READ_POOL_SIZE
+    )
+    _apply_pragmas(read_engine, sqlite_pragmas(read_only=True))
+else:
+    read_engine = engine
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # 创建基类
 Base = declarative_base()
 
 
 def get_db():
-    """获取数据库会话"""
+    """获取数据库会话（可写）"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """获取只读数据库会话（数据接口使用）"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,119 @@
+"""HTTP 条件请求：ETag / If-None-Match / Cache-Control
+
+大屏按固定间隔轮询接口，数据只在导入、修改规则等时刻变化。
+接口的 ETag 由数据版本号（见 app.core.cache）、请求路径与查询参数计算，
+无需执行查询即可得到；客户端携带的 If-None-Match 命中时直接返回 304，
+接口函数（及其中的数据库查询）不会执行。
+
+版本号只在进程内有效，ETag 中加入进程启动标识，重启后旧 ETag 全部失效。
+压缩中间件会为压缩后的响应在 ETag 末尾追加编码后缀（如 "xxx-gzip"），
+比较时去掉后缀，使不同编码的表示共用同一个验证器。
+"""
+from fastapi import Request
+from starlette.responses import Response
+from app.core.cache import get_version
+from app.core.responses import ORJSONResponse
+from typing import Any, Callable, Iterable, Optional, Sequence, Tuple
+import hashlib
+import uuid
+
+# 进程启动标识
+_BOOT_ID = uuid.uuid4().hex
+
+# 压缩中间件追加的编码后缀
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+class NotModified(Exception):
+    """If-None-Match 命中，由异常处理器返回 304"""
+
+    def __init__(self, etag: str, cache_control: str):
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+def make_etag(*parts: Any) -> str:
+    """由各组成部分计算强 ETag（带引号）"""
+    digest = hashlib.blake2b("\x1f".join(str(part) for part in parts).encode("utf-8"), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    """去掉压缩中间件追加的编码后缀"""
+    for suffix in ENCODING_SUFFIXES:
+        if etag.endswith(suffix + '"'):
+            return etag[:-len(suffix) - 1] + '"'
+    return etag
+
+
+def matches(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    判断 If-None-Match 是否命中（弱比较，RFC 9110 13.1.2）
+
+    Args:
+        if_none_match: 请求头取值，可包含多个 ETag 或 *
+        etag: 当前 ETag
+
+    Returns:
+        命中时返回客户端持有的 ETag（304 响应原样返回），否则返回 None
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        opaque = candidate[2:] if candidate.startswith("W/") else candidate
+        if strip_encoding_suffix(opaque) == etag:
+            return opaque
+    return None
+
+
+class Conditional:
+    """
+    条件请求依赖
+
+    作为接口的依赖使用：计算 ETag，If-None-Match 命中时抛出 NotModified（返回 304）；
+    未命中时返回 ETag，接口通过 respond 输出带 ETag 与 Cache-Control 的响应。
+
+    Args:
+        versions: ETag 依赖的版本名称（如 DATA_VERSION、RULES_VERSION）
+        cache_control: Cache-Control 取值
+        epoch: 可选，返回随时间变化的部分（如剩余天数的计算基准）
+    """
+
+    def __init__(self, *versions: str, cache_control: str, epoch: Optional[Callable[[], Any]] = None):
+        self.versions: Sequence[str] = versions
+        self.cache_control = cache_control
+        self.epoch = epoch
+
+    def etag_for(self, request: Request) -> str:
+        """计算请求的 ETag"""
+        return self.compute_etag(request.url.path, request.query_params.multi_items())
+
+    def compute_etag(self, path: str, query_items: Iterable[Tuple[str, str]]) -> str:
+        """由路径与查询参数计算 ETag（查询参数排序后计算，与参数顺序无关）"""
+        parts = [_BOOT_ID, path, sorted(query_items)]
+        parts.extend(f"{name}={get_version(name)}" for name in self.versions)
+        if self.epoch is not None:
+            parts.append(self.epoch())
+        return make_etag(*parts)
+
+    async def __call__(self, request: Request) -> str:
+        etag = self.etag_for(request)
+        matched = matches(request.headers.get("if-none-match"), etag)
+        if matched is not None:
+            raise NotModified(matched, self.cache_control)
+        return etag
+
+    def respond(self, content: Any, etag: str) -> Response:
+        """输出带 ETag 与 Cache-Control 的 JSON 响应"""
+        return ORJSONResponse(content, headers={"ETag": etag, "Cache-Control": self.cache_control})
+
+
+def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    """NotModified 异常处理器：返回 304"""
+    return Response(
+        status_code=304,
+        headers={"ETag": exc.etag, "Cache-Control": exc.cache_control, "Vary": "Accept-Encoding"}
+    )
@@ -1,5 +1,7 @@
 """数据库初始化脚本"""
 from app.core.database import engine, Base, SessionLocal
+from app.core.migrations import run_migrations
+from app.services import search
 from app.models import DisplayRule
 import json
 
@@ -10,6 +12,14 @@ def init_database():
     Base.metadata.create_all(bind=engine)
     print("数据库表创建完成")
 
+    # 为已有数据库补充列和索引
+    version = run_migrations()
+    print(f"数据库结构版本: {version}")
+
+    # 检测 FTS5（建临时表探测，须在写连接上进行；只读连接的检索沿用检测结果）
+    with engine.connect() as conn:
+        search.is_available(conn)
+
     # 初始化显示规则
     db = SessionLocal()
     try:
@@ -0,0 +1,231 @@
+"""事件循环延迟监测（调试用）
+
+监测协程按固定间隔休眠，醒来时比预期晚的时间即事件循环延迟（其间循环被其他代码占用），
+保留最近的样本用于计算分位数。
+
+另有一个守护线程检查监测协程的最近一次醒来时间：超过间隔加阈值仍未醒来，说明事件循环
+正被阻塞，此时抓取事件循环线程的调用栈（即正在阻塞循环的代码），循环恢复后补记阻塞时长。
+阻塞按调用栈中最内层的应用代码归类统计，便于定位在事件循环上执行同步 I/O 或耗时计算的接口，
+并在改造后确认不再出现。
+"""
+from collections import deque
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+
+from app.core import metrics
+
+# 调用栈保留的最大帧数
+MAX_STACK_FRAMES = 40
+
+# 归类统计保留的阻塞位置数
+MAX_HOTSPOTS = 50
+
+# 应用代码所在目录（用于从调用栈中挑出应用代码帧）
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """已排序样本的分位数（最近秩）"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _format_stack(frame) -> List[Dict[str, Any]]:
+    stack = traceback.extract_stack(frame)[-MAX_STACK_FRAMES:]
+    return [
+        {"file": entry.filename, "line": entry.lineno, "function": entry.name, "code": entry.line}
+        for entry in stack
+    ]
+
+
+def _blocking_site(stack: List[Dict[str, Any]]) -> str:
+    """阻塞位置：最内层的应用代码帧（没有时取最内层帧）"""
+    for entry in reversed(stack):
+        if entry["file"].startswith(_APP_DIR) and entry["file"] != __file__:
+            return f"{os.path.relpath(entry['file'], os.path.dirname(_APP_DIR))}:{entry['line']} {entry['function']}"
+    if stack:
+        entry = stack[-1]
+        return f"{entry['file']}:{entry['line']} {entry['function']}"
+    return "<unknown>"
+
+
+class LoopMonitor:
+    """
+    事件循环延迟与阻塞监测
+
+    Args:
+        interval_ms: 采样间隔（毫秒）
+        threshold_ms: 阻塞阈值（毫秒），延迟超过该值时记录调用栈
+        window: 计算分位数的最近样本数
+        size: 保留的最近阻塞记录数
+    """
+
+    def __init__(self, interval_ms: float, threshold_ms: float, window: int, size: int):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._blocks: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._hotspots: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+        self._total_blocks = 0
+        self._started_at: Optional[float] = None
+        # 监测协程最近一次醒来的时间，由守护线程读取
+        self._tick = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[Thread] = None
+        self._stopping = Event()
+
+    async def start(self) -> None:
+        """在当前事件循环中启动监测"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._started_at = time.time()
+        self._tick = time.perf_counter()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._tick = now
+            lag = max(0.0, now - expected)
+            with self._lock:
+                self._samples.append(lag)
+            metrics.record_loop_lag(lag)
+
+    def _watch(self) -> None:
+        """守护线程：监测协程迟迟不醒来时抓取事件循环线程的调用栈"""
+        check = max(0.005, self.threshold / 4)
+        pending: Optional[Dict[str, Any]] = None
+        # 已记录的阻塞对应的醒来时间（同一次阻塞只抓取一次调用栈）
+        pending_tick: Optional[float] = None
+        while not self._stopping.wait(check):
+            tick = self._tick
+            if pending_tick is not None and tick != pending_tick:
+                # 循环已恢复，补记阻塞时长
+                if pending is not None:
+                    self._finish(pending, tick - pending_tick - self.interval)
+                pending = None
+                pending_tick = None
+            if pending_tick is None:
+                stalled = time.perf_counter() - tick - self.interval
+                if stalled > self.threshold:
+                    pending = self._capture(stalled)
+                    pending_tick = tick
+
+    def _capture(self, stalled: float) -> Optional[Dict[str, Any]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        stack = _format_stack(frame)
+        del frame
+        return {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "site": _blocking_site(stack),
+            "blocked_ms": round(stalled * 1000, 1),
+            "stack": stack,
+        }
+
+    def _finish(self, entry: Dict[str, Any], blocked: float) -> None:
+        blocked_ms = round(max(blocked * 1000, entry["blocked_ms"]), 1)
+        entry["blocked_ms"] = blocked_ms
+        with self._lock:
+            self._total_blocks += 1
+            self._blocks.append(entry)
+            hotspot = self._hotspots.get(entry["site"])
+            if hotspot is None:
+                if len(self._hotspots) >= MAX_HOTSPOTS:
+                    return
+                hotspot = self._hotspots[entry["site"]] = {
+                    "site": entry["site"], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "stack": entry["stack"]
+                }
+            hotspot["count"] += 1
+            hotspot["total_ms"] = round(hotspot["total_ms"] + blocked_ms, 1)
+            hotspot["max_ms"] = max(hotspot["max_ms"], blocked_ms)
+
+    def snapshot(self, include_stacks: bool = True) -> Dict[str, Any]:
+        """
+        延迟分位数与阻塞记录
+
+        Args:
+            include_stacks: 是否包含调用栈
+
+        Returns:
+            lag_ms（分位数）、阻塞位置归类（按总阻塞时长排序）与最近的阻塞记录（新的在前）
+        """
+        with self._lock:
+            ordered = sorted(self._samples)
+            blocks = list(reversed(self._blocks))
+            hotspots = sorted(
+                (dict(item) for item in self._hotspots.values()), key=lambda item: item["total_ms"], reverse=True
+            )
+            total_blocks = self._total_blocks
+
+        def strip(entry: Dict[str, Any]) -> Dict[str, Any]:
+            return entry if include_stacks else {key: value for key, value in entry.items() if key != "stack"}
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "started_at": datetime.fromtimestamp(self._started_at).isoformat(timespec="seconds")
+            if self._started_at else None,
+            "samples": len(ordered),
+            "lag_ms": {
+                name: round(percentile(ordered, q) * 1000, 2)
+                for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999), ("max", 1.0))
+            },
+            "blocks": total_blocks,
+            "hotspots": [strip(entry) for entry in hotspots],
+            "recent": [strip(entry) for entry in blocks],
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._blocks.clear()
+            self._hotspots.clear()
+            self._total_blocks = 0
+
+
+# 全局监测器（由 start 创建）
+monitor: Optional[LoopMonitor] = None
+
+
+async def start(interval_ms: float, threshold_ms: float, window: int, size: int) -> LoopMonitor:
+    """在当前事件循环中创建并启动全局监测器"""
+    global monitor
+    monitor = LoopMonitor(interval_ms, threshold_ms, window, size)
+    await monitor.start()
+    return monitor
+
+
+async def stop() -> None:
+    if monitor is not None:
+        await monitor.stop()
@@ -0,0 +1,216 @@
+"""Prometheus 指标
+
+/metrics 输出 Prometheus 文本格式：各路由的请求数与耗时分布、处理中的请求数、
+SQL 语句数与耗时、事件循环延迟（启用延迟监测时）、缓存查找（命中/未命中）、地理编码接口调用、导入任务与行数、SQLite 文件与 WAL 大小。
+命中率等比值由 Prometheus 查询计算，例如：
+
+    sum by (cache) (rate(app_cache_lookups_total{result="hit"}[5m]))
+      / sum by (cache) (rate(app_cache_lookups_total[5m]))
+
+多进程（uvicorn --workers）时设置环境变量 PROMETHEUS_MULTIPROC_DIR 为一个空目录（每次启动前清空），
+各 worker 把指标写入该目录下的文件，抓取时汇总所有 worker；未设置时只输出当前进程的指标。
+prometheus_client 为可选依赖，未安装时记录函数为空操作，/metrics 返回 503。
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from typing import Dict, Tuple
+import os
+import time
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:  # pragma: no cover - 可选依赖
+    prometheus_client = None
+
+AVAILABLE = prometheus_client is not None
+
+# 多进程模式（各 worker 的指标写入共享目录）
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+if AVAILABLE:
+    HTTP_REQUESTS = Counter(
+        "app_http_requests_total", "HTTP 请求数", ["method", "route", "status"]
+    )
+    HTTP_LATENCY = Histogram(
+        "app_http_request_duration_seconds", "HTTP 请求耗时（秒，流式响应含传输时间）", ["method", "route"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    )
+    HTTP_IN_FLIGHT = Gauge(
+        "app_http_requests_in_flight", "处理中的 HTTP 请求数（含 SSE 推送连接）", multiprocess_mode="livesum"
+    )
+    DB_QUERIES = Counter("app_db_queries_total", "SQL 语句执行数", ["engine"])
+    DB_QUERY_LATENCY = Histogram(
+        "app_db_query_duration_seconds", "SQL 语句执行耗时（秒）", ["engine"],
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+    )
+    CACHE_LOOKUPS = Counter("app_cache_lookups_total", "缓存查找次数", ["cache", "result"])
+    GEOCODING_REQUESTS = Counter("app_geocoding_requests_total", "地理编码接口调用次数", ["result"])
+    GEOCODING_LATENCY = Histogram(
+        "app_geocoding_request_duration_seconds", "地理编码接口耗时（秒）",
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    )
+    IMPORT_JOBS = Counter("app_import_jobs_total", "导入任务数", ["result"])
+    IMPORT_ROWS = Counter("app_import_rows_total", "导入行数", ["sheet"])
+    IMPORT_DURATION = Histogram(
+        "app_import_duration_seconds", "导入任务耗时（秒）",
+        buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+    )
+    LOOP_LAG = Histogram(
+        "app_event_loop_lag_seconds", "事件循环延迟（秒，调试模式下的延迟监测采样）",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+    )
+    SQLITE_FILE_BYTES = Gauge(
+        "app_sqlite_file_bytes", "SQLite 文件大小（字节）", ["file"], multiprocess_mode="livemostrecent"
+    )
+
+
+def route_label(scope: Scope) -> str:
+    """路由模板（如 /api/v1/admin/rules/{rule_id}），避免按实际路径产生大量标签"""
+    # 嵌套的 include_router 下 scope["route"] 的路径不含前缀，优先取 FastAPI 记录的完整路由路径
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(context, "path_format", None)
+    if path:
+        return path
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    if "endpoint" in scope:
+        return "<static>"
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """记录各路由的请求数、耗时与处理中的请求数"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not AVAILABLE:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            method = scope["method"]
+            route = route_label(scope)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+
+
+def instrument_engine(target_engine, name: str) -> None:
+    """
+    记录引擎执行的 SQL 语句数与耗时
+
+    Args:
+        target_engine: SQLAlchemy 引擎
+        name: 指标中的引擎标签（如 write / read）
+    """
+    if not AVAILABLE:
+        return
+    queries = DB_QUERIES.labels(name)
+    latency = DB_QUERY_LATENCY.labels(name)
+
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_start")
+        if starts:
+            queries.inc()
+            latency.observe(time.perf_counter() - starts.pop())
+
+    @event.listens_for(target_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("metrics_start"):
+            conn.info["metrics_start"].pop()
+            queries.inc()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """记录一次缓存查找"""
+    if AVAILABLE:
+        CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_geocoding(success: bool, duration: float) -> None:
+    """记录一次地理编码接口调用"""
+    if AVAILABLE:
+        GEOCODING_REQUESTS.labels("success" if success else "failure").inc()
+        GEOCODING_LATENCY.observe(duration)
+
+
+def record_import(success: bool, duration: float, rows: Dict[str, int]) -> None:
+    """
+    记录一次导入任务
+
+    Args:
+        success: 是否成功
+        duration: 耗时（秒）
+        rows: 各 sheet 导入行数
+    """
+    if not AVAILABLE:
+        return
+    IMPORT_JOBS.labels("success" if success else "failure").inc()
+    IMPORT_DURATION.observe(duration)
+    for sheet, count in rows.items():
+        IMPORT_ROWS.labels(sheet).inc(count)
+
+
+def record_loop_lag(lag: float) -> None:
+    """记录一次事件循环延迟采样"""
+    if AVAILABLE:
+        LOOP_LAG.observe(lag)
+
+
+def _update_sqlite_sizes() -> None:
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return
+    path = url.database
+    for label, file_path in (("database", path), ("wal", path + "-wal")):
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        SQLITE_FILE_BYTES.labels(label).set(size)
+
+
+def render() -> Tuple[bytes, str]:
+    """
+    生成 Prometheus 文本格式的指标
+
+    Returns:
+        (内容, Content-Type)
+    """
+    _update_sqlite_sizes()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """进程退出时清理本进程的实时指标（多进程模式）"""
+    if AVAILABLE and MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
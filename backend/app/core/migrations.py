@@ -0,0 +1,126 @@
+"""轻量级数据库迁移
+
+create_all 只会创建缺失的表，不会为已有表补充列和索引。
+这里按版本号顺序执行迁移，并在 t_schema_version 中记录已应用的版本。
+索引定义以模型 __table_args__ 为准，迁移只按名称补建。
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from app.core.database import engine, Base
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+
+def _add_column(conn: Connection, table_name: str, column_name: str, column_type: str) -> None:
+    """为已有表添加列（已存在则跳过）"""
+    columns = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    if column_name not in columns:
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+
+
+def _create_indexes(conn: Connection, table_name: str, index_names: List[str]) -> None:
+    """按模型中的定义创建索引（已存在则跳过）"""
+    table = Base.metadata.tables[table_name]
+    indexes = {index.name: index for index in table.indexes}
+    for name in index_names:
+        indexes[name].create(conn, checkfirst=True)
+
+
+def migrate_001_added_columns(conn: Connection) -> None:
+    """补充建表后新增的列：问题类型、增量导入内容哈希"""
+    _add_column(conn, "t_risk_supervision", "problem_type", "VARCHAR(20) NOT NULL DEFAULT '其它'")
+    _add_column(conn, "t_risk_supervision", "row_hash", "VARCHAR(64)")
+    _add_column(conn, "t_dispute_management", "row_hash", "VARCHAR(64)")
+
+
+def migrate_002_list_indexes(conn: Connection) -> None:
+    """列表筛选+排序组合索引、默认筛选部分索引、态势统计覆盖索引"""
+    _create_indexes(conn, "t_risk_supervision", [
+        "idx_risk_case_type_deadline",
+        "idx_risk_problem_type_deadline",
+        "idx_risk_officer_deadline",
+        "idx_risk_case_time",
+    ])
+    _create_indexes(conn, "t_dispute_management", [
+        "idx_dispute_status_event_time",
+        "idx_dispute_officer_event_time",
+        "idx_dispute_open_event_time",
+        "idx_dispute_open_event_type",
+    ])
+    _create_indexes(conn, "t_police_alert", ["idx_police_alert_type_date_location"])
+    _create_indexes(conn, "t_call_record", ["idx_call_record_address_date_count"])
+    # 采集统计信息，否则规划器无法判断部分索引比 status 等值查找更优（之后每次导入都会刷新）
+    conn.execute(text("ANALYZE"))
+
+
+def migrate_003_fts(conn: Connection) -> None:
+    """全文检索：FTS5 索引表（中文二元分词）并全量构建"""
+    from app.services.search import create_fts_tables
+    create_fts_tables(conn)
+
+
+def migrate_004_risk_issues(conn: Connection) -> None:
+    """风险问题拆分为明细表并从已有数据回填"""
+    from app.services.data_import import sync_risk_issues
+    Base.metadata.tables["t_risk_issue"].create(conn, checkfirst=True)
+    _create_indexes(conn, "t_risk_issue", ["idx_risk_issue_risk_position", "idx_risk_issue_issue_risk"])
+    rows = conn.execute(text("SELECT id, risk_issues FROM t_risk_supervision")).fetchall()
+    sync_risk_issues(conn, [tuple(row) for row in rows])
+
+
+def migrate_005_cache_versions(conn: Connection) -> None:
+    """缓存版本表：版本号随导入、规则修改在同一事务中递增，多进程共享"""
+    from app.core.cache import DATA_VERSION, GEOCODING_VERSION, RULES_VERSION, VERSION_TABLE
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+        "name VARCHAR(20) PRIMARY KEY, "
+        "version INTEGER NOT NULL DEFAULT 0)"
+    ))
+    for name in (DATA_VERSION, RULES_VERSION, GEOCODING_VERSION):
+        conn.execute(text(f"INSERT OR IGNORE INTO {VERSION_TABLE} (name, version) VALUES (:name, 0)"), {"name": name})
+
+
+# 迁移列表：(版本号, 名称, 迁移函数)，只能追加，不能修改已发布的版本
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "added_columns", migrate_001_added_columns),
+    (2, "list_indexes", migrate_002_list_indexes),
+    (3, "fts", migrate_003_fts),
+    (4, "risk_issues", migrate_004_risk_issues),
+    (5, "cache_versions", migrate_005_cache_versions),
+]
+
+
+def get_schema_version(conn: Connection) -> int:
+    """获取当前已应用的最高版本号"""
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM t_schema_version")).scalar()
+
+
+def run_migrations() -> int:
+    """
+    执行所有未应用的迁移（每个版本一个事务）
+
+    Returns:
+        迁移后的版本号
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS t_schema_version ("
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR(100) NOT NULL, "
+            "applied_at DATETIME NOT NULL)"
+        ))
+        current = get_schema_version(conn)
+
+    for version, name, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO t_schema_version (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.now()}
+            )
+        print(f"已应用数据库迁移 {version}: {name}")
+        current = version
+
+    return current
@@ -0,0 +1,262 @@
+"""SQL 查询分析：按请求统计查询次数与耗时，记录慢查询
+
+通过 SQLAlchemy 事件记录每条语句的耗时，归入当前请求（contextvars，线程池中执行的
+同步代码同样归入发起的请求）。响应头 Server-Timing 给出查询次数、总耗时与最慢一条的耗时，
+浏览器开发者工具的 Timing 面板可直接查看。
+
+超过阈值的语句进入滚动的慢查询日志；数据库总耗时超过阈值、或同一语句重复执行多次
+（N+1 查询）的请求记录其最慢的语句，均通过管理接口查看。
+只记录参数的形态（类型与批量条数），不记录参数值。
+"""
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional
+import re
+import time
+
+# 语句文本保留的最大长度
+MAX_STATEMENT_LENGTH = 500
+
+# 请求记录中保留的最慢语句数
+TOP_STATEMENTS = 5
+
+_WHITESPACE = re.compile(r"\s+")
+
+# 当前请求的统计（请求之外的查询如推送、后台任务为 None）
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("query_profile", default=None)
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """合并空白并截断语句文本"""
+    text = _WHITESPACE.sub(" ", statement).strip()
+    if len(text) > MAX_STATEMENT_LENGTH:
+        text = text[:MAX_STATEMENT_LENGTH] + "…"
+    return text
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """
+    绑定参数的形态（不含取值）
+
+    Args:
+        parameters: DBAPI 参数（元组、字典，批量执行时为列表）
+        executemany: 是否批量执行
+
+    Returns:
+        如 "(int, str)"、"{name: str}"、"1000 × (date, str, str, int)"
+    """
+    if executemany:
+        rows = list(parameters) if parameters else []
+        return f"{len(rows)} × {parameter_shape(rows[0], False)}" if rows else "0 × ()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if parameters is None:
+        return "()"
+    return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+
+class RequestProfile:
+    """一个请求内的查询统计"""
+
+    __slots__ = ("method", "path", "count", "total", "slowest", "statements", "_lock")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        # {语句: [次数, 总耗时, 最大耗时, 参数形态]}
+        self.statements: Dict[str, List[Any]] = {}
+        self._lock = Lock()
+
+    def record(self, statement: str, shape: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += duration
+            self.slowest = max(self.slowest, duration)
+            stats = self.statements.get(statement)
+            if stats is None:
+                self.statements[statement] = [1, duration, duration, shape]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = max(stats[2], duration)
+
+    def max_repeats(self) -> int:
+        """同一语句的最多执行次数"""
+        return max((stats[0] for stats in self.statements.values()), default=0)
+
+    def server_timing(self) -> str:
+        """Server-Timing 响应头取值（毫秒）"""
+        return (
+            f'db;dur={self.total * 1000:.1f};desc="{self.count} queries", '
+            f"db-max;dur={self.slowest * 1000:.1f}"
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """请求记录（最慢的语句按总耗时排序）"""
+        with self._lock:
+            statements = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "method": self.method,
+            "path": self.path,
+            "query_count": self.count,
+            "db_ms": round(self.total * 1000, 2),
+            "max_repeats": self.max_repeats(),
+            "statements": [
+                {
+                    "statement": statement,
+                    "params": shape,
+                    "count": count,
+                    "total_ms": round(total * 1000, 2),
+                    "max_ms": round(slowest * 1000, 2),
+                }
+                for statement, (count, total, slowest, shape) in statements[:TOP_STATEMENTS]
+            ],
+        }
+
+
+class QueryLog:
+    """
+    滚动的慢查询与问题请求记录
+
+    Args:
+        slow_ms: 慢查询阈值（毫秒），请求的数据库总耗时超过该值也会记录
+        repeat_threshold: 同一语句在一个请求内执行达到该次数时记录（N+1 查询）
+        size: 各保留的最近记录数
+    """
+
+    def __init__(self, slow_ms: float, repeat_threshold: int, size: int):
+        self.slow_seconds = slow_ms / 1000
+        self.repeat_threshold = repeat_threshold
+        self._queries: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._requests: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self._lock = Lock()
+
+    def record_query(self, statement: str, shape: str, duration: float, profile: Optional[RequestProfile]) -> None:
+        if duration < self.slow_seconds:
+            return
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "path": f"{profile.method} {profile.path}" if profile is not None else None,
+            "duration_ms": round(duration * 1000, 2),
+            "statement": statement,
+            "params": shape,
+        }
+        with self._lock:
+            self._queries.append(entry)
+
+    def record_request(self, profile: RequestProfile) -> None:
+        if profile.total < self.slow_seconds and profile.max_repeats() < self.repeat_threshold:
+            return
+        entry = profile.summary()
+        with self._lock:
+            self._requests.append(entry)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """最近的记录（新的在前）"""
+        with self._lock:
+            return {
+                "slow_ms": self.slow_seconds * 1000,
+                "repeat_threshold": self.repeat_threshold,
+                "queries": list(reversed(self._queries)),
+                "requests": list(reversed(self._requests)),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._queries.clear()
+            self._requests.clear()
+
+
+# 全局记录（由 install 创建）
+query_log: Optional[QueryLog] = None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    profile = _current.get()
+    if profile is None and duration < query_log.slow_seconds:
+        return
+    text = normalize_statement(statement)
+    shape = parameter_shape(parameters, executemany)
+    if profile is not None:
+        profile.record(text, shape, duration)
+    query_log.record_query(text, shape, duration, profile)
+
+
+def _handle_error(exception_context):
+    # 执行失败时没有 after_cursor_execute，丢弃开始时间
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def install(engines: List[Any], slow_ms: float, repeat_threshold: int, size: int) -> QueryLog:
+    """
+    为引擎注册查询计时事件
+
+    Args:
+        engines: 引擎列表（重复的引擎只注册一次）
+        slow_ms: 慢查询阈值（毫秒）
+        repeat_threshold: N+1 查询的重复次数阈值
+        size: 滚动记录条数
+
+    Returns:
+        全局查询记录
+    """
+    global query_log
+    query_log = QueryLog(slow_ms, repeat_threshold, size)
+    for target in {id(engine): engine for engine in engines}.values():
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+    return query_log
+
+
+class QueryProfilerMiddleware:
+    """
+    按请求统计查询的中间件
+
+    在响应头中加入 Server-Timing；请求结束时把慢请求与 N+1 请求写入查询记录。
+    流式响应（导出、推送）的响应头先于正文发送，Server-Timing 只包含发送响应头之前的查询。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or query_log is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current.set(profile)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            query_log.record_request(profile)
@@ -0,0 +1,293 @@
+"""按需的单请求性能剖析
+
+请求携带剖析令牌（请求头 X-Profile-Token，或查询参数 __profile）时，在该请求处理期间
+按固定间隔采样各线程的调用栈，请求结束后保存为折叠栈格式（collapsed stacks，每行
+"线程;外层函数;…;内层函数 次数"），可直接用 flamegraph.pl、speedscope、inferno 生成火焰图。
+响应头 X-Profile-Id 给出剖析记录 ID，通过管理接口下载。
+
+采用采样而不是 cProfile：态势接口的数据库查询在线程池中执行，cProfile 只能剖析事件循环线程。
+采样覆盖事件循环线程与正在执行的线程池线程（空闲等待的线程不计入），
+同一时间其他请求的执行也会被采到，剖析时应避开高峰或按线程与函数辨别。
+
+未配置令牌时不安装中间件；已配置时，未携带令牌的请求只多一次请求头查找。
+"""
+from collections import Counter
+from datetime import datetime
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from threading import Event, Thread
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+# 请求头与查询参数名
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_QUERY_PARAM = "__profile"
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_PROFILE_ID = re.compile(r"^[0-9A-Za-z_-]+$")
+_SLUG = re.compile(r"[^0-9A-Za-z]+")
+
+# 空闲等待的线程（线程池中等待任务的线程、守护线程）的最内层帧
+_IDLE_FRAMES = {
+    ("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select"),
+    # concurrent.futures 线程池在 C 实现的队列上等待任务，最内层 Python 帧为 _worker
+    ("thread.py", "_worker"),
+}
+
+
+def _short_path(filename: str) -> str:
+    """缩短文件路径：第三方库取 site-packages 之后的部分，应用代码取相对 backend 的路径"""
+    marker = "site-packages" + os.sep
+    index = filename.rfind(marker)
+    if index >= 0:
+        return filename[index + len(marker):]
+    if filename.startswith(_BACKEND_DIR + os.sep):
+        return os.path.relpath(filename, _BACKEND_DIR)
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+    """
+    调用栈采样器（独立线程按间隔读取各线程的当前帧）
+
+    Args:
+        interval_ms: 采样间隔（毫秒）
+    """
+
+    def __init__(self, interval_ms: float):
+        self.interval = interval_ms / 1000
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        # 函数标签缓存（按代码对象）
+        self._labels: Dict[Any, str] = {}
+        self._loop_ident: Optional[int] = None
+        self._stopping = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        """开始采样（在事件循环线程中调用，该线程空闲时的等待同样计入）"""
+        self._loop_ident = threading.get_ident()
+        self._thread = Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident != self._loop_ident and self._is_idle(frame):
+                    continue
+                self.stacks[self._collapse(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _is_idle(frame) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            # 折叠栈格式以分号分隔帧、以空格分隔次数，函数标签中不能出现分号
+            label = f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def _collapse(self, thread_name: str, frame) -> str:
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.append(thread_name.replace(";", ":").replace(" ", "_"))
+        return ";".join(reversed(labels))
+
+    def collapsed(self) -> str:
+        """折叠栈文本（按次数降序）"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """
+    剖析记录存储（每条记录一个折叠栈文件与一个元数据文件，保留最近若干条）
+
+    Args:
+        directory: 存储目录
+        keep: 保留的记录数
+    """
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        if not _PROFILE_ID.match(profile_id):
+            raise KeyError(profile_id)
+        return os.path.join(self.directory, profile_id + suffix)
+
+    def new_id(self, path: str) -> str:
+        """生成记录 ID（按时间排序，含请求路径）"""
+        now = datetime.now()
+        slug = _SLUG.sub("-", path).strip("-")[:60] or "root"
+        return f"{now.strftime('%Y%m%d%H%M%S')}{now.microsecond // 1000:03d}-{slug}-{uuid.uuid4().hex[:8]}"
+
+    def save(self, profile_id: str, meta: Dict[str, Any], collapsed: str) -> None:
+        """保存剖析记录，超出保留数量时删除最早的记录"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile_id, ".folded"), "w", encoding="utf-8") as f:
+            f.write(collapsed)
+        with open(self._path(profile_id, ".json"), "w", encoding="utf-8") as f:
+            json.dump(dict(meta, id=profile_id), f, ensure_ascii=False)
+        self._prune()
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            (name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json")),
+            reverse=True
+        )
+
+    def _prune(self) -> None:
+        for profile_id in self._ids()[self.keep:]:
+            for suffix in (".json", ".folded"):
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except OSError:
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """剖析记录的元数据（新的在前）"""
+        records = []
+        for profile_id in self._ids():
+            try:
+                with open(self._path(profile_id, ".json"), encoding="utf-8") as f:
+                    records.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return records
+
+    def path(self, profile_id: str) -> str:
+        """
+        折叠栈文件路径
+
+        Raises:
+            KeyError: 记录不存在或 ID 不合法
+        """
+        path = self._path(profile_id, ".folded")
+        if not os.path.exists(path):
+            raise KeyError(profile_id)
+        return path
+
+
+# 全局配置（由 install 设置）
+store: Optional[ProfileStore] = None
+_token: bytes = b""
+_interval_ms: float = 5
+
+
+def install(token: str, directory: str, keep: int, interval_ms: float) -> ProfileStore:
+    """
+    启用按需剖析
+
+    Args:
+        token: 剖析令牌
+        directory: 剖析记录存储目录
+        keep: 保留的记录数
+        interval_ms: 采样间隔（毫秒）
+
+    Returns:
+        剖析记录存储
+    """
+    global store, _token, _interval_ms
+    store = ProfileStore(directory, keep)
+    _token = token.encode("utf-8")
+    _interval_ms = interval_ms
+    return store
+
+
+def check_token(token: Optional[str]) -> bool:
+    """校验剖析令牌（未启用时始终不通过）"""
+    return bool(_token) and token is not None and hmac.compare_digest(token.encode("utf-8"), _token)
+
+
+def _requested(scope: Scope) -> Tuple[bool, Optional[bytes]]:
+    """
+    请求是否携带有效令牌
+
+    Returns:
+        (是否剖析, 去掉令牌参数后的查询字符串；未携带查询参数时为 None)
+    """
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return check_token(value.decode("latin-1")), None
+    query_string = scope.get("query_string", b"")
+    if PROFILE_QUERY_PARAM.encode() not in query_string:
+        return False, None
+    params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    token = next((value for name, value in params if name == PROFILE_QUERY_PARAM), None)
+    rest = urlencode([(name, value) for name, value in params if name != PROFILE_QUERY_PARAM])
+    return check_token(token), rest.encode("latin-1")
+
+
+class RequestProfilerMiddleware:
+    """携带剖析令牌的请求在处理期间采样调用栈，响应头 X-Profile-Id 给出记录 ID"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or store is None:
+            await self.app(scope, receive, send)
+            return
+        requested, query_string = _requested(scope)
+        if query_string is not None:
+            # 令牌不传给接口（不进入 ETag、日志）
+            scope = dict(scope, query_string=query_string)
+        if not requested:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = store.new_id(scope["path"])
+        status = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        profiler = SamplingProfiler(_interval_ms)
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            meta = {
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "samples": profiler.samples,
+                "interval_ms": _interval_ms,
+            }
+            store.save(profile_id, meta, profiler.collapsed())
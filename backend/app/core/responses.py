@@ -0,0 +1,79 @@
+"""JSON 响应：基于 orjson 序列化
+
+FastAPI 默认先用 jsonable_encoder 逐层转换返回值，再交给标准库 json 编码。
+这里的路由类让接口返回的 dict / list 直接由 orjson 编码为字节，跳过逐层转换。
+orjson 原生支持 datetime / date（输出 ISO 8601，与默认编码一致），
+Decimal、pydantic 模型、集合等由 orjson_default 处理。
+"""
+from decimal import Decimal
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.responses import Response
+from typing import Any, Callable
+import functools
+import inspect
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def orjson_default(obj: Any) -> Any:
+    """orjson 不支持的类型转换"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "item"):  # numpy / pandas 标量
+        return obj.item()
+    raise TypeError(f"无法序列化类型 {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 JSON 字节"""
+    return orjson.dumps(content, default=orjson_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 编码的 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ORJSONRoute(APIRoute):
+    """
+    接口返回值直接以 ORJSONResponse 输出的路由
+
+    返回 Response（如导出的 StreamingResponse）时原样返回；
+    其他返回值不经 jsonable_encoder 转换，直接由 orjson 编码。
+    显式声明了 response_model 的路由按 FastAPI 默认流程校验、过滤后输出，不走直接编码。
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        response_model = kwargs.get("response_model")
+        if response_model is None or isinstance(response_model, DefaultPlaceholder):
+            endpoint = _direct_response(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _direct_response(endpoint: Callable[..., Any], status_code: int) -> Callable[..., Any]:
+    """包装接口函数，保持同步/异步与签名不变（依赖注入按原签名解析）"""
+    def wrap(result: Any) -> Any:
+        if isinstance(result, Response):
+            return result
+        return ORJSONResponse(result, status_code=status_code)
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            return wrap(await endpoint(*args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
+        return wrap(endpoint(*args, **kwargs))
+    return sync_wrapper
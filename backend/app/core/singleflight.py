@@ -0,0 +1,79 @@
+"""并发请求合并（single-flight）
+
+多块大屏同时刷新时会并发发起参数相同的请求。同一键同时只执行一次计算，
+其余请求等待并共享结果；计算结束后键即释放，不缓存结果。
+
+计算在独立任务中执行，发起计算的请求断开（被取消）不影响其他等待者。
+"""
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+# 所有合并器（用于统计）
+_registry: Dict[str, "SingleFlight"] = {}
+_registry_lock = Lock()
+
+
+class SingleFlight:
+    """
+    并发请求合并器
+
+    Args:
+        name: 名称（统计中显示）
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # 实际执行次数
+        self.executions = 0
+        # 共享进行中结果的次数（即节省的执行次数）
+        self.shared = 0
+        with _registry_lock:
+            _registry[name] = self
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行 func，同一键已有进行中的计算时等待其结果
+
+        Args:
+            key: 合并键（需包含影响结果的全部参数与数据版本）
+            func: 无参异步函数
+
+        Returns:
+            计算结果（并发请求共享同一对象，调用方不应修改）
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.executions += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待者都已取消时，避免“异常未被获取”的警告
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """执行与共享次数"""
+        total = self.executions + self.shared
+        return {
+            "executions": self.executions,
+            "shared": self.shared,
+            "in_flight": len(self._inflight),
+            "saved_ratio": round(self.shared / total, 4) if total else 0.0,
+        }
+
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """所有合并器的统计"""
+    with _registry_lock:
+        return {name: flight.stats() for name, flight in _registry.items()}
@@ -0,0 +1,487 @@
+"""轻量的链路追踪
+
+按 span 记录接口请求、服务函数、SQL 语句与地理编码调用的耗时与父子关系，
+导出为 OTLP/JSON（OpenTelemetry 协议的 JSON 编码）：
+- file：每批 span 一行追加到本地文件（与 OpenTelemetry Collector 的 file 导出器格式相同）
+- otlp：POST 到 OTLP/HTTP 接收端（如 Collector、Jaeger 的 /v1/traces）
+
+采样在链路起点决定：接口请求按 TRACE_SAMPLE_RATE 抽样，携带 W3C traceparent 请求头时
+沿用上游的链路 ID 与采样决定。未采样的请求只在每个埋点处多一次 contextvars 读取。
+span 结束后放入有界队列，由后台线程批量导出，队列满时丢弃（不阻塞请求）。
+
+当前 span 保存在 contextvars 中，线程池中执行的同步代码（run_in_threadpool 复制上下文）
+与合并请求中创建的任务同样归入发起的链路。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from threading import Event, Thread
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from app.core.metrics import route_label
+from app.core.query_profiler import normalize_statement
+import httpx
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# span 类型（OTLP SpanKind）
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# span 状态（OTLP StatusCode）
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# 单批导出的最大 span 数
+EXPORT_BATCH_SIZE = 512
+
+# 属性字符串的最大长度
+MAX_ATTRIBUTE_LENGTH = 500
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    """一个 span（结束时放入导出队列）"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "end", "attributes", "status", "message")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes = attributes
+        self.status = 0
+        self.message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.message = f"{type(error).__name__}: {error}"[:MAX_ATTRIBUTE_LENGTH]
+
+
+class _NoopSpan:
+    """未采样时的 span（忽略所有操作）"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# 未采样的链路标记
+_NOT_SAMPLED = object()
+
+# 当前 span（链路之外为 None，未采样的链路为 _NOT_SAMPLED）
+_current: ContextVar[Any] = ContextVar("trace_span", default=None)
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)[:MAX_ATTRIBUTE_LENGTH]}
+
+
+def encode_spans(spans: Sequence[Span], service_name: str) -> Dict[str, Any]:
+    """
+    编码为 OTLP/JSON 的 ExportTraceServiceRequest
+
+    Args:
+        spans: 已结束的 span
+        service_name: 服务名（resource 的 service.name）
+
+    Returns:
+        可直接 JSON 序列化的请求体
+    """
+    encoded = []
+    for span in spans:
+        item = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start),
+            "endTimeUnixNano": str(span.end),
+            "attributes": [{"key": key, "value": _attribute_value(value)} for key, value in span.attributes.items()],
+        }
+        if span.parent_id:
+            item["parentSpanId"] = span.parent_id
+        if span.status:
+            item["status"] = {"code": span.status, "message": span.message}
+        encoded.append(item)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": encoded}],
+        }]
+    }
+
+
+class FileExporter:
+    """每批 span 一行 OTLP/JSON 追加到本地文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        pass
+
+
+class OtlpHttpExporter:
+    """POST 到 OTLP/HTTP 接收端（JSON 编码）"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self._client = httpx.Client(timeout=timeout)
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        response = self._client.post(
+            self.endpoint,
+            content=json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class Tracer:
+    """
+    采样与批量导出
+
+    Args:
+        exporter: FileExporter 或 OtlpHttpExporter
+        sample_rate: 链路起点的采样比例（0~1）
+        service_name: 服务名
+        queue_size: 待导出 span 的队列上限
+        export_interval: 导出间隔（秒）
+    """
+
+    def __init__(self, exporter, sample_rate: float, service_name: str, queue_size: int, export_interval: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self.export_interval = export_interval
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=queue_size)
+        self._stopping = Event()
+        self._thread = Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def finish(self, span: Span) -> None:
+        span.end = time.time_ns()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self) -> List[Span]:
+        batch = []
+        while len(batch) < EXPORT_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> None:
+        """导出队列中的全部 span"""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            try:
+                self.exporter.export(encode_spans(batch, self.service_name))
+                self.exported += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.warning(f"导出 span 失败（{len(batch)} 个）: {e}")
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.export_interval):
+            self.flush()
+
+    def shutdown(self) -> None:
+        """停止后台线程并导出队列中剩余的 span"""
+        self._stopping.set()
+        self._thread.join(timeout=self.export_interval + 5)
+        self.flush()
+        self.exporter.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+        }
+
+
+# 全局追踪器（由 install 创建，未启用时为 None）
+tracer: Optional[Tracer] = None
+
+
+def install(exporter: str, sample_rate: float, service_name: str, queue_size: int,
+            file_path: str = "", endpoint: str = "") -> Optional[Tracer]:
+    """
+    启用链路追踪
+
+    Args:
+        exporter: none / file / otlp
+        sample_rate: 采样比例
+        service_name: 服务名
+        queue_size: 待导出 span 的队列上限
+        file_path: file 导出的文件路径
+        endpoint: otlp 导出的接收端地址（如 http://localhost:4318/v1/traces）
+
+    Returns:
+        追踪器，exporter 为 none 时返回 None
+    """
+    global tracer
+    if exporter == "none":
+        return None
+    if exporter == "file":
+        target = FileExporter(file_path)
+    elif exporter == "otlp":
+        target = OtlpHttpExporter(endpoint)
+    else:
+        raise ValueError(f"不支持的链路导出方式: {exporter}（可选 none / file / otlp）")
+    tracer = Tracer(target, sample_rate, service_name, queue_size)
+    return tracer
+
+
+def shutdown() -> None:
+    if tracer is not None:
+        tracer.shutdown()
+
+
+def _start(name: str, kind: int, attributes: Dict[str, Any]) -> Optional[Span]:
+    """在当前链路中创建子 span；链路之外按采样比例决定是否开始新链路"""
+    parent = _current.get()
+    if parent is _NOT_SAMPLED:
+        return None
+    if parent is None:
+        if not tracer.sample():
+            return None
+        return Span(name, os.urandom(16).hex(), None, kind, attributes)
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Any]:
+    """
+    记录一个代码块为 span
+
+    用法:
+        with tracing.span("situation.rules", page="situation") as s:
+            ...
+            s.set_attribute("rules", len(rules))
+
+    未启用或未采样时返回 NOOP_SPAN。
+    """
+    if tracer is None:
+        yield NOOP_SPAN
+        return
+    current = _start(name, kind, attributes)
+    if current is None:
+        # 链路起点未被采样：其中的埋点不再重复抽样
+        token = _current.set(_NOT_SAMPLED) if _current.get() is None else None
+        try:
+            yield NOOP_SPAN
+        finally:
+            if token is not None:
+                _current.reset(token)
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        tracer.finish(current)
+
+
+def traced(name: str, args: Sequence[str] = (), kind: int = KIND_INTERNAL) -> Callable:
+    """
+    把函数（同步或异步）记录为 span 的装饰器
+
+    Args:
+        name: span 名称
+        args: 记为 span 属性的参数名（只在采样时读取）
+        kind: span 类型
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func) if args else None
+
+        def attributes(call_args, call_kwargs) -> Dict[str, Any]:
+            if signature is None:
+                return {}
+            bound = signature.bind_partial(*call_args, **call_kwargs)
+            return {key: bound.arguments[key] for key in args if bound.arguments.get(key) is not None}
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*call_args, **call_kwargs):
+                if tracer is None or _current.get() is _NOT_SAMPLED:
+                    return await func(*call_args, **call_kwargs)
+                with span(name, kind, **attributes(call_args, call_kwargs)):
+                    return await func(*call_args, **call_kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*call_args, **call_kwargs):
+            if tracer is None or _current.get() is _NOT_SAMPLED:
+                return func(*call_args, **call_kwargs)
+            with span(name, kind, **attributes(call_args, call_kwargs)):
+                return func(*call_args, **call_kwargs)
+        return wrapper
+
+    return decorator
+
+
+# ==================== SQL 语句 ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is None or parent is _NOT_SAMPLED:
+        conn.info.setdefault("trace_spans", []).append(None)
+        return
+    attributes = {"db.system": "sqlite", "db.statement": normalize_statement(statement)}
+    if executemany:
+        attributes["db.executemany"] = len(parameters)
+    conn.info.setdefault("trace_spans", []).append(
+        Span("db.query", parent.trace_id, parent.span_id, KIND_CLIENT, attributes)
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        current = spans.pop()
+        if current is not None:
+            tracer.finish(current)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        current = spans.pop()
+        if current is not None:
+            current.set_error(exception_context.original_exception)
+            tracer.finish(current)
+
+
+def instrument_engines(engines: List[Any]) -> None:
+    """为引擎注册 SQL 语句的 span（只在已采样的链路中创建）"""
+    for target in {id(engine): engine for engine in engines}.values():
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+
+
+# ==================== 接口请求 ====================
+
+def _parse_traceparent(scope: Scope) -> Optional[re.Match]:
+    for name, value in scope["headers"]:
+        if name == b"traceparent":
+            return _TRACEPARENT.match(value.decode("latin-1").strip().lower())
+    return None
+
+
+class TracingMiddleware:
+    """为每个接口请求创建根 span（按采样比例或上游 traceparent），采样的响应带 X-Trace-Id"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        upstream = _parse_traceparent(scope)
+        if upstream is not None:
+            sampled = int(upstream.group(3), 16) & 1 == 1
+        else:
+            sampled = tracer.sample()
+        if not sampled:
+            token = _current.set(_NOT_SAMPLED)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current.reset(token)
+            return
+
+        method = scope["method"]
+        trace_id, parent_id = (upstream.group(1), upstream.group(2)) if upstream is not None else (os.urandom(16).hex(), None)
+        current = Span(method, trace_id, parent_id, KIND_SERVER, {
+            "http.method": method,
+            "http.target": scope["path"],
+        })
+        status = 500
+
+        async def send_with_trace(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Trace-Id", trace_id)
+            await send(message)
+
+        token = _current.set(current)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            current.set_error(e)
+            raise
+        finally:
+            _current.reset(token)
+            route = route_label(scope)
+            current.name = f"{method} {route}"
+            current.set_attribute("http.route", route)
+            current.set_attribute("http.status_code", status)
+            if status >= 500 and not current.status:
+                current.status = STATUS_ERROR
+            tracer.finish(current)
@@ -1,5 +1,6 @@
 """数据模型模块"""
 from app.models.risk_supervision import RiskSupervision
+from app.models.risk_issue import RiskIssue
 from app.models.dispute_management import DisputeManagement
 from app.models.display_rule import DisplayRule
 from app.models.police_alert import PoliceAlert
@@ -8,6 +9,7 @@ from app.models.geocoding_cache import GeocodingCache
 
 __all__ = [
     "RiskSupervision",
+    "RiskIssue",
     "DisputeManagement",
     "DisplayRule",
     "PoliceAlert",
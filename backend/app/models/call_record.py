@@ -16,6 +16,8 @@ class CallRecord(Base):
     __table_args__ = (
         UniqueConstraint("call_date", "call_address", name="uq_call_record_date_address"),
         Index('idx_date_address', 'call_date', 'call_address'),
+        # 重复报警统计覆盖索引：按地点分组汇总次数与最近日期
+        Index('idx_call_record_address_date_count', 'call_address', 'call_date', 'count'),
     )
 
     def __repr__(self):
@@ -1,5 +1,5 @@
 """矛盾纠纷闭环管理数据模型"""
-from sqlalchemy import Column, Integer, String, DateTime, CheckConstraint, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, CheckConstraint, Index, UniqueConstraint, text
 from app.core.database import Base
 from datetime import datetime
 
@@ -16,6 +16,7 @@ class DisputeManagement(Base):
     risk_level = Column(String(10), nullable=False)
     officer_name = Column(String(50), nullable=False)
     status = Column(String(10), nullable=False)
+    row_hash = Column(String(64))  # 行内容哈希，增量导入时比对
     created_at = Column(DateTime, nullable=False, default=datetime.now)
     updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
 
@@ -27,6 +28,11 @@ class DisputeManagement(Base):
         Index('idx_dispute_status_risk', 'status', 'risk_level'),
         Index('idx_dispute_event_time', 'event_time'),
         Index('idx_dispute_risk_level', 'risk_level'),
+        Index('idx_dispute_status_event_time', 'status', 'event_time'),
+        Index('idx_dispute_officer_event_time', 'officer_name', 'event_time'),
+        # 默认筛选（待化解、待关注）的部分索引，查询需以字面量渲染 IN 列表才能命中
+        Index('idx_dispute_open_event_time', 'event_time', sqlite_where=text("status IN ('待化解', '待关注')")),
+        Index('idx_dispute_open_event_type', 'event_type', sqlite_where=text("status IN ('待化解', '待关注')")),
     )
 
     def __repr__(self):
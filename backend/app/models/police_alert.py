@@ -21,6 +21,8 @@ class PoliceAlert(Base):
         ),
         UniqueConstraint("alert_date", "alert_type", "location", name="uq_police_alert_date_type_location"),
         Index('idx_date_type_location', 'alert_date', 'alert_type', 'location'),
+        # 态势统计覆盖索引：按类型+日期范围汇总次数、按地点分组
+        Index('idx_police_alert_type_date_location', 'alert_type', 'alert_date', 'location', 'count'),
     )
 
     def __repr__(self):
@@ -0,0 +1,23 @@
+"""执法问题风险明细数据模型"""
+from sqlalchemy import Column, ForeignKey, Integer, String, Index
+from app.core.database import Base
+
+
+class RiskIssue(Base):
+    """执法问题风险明细表 - 每个案件的风险问题拆分为一行，导入时由 risk_issues 生成"""
+    __tablename__ = "t_risk_issue"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    risk_id = Column(Integer, ForeignKey("t_risk_supervision.id", ondelete="CASCADE"), nullable=False, comment="案件 id")
+    position = Column(Integer, nullable=False, comment="在原风险问题中的顺序")
+    issue = Column(String(100), nullable=False, comment="风险问题")
+
+    __table_args__ = (
+        # 按案件读取明细（保持原顺序）
+        Index('idx_risk_issue_risk_position', 'risk_id', 'position'),
+        # 按风险问题筛选案件、统计频次（覆盖索引）
+        Index('idx_risk_issue_issue_risk', 'issue', 'risk_id'),
+    )
+
+    def __repr__(self):
+        return f"<RiskIssue(risk_id={self.risk_id}, issue={self.issue})>"
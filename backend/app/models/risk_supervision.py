@@ -1,5 +1,5 @@
 """执法问题风险盯办数据模型"""
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from app.core.database import Base
 from datetime import datetime
 
@@ -18,9 +18,17 @@ class RiskSupervision(Base):
     problem_type = Column(String(20), nullable=False, default='其它')  # 问题类型
     deadline = Column(DateTime, nullable=False, index=True)
     officer_name = Column(String(50), nullable=False)
+    row_hash = Column(String(64))  # 行内容哈希，增量导入时比对
     created_at = Column(DateTime, nullable=False, default=datetime.now)
     updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
 
+    # 列表筛选 + 整改期限排序（SQLite 索引隐含 rowid，即 id 决胜列）
+    __table_args__ = (
+        Index('idx_risk_case_type_deadline', 'case_type', 'deadline'),
+        Index('idx_risk_problem_type_deadline', 'problem_type', 'deadline'),
+        Index('idx_risk_officer_deadline', 'officer_name', 'deadline'),
+        Index('idx_risk_case_time', 'case_time'),
+    )
 
     def __repr__(self):
         return f"<RiskSupervision(case_number={self.case_number}, case_name={self.case_name})>"
@@ -0,0 +1,463 @@
+"""数据导入服务 - 多sheet Excel 增量导入"""
+from sqlalchemy import delete, insert, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.core import metrics, tracing
+from app.models.police_alert import PoliceAlert
+from app.models.call_record import CallRecord
+from app.models.risk_supervision import RiskSupervision
+from app.models.risk_issue import RiskIssue
+from app.models.dispute_management import DisputeManagement
+from app.services import search
+from app.utils.constants import normalize_problem_type, parse_risk_issues
+from app.utils.alert_category import SUB_TYPE_TO_ALERT_TYPE
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple, Union
+import hashlib
+import time
+
+# SQLite 单条语句绑定参数数量有限，批量比对哈希时分块查询
+HASH_LOOKUP_CHUNK = 500
+
+
+def compute_row_hash(values: Iterable[Any]) -> str:
+    """
+    计算行内容哈希
+
+    Args:
+        values: 参与哈希的字段值（顺序固定）
+
+    Returns:
+        sha256 十六进制字符串
+    """
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append("")
+        elif isinstance(value, datetime):
+            parts.append(value.isoformat())
+        else:
+            parts.append(str(value))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _to_datetime(value) -> datetime:
+    """Excel 单元格转换为 datetime，空值返回 None"""
+    if pd.isna(value):
+        return None
+    return pd.to_datetime(value).to_pydatetime()
+
+
+def _chunks(items: List[Any], size: int = HASH_LOOKUP_CHUNK):
+    """按固定大小切分列表"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def sync_risk_issues(db: Union[Session, Connection], rows: List[Tuple[int, str]]) -> None:
+    """
+    重建指定案件的风险明细（先删后插）
+
+    Args:
+        db: 数据库会话（迁移回填时为连接）
+        rows: (案件 id, risk_issues 原始值) 列表
+    """
+    for chunk in _chunks(rows):
+        db.execute(delete(RiskIssue).where(RiskIssue.risk_id.in_([risk_id for risk_id, _ in chunk])))
+        issues = [
+            {"risk_id": risk_id, "position": position, "issue": issue}
+            for risk_id, risk_issues in chunk
+            for position, issue in enumerate(parse_risk_issues(risk_issues))
+        ]
+        if issues:
+            db.execute(insert(RiskIssue), issues)
+
+
+@tracing.traced("import.risk_supervision")
+def import_risk_supervision(db: Session, df: pd.DataFrame) -> Dict[str, int]:
+    """
+    导入执法问题盯办（按案件编号比对内容哈希，只写入新增或变更的行）
+
+    Args:
+        db: 数据库会话
+        df: 执法问题盯办 sheet 数据
+
+    Returns:
+        {total, inserted, updated, unchanged, defaulted}
+    """
+    has_problem_type = '问题类型' in df.columns
+    defaulted_count = 0
+
+    # 解析所有行（同一案件编号以最后一行为准）
+    rows: Dict[str, Dict[str, Any]] = {}
+    for _, row in df.iterrows():
+        if pd.isna(row['案件编号']):  # 跳过空行
+            continue
+
+        case_time = _to_datetime(row['案发时间'])
+        deadline = _to_datetime(row['整改期限'])
+        risk_issues = str(row['风险问题']) if pd.notna(row['风险问题']) else '[]'
+
+        # 处理问题类型（兼容旧模板）
+        raw_value = row.get('问题类型') if has_problem_type else None
+        problem_type, used_default = normalize_problem_type(raw_value)
+        if used_default:
+            defaulted_count += 1
+
+        values = {
+            "case_number": str(row['案件编号']),
+            "case_name": str(row['案件名称']),
+            "case_time": case_time,
+            "case_type": str(row['案件类型']),
+            "risk_type": str(row['风险类型']),
+            "risk_issues": risk_issues,
+            "problem_type": problem_type,
+            "deadline": deadline,
+            "officer_name": str(row['责任民警'])
+        }
+        # 哈希基于源数据计算，缺失时间不参与“当前时间”填充，保证重复导入哈希稳定
+        values["row_hash"] = compute_row_hash(
+            values[key] for key in (
+                "case_number", "case_name", "case_time", "case_type", "risk_type",
+                "risk_issues", "problem_type", "deadline", "officer_name"
+            )
+        )
+        rows[values["case_number"]] = values
+
+    # 批量查询已有记录的哈希
+    existing: Dict[str, str] = {}
+    for chunk in _chunks(list(rows.keys())):
+        existing.update(
+            db.query(RiskSupervision.case_number, RiskSupervision.row_hash)
+            .filter(RiskSupervision.case_number.in_(chunk))
+            .all()
+        )
+
+    now = datetime.now()
+    to_write = []
+    stats = {"total": len(rows), "inserted": 0, "updated": 0, "unchanged": 0, "defaulted": defaulted_count}
+    for case_number, values in rows.items():
+        if case_number not in existing:
+            stats["inserted"] += 1
+        elif existing[case_number] != values["row_hash"]:
+            stats["updated"] += 1
+        else:
+            stats["unchanged"] += 1
+            continue
+
+        values["case_time"] = values["case_time"] or now
+        values["deadline"] = values["deadline"] or now
+        values["updated_at"] = now
+        to_write.append(values)
+
+    if to_write:
+        stmt = sqlite_insert(RiskSupervision)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["case_number"],
+            set_={
+                "case_name": stmt.excluded.case_name,
+                "case_time": stmt.excluded.case_time,
+                "case_type": stmt.excluded.case_type,
+                "risk_type": stmt.excluded.risk_type,
+                "risk_issues": stmt.excluded.risk_issues,
+                "problem_type": stmt.excluded.problem_type,
+                "deadline": stmt.excluded.deadline,
+                "officer_name": stmt.excluded.officer_name,
+                "row_hash": stmt.excluded.row_hash,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        db.execute(stmt, to_write)
+
+        # 同步风险明细与全文索引
+        id_by_case: Dict[str, int] = {}
+        for chunk in _chunks([values["case_number"] for values in to_write]):
+            id_by_case.update(
+                db.query(RiskSupervision.case_number, RiskSupervision.id)
+                .filter(RiskSupervision.case_number.in_(chunk))
+                .all()
+            )
+        sync_risk_issues(db, [(id_by_case[values["case_number"]], values["risk_issues"]) for values in to_write])
+        search.sync_rows(db, "t_risk_supervision_fts", list(id_by_case.values()))
+
+    return stats
+
+
+@tracing.traced("import.dispute_management")
+def import_dispute_management(db: Session, df: pd.DataFrame) -> Dict[str, int]:
+    """
+    导入矛盾纠纷管理（按 事件名称+事发时间+责任民警 比对内容哈希，只写入新增或变更的行）
+
+    Args:
+        db: 数据库会话
+        df: 矛盾纠纷管理 sheet 数据
+
+    Returns:
+        {total, inserted, updated, unchanged}
+    """
+    # 解析所有行（同一事件以最后一行为准）
+    rows: Dict[Tuple[str, datetime, str], Dict[str, Any]] = {}
+    for _, row in df.iterrows():
+        if pd.isna(row['事件名称']):  # 跳过空行
+            continue
+
+        event_time = _to_datetime(row['事发时间'])
+
+        values = {
+            "event_name": str(row['事件名称']),
+            "event_type": str(row['事件类型']),
+            "content": str(row['事件内容']),
+            "event_time": event_time,
+            "risk_level": str(row['风险等级']),
+            "officer_name": str(row['责任民警']),
+            "status": str(row['处置进度'])
+        }
+        values["row_hash"] = compute_row_hash(
+            values[key] for key in (
+                "event_name", "event_type", "content", "event_time",
+                "risk_level", "officer_name", "status"
+            )
+        )
+        if event_time is None:
+            # 缺失事发时间的行无法稳定匹配，每次都按新事件写入
+            values["event_time"] = datetime.now()
+        rows[(values["event_name"], values["event_time"], values["officer_name"])] = values
+
+    # 批量查询已有记录的哈希（按事件名称分块，再按完整唯一键匹配）
+    existing: Dict[Tuple[str, datetime, str], str] = {}
+    event_names = list({key[0] for key in rows})
+    for chunk in _chunks(event_names):
+        records = db.query(
+            DisputeManagement.event_name,
+            DisputeManagement.event_time,
+            DisputeManagement.officer_name,
+            DisputeManagement.row_hash
+        ).filter(DisputeManagement.event_name.in_(chunk)).all()
+        for event_name, event_time, officer_name, row_hash in records:
+            existing[(event_name, event_time, officer_name)] = row_hash
+
+    now = datetime.now()
+    to_write = []
+    stats = {"total": len(rows), "inserted": 0, "updated": 0, "unchanged": 0}
+    for key, values in rows.items():
+        if key not in existing:
+            stats["inserted"] += 1
+        elif existing[key] != values["row_hash"]:
+            stats["updated"] += 1
+        else:
+            stats["unchanged"] += 1
+            continue
+
+        values["updated_at"] = now
+        to_write.append(values)
+
+    if to_write:
+        stmt = sqlite_insert(DisputeManagement)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["event_name", "event_time", "officer_name"],
+            set_={
+                "event_type": stmt.excluded.event_type,
+                "content": stmt.excluded.content,
+                "risk_level": stmt.excluded.risk_level,
+                "status": stmt.excluded.status,
+                "row_hash": stmt.excluded.row_hash,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        db.execute(stmt, to_write)
+
+        # 同步全文索引
+        written_keys = {(values["event_name"], values["event_time"], values["officer_name"]) for values in to_write}
+        written_ids = []
+        for chunk in _chunks(list({key[0] for key in written_keys})):
+            records = db.query(
+                DisputeManagement.id,
+                DisputeManagement.event_name,
+                DisputeManagement.event_time,
+                DisputeManagement.officer_name
+            ).filter(DisputeManagement.event_name.in_(chunk)).all()
+            written_ids.extend(
+                row_id for row_id, event_name, event_time, officer_name in records
+                if (event_name, event_time, officer_name) in written_keys
+            )
+        search.sync_rows(db, "t_dispute_management_fts", written_ids)
+
+    return stats
+
+
+@tracing.traced("import.police_alert")
+def import_police_alert(db: Session, df: pd.DataFrame) -> int:
+    """
+    导入警情态势追踪（日清表，同日同类型同地点次数累加）
+
+    Returns:
+        导入行数
+    """
+    imported = 0
+    for _, row in df.iterrows():
+        # 支持新模板（警情子类列）和旧模板（警情类型列）
+        sub_type = None
+        if '警情子类' in df.columns and pd.notna(row.get('警情子类')):
+            sub_type = str(row['警情子类'])
+        elif '警情类型' in df.columns and pd.notna(row.get('警情类型')):
+            sub_type = str(row['警情类型'])
+
+        if pd.isna(row['日期']) or sub_type is None or pd.isna(row['地点']):
+            continue
+
+        # 子类映射为数据库 alert_type，未匹配则原值写入
+        alert_type = SUB_TYPE_TO_ALERT_TYPE.get(sub_type, sub_type)
+
+        alert_date = pd.to_datetime(row['日期']).date()
+        count = int(row['次数']) if pd.notna(row['次数']) else 0
+
+        # 只导入次数大于0的记录
+        if count > 0:
+            stmt = sqlite_insert(PoliceAlert).values(
+                alert_date=alert_date,
+                alert_type=alert_type,
+                location=str(row['地点']),
+                count=count
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["alert_date", "alert_type", "location"],
+                set_={
+                    "count": PoliceAlert.count + stmt.excluded.count
+                }
+            )
+            db.execute(stmt)
+            imported += 1
+
+    return imported
+
+
+@tracing.traced("import.call_record")
+def import_call_record(db: Session, df: pd.DataFrame) -> int:
+    """
+    导入重复报警记录（日清表，同日同地点次数累加）
+
+    Returns:
+        导入行数
+    """
+    imported = 0
+    for _, row in df.iterrows():
+        if pd.isna(row['日期']) or pd.isna(row['报警地点']) or str(row['报警地点']).strip() == '':
+            continue
+
+        call_date = pd.to_datetime(row['日期']).date()
+        count = int(row['次数']) if pd.notna(row['次数']) else 0
+
+        # 只导入次数大于0的记录
+        if count > 0:
+            stmt = sqlite_insert(CallRecord).values(
+                call_date=call_date,
+                call_address=str(row['报警地点']),
+                count=count
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["call_date", "call_address"],
+                set_={
+                    "count": CallRecord.count + stmt.excluded.count
+                }
+            )
+            db.execute(stmt)
+            imported += 1
+
+    return imported
+
+
+@tracing.traced("import.workbook")
+def import_workbook(db: Session, source) -> Dict[str, Any]:
+    """
+    导入多sheet Excel（不提交事务，由调用方负责 commit/rollback）
+
+    Args:
+        db: 数据库会话
+        source: 文件路径或文件对象
+
+    Returns:
+        各 sheet 导入统计
+    """
+    start = time.perf_counter()
+    try:
+        result = _import_sheets(db, source)
+    except Exception:
+        metrics.record_import(False, time.perf_counter() - start, {})
+        raise
+    metrics.record_import(True, time.perf_counter() - start, {
+        "执法问题盯办": result["risk_supervision"]["total"],
+        "矛盾纠纷管理": result["dispute_management"]["total"],
+        "警情态势追踪": result["police_alert"],
+        "重复报警记录": result["call_record"],
+    })
+    return result
+
+
+def _read_sheet(excel_file: pd.ExcelFile, sheet_name: str) -> pd.DataFrame:
+    with tracing.span("import.read_sheet", sheet=sheet_name) as current:
+        df = pd.read_excel(excel_file, sheet_name=sheet_name)
+        current.set_attribute("rows", len(df))
+    return df
+
+
+def _import_sheets(db: Session, source) -> Dict[str, Any]:
+    with tracing.span("import.open_workbook"):
+        excel_file = pd.ExcelFile(source, engine='openpyxl')
+
+    empty_stats = {"total": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    result = {
+        "risk_supervision": dict(empty_stats, defaulted=0),
+        "dispute_management": dict(empty_stats),
+        "police_alert": 0,
+        "call_record": 0
+    }
+
+    if "执法问题盯办" in excel_file.sheet_names:
+        df = _read_sheet(excel_file, "执法问题盯办")
+        result["risk_supervision"] = import_risk_supervision(db, df)
+
+    if "矛盾纠纷管理" in excel_file.sheet_names:
+        df = _read_sheet(excel_file, "矛盾纠纷管理")
+        result["dispute_management"] = import_dispute_management(db, df)
+
+    if "警情态势追踪" in excel_file.sheet_names:
+        df = _read_sheet(excel_file, "警情态势追踪")
+        result["police_alert"] = import_police_alert(db, df)
+
+    if "重复报警记录" in excel_file.sheet_names:
+        df = _read_sheet(excel_file, "重复报警记录")
+        result["call_record"] = import_call_record(db, df)
+
+    # 刷新查询规划统计信息（部分索引、组合索引的选择依赖 sqlite_stat1）
+    with tracing.span("import.analyze"):
+        db.execute(text("ANALYZE"))
+
+    return result
+
+
+def format_import_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将导入统计转换为接口响应格式
+
+    Args:
+        result: import_workbook 返回值
+
+    Returns:
+        响应 data 字段
+    """
+    risk = result["risk_supervision"]
+    dispute = result["dispute_management"]
+    return {
+        "执法问题盯办": risk["total"],
+        "矛盾纠纷管理": dispute["total"],
+        "警情态势追踪": result["police_alert"],
+        "重复报警记录": result["call_record"],
+        "总计": risk["total"] + dispute["total"] + result["police_alert"] + result["call_record"],
+        "问题类型默认填充数": risk["defaulted"],
+        "增量明细": {
+            "执法问题盯办": {"新增": risk["inserted"], "更新": risk["updated"], "未变更": risk["unchanged"]},
+            "矛盾纠纷管理": {"新增": dispute["inserted"], "更新": dispute["updated"], "未变更": dispute["unchanged"]}
+        }
+    }
@@ -1,36 +1,269 @@
-"""显示规则服务"""
+"""显示规则服务
+
+启用的规则一次性读出并编译（条件转换为判断函数），按 (page_code, table_code) 建立索引，
+缓存到规则版本变化（规则增删改后递增）为止。
+
+整表计算样式时按列批量判断（RuleSet.assign）：数值阈值用 NumPy 掩码，
+等值与集合条件只在列的去重取值上判断一次，再按编码展开到各行。
+"""
 from sqlalchemy.orm import Session
+from app.core.cache import RULES_VERSION, VersionedCache, bump_version
 from app.models.display_rule import DisplayRule
+from datetime import datetime
+from decimal import Decimal
 import json
-from typing import List, Dict, Any, Optional
+import logging
+import numbers
+import operator
+import numpy as np
+from typing import Callable, List, Dict, Any, Optional, Sequence, Set, Tuple
 
+logger = logging.getLogger(__name__)
 
-def get_rules_by_page(db: Session, page_code: str, table_code: Optional[str] = None) -> List[Dict[str, Any]]:
+# 编译后的规则索引（规则增删改后失效）
+_index_cache = VersionedCache(RULES_VERSION, max_entries=1, name="display_rules")
+
+# 比较运算符（与前端 styleApplicator 支持的运算符一致）
+COMPARISON_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "eq": operator.eq,
+}
+
+# 集合运算符：取条件的 values 列表
+MEMBERSHIP_OPERATORS = ("in",)
+
+# 可对数值列整列比较的阈值运算符
+THRESHOLD_OPERATORS = ("<", "<=", ">", ">=")
+
+
+def _never(field_value: Any) -> bool:
+    return False
+
+
+def compile_condition(condition: Dict[str, Any]) -> Callable[[Any], bool]:
     """
-    获取指定页面的显示规则
+    将条件编译为判断函数
+
+    类型不可比较（如字符串与数字）时视为不命中；布尔值不参与阈值比较；不支持的运算符始终不命中。
 
     Args:
-        db: 数据库会话
-        page_code: 页面编码
-        table_code: 表格编码（可选），用于区分同一页面内的多个表格
+        condition: {"operator", "value"} 或 {"operator": "in", "values"}
 
     Returns:
-        规则列表
+        判断函数 (字段值) -> 是否命中
     """
-    query = db.query(DisplayRule).filter(
-        DisplayRule.page_code == page_code,
-        DisplayRule.is_enabled == 1
-    )
+    op = condition.get("operator")
+
+    if op in MEMBERSHIP_OPERATORS:
+        values = condition.get("values", []) or []
+        try:
+            members = frozenset(values)
+        except TypeError:  # 列表中含不可哈希的值
+            return lambda field_value: field_value in values
+        return lambda field_value: field_value in members
+
+    compare = COMPARISON_OPERATORS.get(op)
+    if compare is None:
+        logger.warning(f"不支持的规则运算符: {op}")
+        return _never
+
+    value = condition.get("value")
+
+    def predicate(field_value: Any) -> bool:
+        if op in THRESHOLD_OPERATORS and _is_bool(field_value):
+            return False
+        try:
+            return bool(compare(field_value, value))
+        except TypeError:
+            return False
+    return predicate
+
+
+def _is_bool(value: Any) -> bool:
+    return isinstance(value, (bool, np.bool_))
+
+
+def _is_number(value: Any) -> bool:
+    """实数（含 Decimal 与 NumPy 数值标量，不含布尔值）"""
+    return isinstance(value, (numbers.Real, Decimal)) and not _is_bool(value)
+
+
+class _Column:
+    """一列取值（按需转换为数值数组与去重编码）"""
+
+    def __init__(self, values: Sequence[Any]):
+        self.values = values
+        self.size = len(values)
+        # 非空的行（与逐行计算一致：字段值为空时跳过该规则）
+        self.present = np.fromiter((value is not None for value in values), bool, self.size)
+        self._numbers: Optional[np.ndarray] = None
+        self._factorized: Optional[Tuple[Optional[List[Any]], Optional[np.ndarray]]] = None
+
+    def numbers(self) -> np.ndarray:
+        """数值数组（非数值为 NaN，任何比较都不命中）"""
+        if self._numbers is None:
+            self._numbers = np.fromiter(
+                (float(value) if _is_number(value) else np.nan for value in self.values), float, self.size
+            )
+        return self._numbers
+
+    def factorized(self) -> Tuple[Optional[List[Any]], Optional[np.ndarray]]:
+        """(去重取值, 各行编码)；含不可哈希的取值时返回 (None, None)"""
+        if self._factorized is None:
+            index: Dict[Any, int] = {}
+            try:
+                codes = np.fromiter(
+                    (index.setdefault(value, len(index)) for value in self.values), np.intp, self.size
+                )
+                self._factorized = (list(index), codes)
+            except TypeError:
+                self._factorized = (None, None)
+        return self._factorized
+
+    def mask(self, condition: Dict[str, Any], predicate: Callable[[Any], bool]) -> np.ndarray:
+        """条件命中的行"""
+        op = condition.get("operator")
+        value = condition.get("value")
+        if op in THRESHOLD_OPERATORS and _is_number(value):
+            return COMPARISON_OPERATORS[op](self.numbers(), float(value))
+
+        uniques, codes = self.factorized()
+        if uniques is None:
+            return np.fromiter((predicate(item) for item in self.values), bool, self.size)
+        hits = np.fromiter((predicate(item) for item in uniques), bool, len(uniques))
+        return hits[codes]
+
+
+class RuleSet:
+    """
+    编译后的一组颜色规则（按优先级顺序，命中第一个满足的条件）
+
+    Args:
+        rules: 规则列表（get_rules_by_page 的返回格式）
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        # 各条件的样式 [(font_color, style_token), ...]
+        self.styles: List[Tuple[Any, Any]] = []
+        # [(字段, [(样式序号, 条件, 判断函数), ...]), ...]
+        self.fields: List[Tuple[str, List[Tuple[int, Dict[str, Any], Callable[[Any], bool]]]]] = []
+        for rule in rules:
+            if rule["rule_type"] != "color":
+                continue
+            config = rule["rule_config"]
+            conditions = []
+            for condition in config.get("conditions", []):
+                conditions.append((len(self.styles), condition, compile_condition(condition)))
+                self.styles.append((condition.get("font_color"), condition.get("style_token")))
+            self.fields.append((config.get("field"), conditions))
+
+    def style_for(self, item_data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        """
+        计算数据项的样式
+
+        Args:
+            item_data: 数据项
 
-    # 如果指定了 table_code，则过滤
-    if table_code is not None:
-        query = query.filter(DisplayRule.table_code == table_code)
+        Returns:
+            样式信息 {font_color, style_token}
+        """
+        for field, conditions in self.fields:
+            field_value = item_data.get(field)
+            if field_value is None:
+                continue
+            for style_index, _, predicate in conditions:
+                if predicate(field_value):
+                    font_color, style_token = self.styles[style_index]
+                    return {"font_color": font_color, "style_token": style_token}
+        return {"font_color": None, "style_token": None}
 
-    rules = query.order_by(DisplayRule.priority).all()
+    def assign(self, columns: Dict[str, Sequence[Any]]) -> np.ndarray:
+        """
+        按列批量计算整表样式（结果与逐行 style_for 一致）
 
-    result = []
-    for rule in rules:
-        result.append({
+        Args:
+            columns: {字段: 各行取值}，各列长度相同
+
+        Returns:
+            各行命中的样式序号（对应 self.styles，-1 表示未命中）
+        """
+        size = len(next(iter(columns.values()))) if columns else 0
+        assigned = np.full(size, -1, dtype=np.intp)
+        prepared: Dict[str, _Column] = {}
+        for field, conditions in self.fields:
+            values = columns.get(field)
+            if values is None:
+                continue
+            column = prepared.get(field)
+            if column is None:
+                column = prepared[field] = _Column(values)
+            pending = (assigned < 0) & column.present
+            for style_index, condition, predicate in conditions:
+                if not pending.any():
+                    break
+                hit = column.mask(condition, predicate) & pending
+                assigned[hit] = style_index
+                pending &= ~hit
+        return assigned
+
+    def row_styles(self, columns: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+        """
+        按列批量计算整表样式，只返回有样式的行
+
+        Args:
+            columns: {字段: 各行取值}
+
+        Returns:
+            [{row_index, font_color, style_token}, ...]
+        """
+        assigned = self.assign(columns)
+        result = []
+        for row_index in np.flatnonzero(assigned >= 0).tolist():
+            font_color, style_token = self.styles[assigned[row_index]]
+            if font_color or style_token:
+                result.append({"row_index": row_index, "font_color": font_color, "style_token": style_token})
+        return result
+
+
+class RuleIndex:
+    """按 (page_code, table_code) 索引的启用规则"""
+
+    def __init__(self, rules: List[Dict[str, Any]], page_codes: List[str]):
+        self.by_page: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_table: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]] = {}
+        for rule, page_code in zip(rules, page_codes):
+            self.by_page.setdefault(page_code, []).append(rule)
+            self.by_table.setdefault((page_code, rule["table_code"]), []).append(rule)
+        self._compiled: Dict[Tuple[str, Optional[str]], RuleSet] = {}
+
+    def rules(self, page_code: str, table_code: Optional[str] = None) -> List[Dict[str, Any]]:
+        """页面（及表格）的规则；table_code 为 None 时返回整个页面的规则"""
+        if table_code is None:
+            return self.by_page.get(page_code, [])
+        return self.by_table.get((page_code, table_code), [])
+
+    def compiled(self, page_code: str, table_code: Optional[str] = None) -> RuleSet:
+        """编译后的规则（首次使用时编译）"""
+        key = (page_code, table_code)
+        rule_set = self._compiled.get(key)
+        if rule_set is None:
+            rule_set = self._compiled[key] = RuleSet(self.rules(page_code, table_code))
+        return rule_set
+
+
+def _load_index(db: Session) -> RuleIndex:
+    rows = db.query(DisplayRule).filter(
+        DisplayRule.is_enabled == 1
+    ).order_by(DisplayRule.priority, DisplayRule.id).all()
+
+    rules = []
+    for rule in rows:
+        rules.append({
             "table_code": rule.table_code,
             "rule_type": rule.rule_type,
             "rule_name": rule.rule_name,
@@ -38,61 +271,356 @@ def get_rules_by_page(db: Session, page_code: str, table_code: Optional[str] = N
             "priority": rule.priority,
             "description": rule.description
         })
+    return RuleIndex(rules, [rule.page_code for rule in rows])
 
-    return result
 
+def get_rule_index(db: Session) -> RuleIndex:
+    """获取编译后的规则索引（规则增删改后重新加载）"""
+    return _index_cache.get_or_compute("index", lambda: _load_index(db))
 
-def apply_color_rules(item_data: Dict[str, Any], rules: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+
+def get_rules_by_page(db: Session, page_code: str, table_code: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    获取指定页面的显示规则
+
+    Args:
+        db: 数据库会话
+        page_code: 页面编码
+        table_code: 表格编码（可选），用于区分同一页面内的多个表格
+
+    Returns:
+        规则列表（按优先级升序，调用方不应修改）
+    """
+    return list(get_rule_index(db).rules(page_code, table_code))
+
+
+def get_rules_by_table(db: Session, page_code: str) -> Dict[Optional[str], List[Dict[str, Any]]]:
+    """
+    一次获取页面内所有表格的显示规则
+
+    Args:
+        db: 数据库会话
+        page_code: 页面编码
+
+    Returns:
+        {table_code: 规则列表}
+    """
+    index = get_rule_index(db)
+    return {table_code: list(rules) for (page, table_code), rules in index.by_table.items() if page == page_code}
+
+
+def get_compiled_rules(db: Session, page_code: str, table_code: Optional[str] = None) -> RuleSet:
+    """
+    获取编译后的颜色规则
+
+    Args:
+        db: 数据库会话
+        page_code: 页面编码
+        table_code: 表格编码（可选），为 None 时使用整个页面的规则
+
+    Returns:
+        RuleSet
+    """
+    return get_rule_index(db).compiled(page_code, table_code)
+
+
+def apply_color_rules(item_data: Dict[str, Any], rules: Any) -> Dict[str, Optional[str]]:
     """
     应用颜色规则
 
     Args:
         item_data: 数据项
-        rules: 规则列表
+        rules: 编译后的 RuleSet，或规则列表（临时编译）
 
     Returns:
         样式信息 {font_color, style_token}
     """
-    style = {
-        "font_color": None,
-        "style_token": None
+    if not isinstance(rules, RuleSet):
+        rules = RuleSet(rules)
+    return rules.style_for(item_data)
+
+
+def apply_color_rules_batch(columns: Dict[str, Sequence[Any]], rules: Any) -> List[Dict[str, Any]]:
+    """
+    按列批量应用颜色规则
+
+    Args:
+        columns: {字段: 各行取值}，各列长度相同
+        rules: 编译后的 RuleSet，或规则列表（临时编译）
+
+    Returns:
+        有样式的行 [{row_index, font_color, style_token}, ...]
+    """
+    if not isinstance(rules, RuleSet):
+        rules = RuleSet(rules)
+    return rules.row_styles(columns)
+
+
+# ==================== 规则批量管理 ====================
+
+# 规则的可写字段（导出格式同此）
+RULE_FIELDS = ("page_code", "table_code", "rule_type", "rule_name", "description", "priority", "is_enabled", "rule_config")
+
+# 新建规则的必填字段
+REQUIRED_FIELDS = ("page_code", "rule_type", "rule_name")
+
+# 导出格式版本
+EXPORT_FORMAT = 1
+
+
+def serialize_rule(rule: DisplayRule) -> Dict[str, Any]:
+    """规则的接口响应格式"""
+    return {
+        "id": rule.id,
+        "page_code": rule.page_code,
+        "table_code": rule.table_code,
+        "rule_type": rule.rule_type,
+        "rule_name": rule.rule_name,
+        "description": rule.description,
+        "priority": rule.priority,
+        "is_enabled": rule.is_enabled,
+        "rule_config": json.loads(rule.rule_config) if rule.rule_config else {},
+        "created_at": rule.created_at.isoformat() if rule.created_at else None,
+        "updated_at": rule.updated_at.isoformat() if rule.updated_at else None
+    }
+
+
+def _validate_config(rule_type: Optional[str], config: Any) -> None:
+    if not isinstance(config, dict):
+        raise ValueError("rule_config 须为对象")
+    if rule_type != "color":
+        return
+    conditions = config.get("conditions", [])
+    if not isinstance(conditions, list):
+        raise ValueError("颜色规则的 conditions 须为列表")
+    supported = list(COMPARISON_OPERATORS) + list(MEMBERSHIP_OPERATORS)
+    for condition in conditions:
+        if not isinstance(condition, dict):
+            raise ValueError("颜色规则的条件须为对象")
+        op = condition.get("operator")
+        if op not in supported:
+            raise ValueError(f"不支持的规则运算符: {op}，可选: {', '.join(supported)}")
+        if op in MEMBERSHIP_OPERATORS and not isinstance(condition.get("values", []), list):
+            raise ValueError(f"运算符 {op} 的 values 须为列表")
+
+
+def _rule_values(data: Any, current: Optional[DisplayRule] = None) -> Dict[str, Any]:
+    """
+    校验规则数据，返回要写入的列取值（未知字段忽略）
+
+    Args:
+        data: 规则数据
+        current: 更新时的现有规则（只校验传入的字段），新建时为 None
+
+    Raises:
+        ValueError: 缺少必填字段或取值不合法
+    """
+    if not isinstance(data, dict):
+        raise ValueError("规则数据须为对象")
+    values = {name: data[name] for name in RULE_FIELDS if name in data}
+
+    if current is None:
+        missing = [name for name in REQUIRED_FIELDS if not values.get(name)]
+        if missing:
+            raise ValueError(f"规则缺少必填字段: {', '.join(missing)}")
+    for name in REQUIRED_FIELDS:
+        if name in values and (not isinstance(values[name], str) or not values[name]):
+            raise ValueError(f"规则字段 {name} 须为非空字符串")
+    for name in ("table_code", "description"):
+        if values.get(name) is not None and not isinstance(values[name], str):
+            raise ValueError(f"规则字段 {name} 须为字符串")
+    for name in ("priority", "is_enabled"):
+        if name in values and (isinstance(values[name], bool) or not isinstance(values[name], int)):
+            raise ValueError(f"规则字段 {name} 须为整数")
+
+    if "rule_config" in values or current is None:
+        rule_type = values.get("rule_type", current.rule_type if current is not None else None)
+        config = values.get("rule_config", {})
+        _validate_config(rule_type, config)
+        values["rule_config"] = json.dumps(config, ensure_ascii=False)
+    return values
+
+
+def _new_rule(data: Any) -> DisplayRule:
+    values = _rule_values(data)
+    values.setdefault("priority", 1)
+    values.setdefault("is_enabled", 1)
+    values.setdefault("description", "")
+    return DisplayRule(**values)
+
+
+def _get_rule(db: Session, rule_id: Any) -> DisplayRule:
+    if isinstance(rule_id, bool) or not isinstance(rule_id, int):
+        raise ValueError(f"规则 ID 须为整数: {rule_id}")
+    rule = db.get(DisplayRule, rule_id)
+    if rule is None:
+        raise ValueError(f"规则不存在: {rule_id}")
+    return rule
+
+
+def apply_rule_operations(db: Session, operations: Any) -> List[Dict[str, Any]]:
+    """
+    在一个事务中批量执行规则操作（任一操作失败则全部回滚）
+
+    操作格式：
+    - {"op": "create", "rule": {...}}
+    - {"op": "update", "id": 1, "rule": {...}}（只更新传入的字段）
+    - {"op": "delete", "id": 1}
+    - {"op": "reorder", "ids": [3, 1, 2]}（按生效顺序依次设置优先级 1, 2, 3...，先命中先生效）
+
+    Args:
+        db: 数据库会话
+        operations: 操作列表
+
+    Returns:
+        各操作的结果 [{op, id}]（reorder 返回 ids）
+
+    Raises:
+        ValueError: 操作格式不合法、规则不存在或规则数据不合法（已回滚）
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations 须为非空列表")
+
+    results = []
+    try:
+        for index, operation in enumerate(operations):
+            try:
+                results.append(_apply_operation(db, operation))
+            except ValueError as e:
+                raise ValueError(f"第 {index + 1} 个操作: {e}")
+        bump_version(RULES_VERSION, db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return results
+
+
+def _apply_operation(db: Session, operation: Any) -> Dict[str, Any]:
+    if not isinstance(operation, dict):
+        raise ValueError("操作须为对象")
+    op = operation.get("op")
+
+    if op == "create":
+        rule = _new_rule(operation.get("rule"))
+        db.add(rule)
+        db.flush()
+        return {"op": op, "id": rule.id}
+
+    if op == "update":
+        rule = _get_rule(db, operation.get("id"))
+        for name, value in _rule_values(operation.get("rule"), rule).items():
+            setattr(rule, name, value)
+        rule.updated_at = datetime.now()
+        db.flush()
+        return {"op": op, "id": rule.id}
+
+    if op == "delete":
+        rule = _get_rule(db, operation.get("id"))
+        db.delete(rule)
+        db.flush()
+        return {"op": op, "id": rule.id}
+
+    if op == "reorder":
+        ids = operation.get("ids")
+        if not isinstance(ids, list) or not ids:
+            raise ValueError("reorder 的 ids 须为非空列表")
+        if len(set(ids)) != len(ids):
+            raise ValueError("reorder 的 ids 不能重复")
+        now = datetime.now()
+        for priority, rule_id in enumerate(ids, start=1):
+            rule = _get_rule(db, rule_id)
+            if rule.priority != priority:
+                rule.priority = priority
+                rule.updated_at = now
+        db.flush()
+        return {"op": op, "ids": ids}
+
+    raise ValueError(f"未知的操作: {op}，可选: create, update, delete, reorder")
+
+
+def export_rules(db: Session) -> Dict[str, Any]:
+    """
+    导出全部规则（不含 ID 与时间，可导入其他站点）
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        {format, exported_at, rules}
+    """
+    rules = db.query(DisplayRule).order_by(DisplayRule.page_code, DisplayRule.priority, DisplayRule.id).all()
+    return {
+        "format": EXPORT_FORMAT,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "rules": [
+            {name: value for name, value in serialize_rule(rule).items() if name in RULE_FIELDS}
+            for rule in rules
+        ]
     }
 
-    # 按优先级遍历规则
-    for rule in rules:
-        if rule["rule_type"] != "color":
-            continue
-
-        rule_config = rule["rule_config"]
-        field = rule_config.get("field")
-        conditions = rule_config.get("conditions", [])
-
-        # 获取字段值
-        field_value = item_data.get(field)
-        if field_value is None:
-            continue
-
-        # 检查条件
-        for condition in conditions:
-            operator = condition.get("operator")
-            value = condition.get("value")
-
-            matched = False
-            if operator == "<=":
-                matched = field_value <= value
-            elif operator == ">=":
-                matched = field_value >= value
-            elif operator == "==":
-                matched = field_value == value
-            elif operator == "eq":
-                matched = field_value == value
-            elif operator == "in":
-                values = condition.get("values", [])
-                matched = field_value in values
-
-            if matched:
-                style["font_color"] = condition.get("font_color")
-                style["style_token"] = condition.get("style_token")
-                return style  # 命中第一个规则后返回
-
-    return style
+
+def import_rules(db: Session, payload: Any, mode: str = "replace") -> Dict[str, int]:
+    """
+    在一个事务中导入规则（export_rules 的输出格式）
+
+    Args:
+        db: 数据库会话
+        payload: 导出内容
+        mode: replace 删除现有规则后导入；merge 按 (page_code, table_code, rule_name) 更新同名规则，其余新建
+              （内容相同的规则不写入，计入 unchanged；没有任何变更时不使规则缓存失效）
+
+    Returns:
+        {created, updated, unchanged, deleted}
+
+    Raises:
+        ValueError: 格式不合法或规则数据不合法（已回滚）
+    """
+    if mode not in ("replace", "merge"):
+        raise ValueError(f"未知的导入模式: {mode}，可选: replace, merge")
+    if not isinstance(payload, dict) or not isinstance(payload.get("rules"), list):
+        raise ValueError("导入内容须为包含 rules 列表的对象")
+    if payload.get("format", EXPORT_FORMAT) != EXPORT_FORMAT:
+        raise ValueError(f"不支持的导出格式版本: {payload.get('format')}")
+
+    summary = {"created": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+    try:
+        existing: Dict[Tuple[str, Optional[str], str], DisplayRule] = {}
+        created: Set[Tuple[str, Optional[str], str]] = set()
+        if mode == "replace":
+            summary["deleted"] = db.query(DisplayRule).delete(synchronize_session=False)
+        else:
+            for rule in db.query(DisplayRule).all():
+                existing[(rule.page_code, rule.table_code, rule.rule_name)] = rule
+
+        now = datetime.now()
+        for index, data in enumerate(payload["rules"]):
+            try:
+                rule = _new_rule(data)
+            except ValueError as e:
+                raise ValueError(f"第 {index + 1} 条规则: {e}")
+            key = (rule.page_code, rule.table_code, rule.rule_name)
+            current = existing.get(key)
+            if current is None:
+                db.add(rule)
+                existing[key] = rule
+                created.add(key)
+                summary["created"] += 1
+            elif key in created:
+                # 导入内容中同名的规则以最后一条为准，不重复新建
+                for name in RULE_FIELDS:
+                    setattr(current, name, getattr(rule, name))
+            elif any(getattr(current, name) != getattr(rule, name) for name in RULE_FIELDS):
+                for name in RULE_FIELDS:
+                    setattr(current, name, getattr(rule, name))
+                current.updated_at = now
+                summary["updated"] += 1
+            else:
+                summary["unchanged"] += 1
+        if summary["created"] or summary["updated"] or summary["deleted"]:
+            bump_version(RULES_VERSION, db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return summary
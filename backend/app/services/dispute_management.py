@@ -1,10 +1,100 @@
 """矛盾纠纷闭环管理服务"""
+from sqlalchemy import bindparam, func, select
 from sqlalchemy.orm import Session
 from app.models.dispute_management import DisputeManagement
-from app.services.display_rule import get_rules_by_page, apply_color_rules
+from app.core.cache import DATA_VERSION, VersionedCache
+from app.services import search
+from app.services.display_rule import get_compiled_rules, get_rules_by_page, apply_color_rules_batch
+from app.utils.facets import rollup_facets
+from app.utils.fields import parse_fields
+from app.utils.pagination import encode_cursor, keyset_condition
 from typing import List, Dict, Any, Tuple, Optional
 
 
+# 总数缓存（按筛选条件，导入后失效）
+_total_cache = VersionedCache(DATA_VERSION, name="dispute_total")
+
+# 分面分组计数缓存（导入后失效）
+_facet_cache = VersionedCache(DATA_VERSION, name="dispute_facets")
+
+# 默认筛选的处置进度
+DEFAULT_STATUSES = ["待化解", "待关注"]
+
+# 分面列（与列表筛选参数同名）
+FACET_COLUMNS = {
+    'officer_name': DisputeManagement.officer_name,
+    'risk_level': DisputeManagement.risk_level,
+    'status': DisputeManagement.status
+}
+
+# 列表字段 -> 列（style 由风险等级按规则计算，为 None）
+LIST_COLUMNS = {
+    'id': DisputeManagement.id,
+    'event_name': DisputeManagement.event_name,
+    'event_type': DisputeManagement.event_type,
+    'content': DisputeManagement.content,
+    'event_time': DisputeManagement.event_time,
+    'risk_level': DisputeManagement.risk_level,
+    'officer_name': DisputeManagement.officer_name,
+    'status': DisputeManagement.status,
+    'style': None
+}
+
+# 列表可返回的字段（默认顺序）
+LIST_FIELDS = tuple(LIST_COLUMNS)
+
+# 排序字段映射
+SORT_MAP = {
+    'event_type': DisputeManagement.event_type,
+    'event_time': DisputeManagement.event_time
+}
+
+
+def build_filters(
+    status: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    officer_name: Optional[str] = None
+) -> List[Any]:
+    """
+    构建列表筛选条件（列表与导出共用）
+
+    Returns:
+        SQLAlchemy 条件表达式列表
+    """
+    filters = []
+
+    # 默认筛选：待化解、待关注（字面量渲染，以便命中部分索引）
+    if status is None:
+        filters.append(DisputeManagement.status.in_(
+            bindparam("default_statuses", DEFAULT_STATUSES, expanding=True, literal_execute=True)
+        ))
+    else:
+        filters.append(DisputeManagement.status == status)
+
+    # 风险等级筛选
+    if risk_level:
+        filters.append(DisputeManagement.risk_level == risk_level)
+
+    # 警员筛选
+    if officer_name:
+        filters.append(DisputeManagement.officer_name == officer_name)
+
+    return filters
+
+
+def get_sort_column(sort_field: str):
+    """获取排序列"""
+    return SORT_MAP.get(sort_field, DisputeManagement.event_time)
+
+
+def get_sort_clause(sort_field: str, sort_order: str) -> Tuple[Any, Any]:
+    """获取排序表达式（排序值相同时按 id 决胜，保证游标分页顺序稳定）"""
+    sort_column = get_sort_column(sort_field)
+    if sort_order == "desc":
+        return sort_column.desc(), DisputeManagement.id.desc()
+    return sort_column.asc(), DisputeManagement.id.asc()
+
+
 def list_dispute_management(
     db: Session,
     page: int = 1,
@@ -14,14 +104,18 @@ def list_dispute_management(
     officer_name: Optional[str] = None,
     sort_field: str = "event_time",
     sort_order: str = "desc",
-    include_rules: bool = True
-) -> Tuple[List[Dict[str, Any]], int, List[Dict[str, Any]]]:
+    include_rules: bool = True,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    q: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[int], List[Dict[str, Any]], Optional[str]]:
     """
     获取矛盾纠纷闭环管理列表
 
     Args:
         db: 数据库会话
-        page: 页码
+        page: 页码（未传游标时使用 OFFSET 分页）
         page_size: 每页数量
         status: 处置进度筛选
         risk_level: 风险等级筛选
@@ -29,82 +123,159 @@ def list_dispute_management(
         sort_field: 排序字段
         sort_order: 排序方向 (asc/desc)
         include_rules: 是否包含规则
+        cursor: 上一页返回的 next_cursor，传入后按 (排序列, id) 游标分页
+        include_total: 是否返回总数（按筛选条件缓存，导入后失效）
+        q: 全文检索关键词，传入后按相关度排序并返回高亮（highlights），使用页码分页；
+           命中超过 search.SEARCH_MAX_MATCHES 时只返回最新的这些命中（总数同样以此为上限）
+        fields: 返回字段（逗号分隔，见 LIST_FIELDS），为空时返回全部字段
 
     Returns:
-        (items, total, rules)
+        (items, total, rules, next_cursor)
+
+    Raises:
+        ValueError: 游标无效、检索时传入游标或字段不存在
     """
     # 构建查询
-    query = db.query(DisputeManagement)
+    fields = parse_fields(fields, LIST_FIELDS)
+    filters = build_filters(status, risk_level, officer_name)
 
-    # 默认筛选：待化解、待关注
-    if status is None:
-        query = query.filter(DisputeManagement.status.in_(["待化解", "待关注"]))
-    else:
-        query = query.filter(DisputeManagement.status == status)
+    # 全文检索
+    q = q.strip() if q else None
+    matches = None
+    if q:
+        if cursor:
+            raise ValueError("关键词检索按相关度排序，不支持游标分页")
+        matches = search.match_subquery(
+            db, search.dispute_management_fts, q, [DisputeManagement.event_name, DisputeManagement.content], DisputeManagement.id,
+            filters
+        )
 
-    # 风险等级筛选
-    if risk_level:
-        query = query.filter(DisputeManagement.risk_level == risk_level)
-
-    # 警员筛选
-    if officer_name:
-        query = query.filter(DisputeManagement.officer_name == officer_name)
+    def apply_filters(stmt):
+        if matches is not None:
+            stmt = stmt.join(matches, matches.c.id == DisputeManagement.id)
+        return stmt.where(*filters)
 
     # 查询总数
-    total = query.count()
+    total = None
+    if include_total:
+        count_stmt = apply_filters(select(func.count()).select_from(DisputeManagement))
+        total = _total_cache.get_or_compute(
+            (status, risk_level, officer_name, q),
+            lambda: db.execute(count_stmt).scalar()
+        )
 
-    # 排序
-    sort_map = {
-        'event_type': DisputeManagement.event_type,
-        'event_time': DisputeManagement.event_time
-    }
+    # 列投影：请求的字段在前（结果行按位置直接组装为 dict），内部使用的列在后
+    names = [name for name in fields if LIST_COLUMNS[name] is not None]
+    sort_column = get_sort_column(sort_field)
+    internal = [DisputeManagement.id, sort_column, DisputeManagement.risk_level]
+    if q:
+        internal += [DisputeManagement.event_name, DisputeManagement.content]
+    stmt = apply_filters(select(*[LIST_COLUMNS[name].label(name) for name in names], *internal))
 
-    sort_column = sort_map.get(sort_field, DisputeManagement.event_time)
+    # 排序（检索时按相关度）
+    if matches is not None:
+        stmt = stmt.order_by(matches.c.rank, DisputeManagement.id)
+    else:
+        stmt = stmt.order_by(*get_sort_clause(sort_field, sort_order))
 
-    if sort_order == "desc":
-        query = query.order_by(sort_column.desc())
+    # 分页：游标优先，多取一条判断是否还有下一页
+    if cursor:
+        stmt = stmt.where(keyset_condition(sort_column, DisputeManagement.id, cursor, sort_order))
     else:
-        query = query.order_by(sort_column.asc())
+        stmt = stmt.offset((page - 1) * page_size)
+    rows = db.execute(stmt.limit(page_size + 1)).all()
 
-    # 分页
-    offset = (page - 1) * page_size
-    items_db = query.offset(offset).limit(page_size).all()
+    n = len(names)
+    next_cursor = None
+    if len(rows) > page_size and matches is None:
+        last = rows[page_size - 1]
+        next_cursor = encode_cursor(last[n + 1], last[n])
+    rows = rows[:page_size]
 
     # 获取规则
     rules = []
+    compiled_rules = []
     if include_rules:
         rules = get_rules_by_page(db, "dispute_management")
+        compiled_rules = get_compiled_rules(db, "dispute_management")
+
+    # 组装数据
+    items = [dict(zip(names, row)) for row in rows]
+
+    # 应用样式规则（按风险等级整列计算）
+    if "style" in fields:
+        row_styles = apply_color_rules_batch({"risk_level": [row[n + 2] for row in rows]}, compiled_rules)
+        styled = {style["row_index"]: style for style in row_styles}
+        for row_index, item in enumerate(items):
+            style = styled.get(row_index)
+            item["style"] = {
+                "font_color": style["font_color"] if style else None,
+                "style_token": style["style_token"] if style else None
+            }
+
+    # 检索命中高亮（事件名称全文、内容取摘要）
+    if q:
+        for item, row in zip(items, rows):
+            item["highlights"] = {
+                "event_name": search.highlight(row[n + 3], q),
+                "content": search.highlight(row[n + 4], q, snippet=True)
+            }
+
+    return items, total, rules, next_cursor
+
+
+def _facet_combos(db: Session, q: Optional[str] = None) -> List[Tuple[Any, ...]]:
+    """
+    按全部分面列分组计数（一次扫描，导入后失效）
+
+    关键词不是分面列，作为公共条件折入分组查询（命中超过 search.SEARCH_MAX_MATCHES 时按最新的这些命中统计）。
+    """
+    q = q.strip() if q else None
 
-    # 转换数据
-    items = []
-    for item in items_db:
-        # 构建数据项
-        item_data = {
-            "id": item.id,
-            "event_name": item.event_name,
-            "event_type": item.event_type,
-            "content": item.content,
-            "event_time": item.event_time,
-            "risk_level": item.risk_level,
-            "officer_name": item.officer_name,
-            "status": item.status
-        }
+    def compute():
+        columns = list(FACET_COLUMNS.values())
+        stmt = select(*columns, func.count()).select_from(DisputeManagement)
+        if q:
+            matches = search.match_subquery(
+                db, search.dispute_management_fts, q, [DisputeManagement.event_name, DisputeManagement.content], DisputeManagement.id
+            )
+            stmt = stmt.join(matches, matches.c.id == DisputeManagement.id)
+        rows = db.execute(stmt.group_by(*columns)).all()
+        return [tuple(row) for row in rows]
 
-        # 应用样式规则
-        style = apply_color_rules({"risk_level": item.risk_level}, rules)
-        item_data["style"] = style
+    return _facet_cache.get_or_compute(("combos", q), compute)
 
-        items.append(item_data)
 
-    return items, total, rules
+def get_facets(
+    db: Session,
+    status: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    officer_name: Optional[str] = None,
+    q: Optional[str] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    获取筛选分面及各取值数量（在其他已选条件下统计）
+
+    未指定处置进度时与列表一致，按默认的待化解、待关注统计其他分面。
+
+    Args:
+        db: 数据库会话
+        status: 处置进度筛选
+        risk_level: 风险等级筛选
+        officer_name: 责任民警筛选
+        q: 全文检索关键词（与列表一致，所有分面均按其统计）
+
+    Returns:
+        {分面名称: [{"value": 取值, "count": 数量}, ...]}
+    """
+    selected = {
+        'officer_name': {officer_name} if officer_name else None,
+        'risk_level': {risk_level} if risk_level else None,
+        'status': {status} if status is not None else set(DEFAULT_STATUSES)
+    }
+    return rollup_facets(_facet_combos(db, q), list(FACET_COLUMNS), selected)
 
 
 def get_officer_options(db: Session) -> List[str]:
     """获取去重的警员列表"""
-    officers = (
-        db.query(DisputeManagement.officer_name)
-        .distinct()
-        .order_by(DisputeManagement.officer_name.asc())
-        .all()
-    )
-    return [o[0] for o in officers]
+    return [option["value"] for option in get_facets(db)["officer_name"]]
@@ -0,0 +1,289 @@
+"""数据导出服务 - 流式 CSV / 只写模式 XLSX"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.database import ReadSessionLocal
+from app.models.police_alert import PoliceAlert
+from app.models.call_record import CallRecord
+from app.models.risk_supervision import RiskSupervision
+from app.models.dispute_management import DisputeManagement
+from app.services import risk_supervision, dispute_management, search
+from datetime import date, datetime
+from typing import Any, Iterator, List, Optional, Sequence
+import csv
+import io
+import tempfile
+
+# 服务端游标每批拉取的行数
+EXPORT_BATCH_SIZE = 1000
+
+# 导出文件流式输出的块大小
+FILE_CHUNK_SIZE = 64 * 1024
+
+# 超过该大小的 XLSX 临时文件落盘
+XLSX_SPOOL_SIZE = 8 * 1024 * 1024
+
+# Excel 单个 sheet 的最大行数（含表头）；openpyxl 只写模式不检查，超出的文件 Excel 无法打开
+XLSX_MAX_ROWS = 1048576
+
+
+# 各表导出定义：sheet 名与表头与导入模板一致。
+# 盯办与纠纷导入时按唯一键与内容哈希合并，导出文件可重新导入；
+# 警情与重复报警导入时同键次数累加，导出文件不能再导入同一数据库（次数会翻倍），只用于迁移到新库
+RISK_SUPERVISION_HEADERS = ["序号", "案件编号", "案件名称", "案发时间", "案件类型", "风险类型", "风险问题", "问题类型", "整改期限", "责任民警"]
+DISPUTE_MANAGEMENT_HEADERS = ["序号", "事件名称", "事件类型", "事件内容", "事发时间", "风险等级", "责任民警", "处置进度"]
+POLICE_ALERT_HEADERS = ["序号", "日期", "警情类型", "地点", "次数"]
+CALL_RECORD_HEADERS = ["序号", "日期", "报警地点", "次数"]
+
+
+def risk_supervision_select(
+    db: Session,
+    case_type: Optional[str] = None,
+    problem_type: Optional[str] = None,
+    officer_name: Optional[str] = None,
+    sort_field: str = "days_remaining",
+    sort_order: str = "asc",
+    issue: Optional[str] = None,
+    q: Optional[str] = None,
+    urgency: Optional[List[str]] = None
+):
+    """
+    执法问题盯办导出查询（与列表接口筛选一致）
+
+    Args:
+        db: 数据库会话（用于判断全文检索是否可用、读取紧急程度分档，查询本身由 stream_rows 执行）
+        q: 全文检索关键词，传入后与列表一致按相关度排序（最多导出最新的 search.SEARCH_MAX_MATCHES 条命中）
+        urgency: 紧急程度分档筛选（分档 key 列表）
+
+    Raises:
+        ValueError: 分档不存在
+    """
+    filters = risk_supervision.build_filters(case_type, problem_type, officer_name, issue)
+    if urgency:
+        filters.append(risk_supervision.urgency_filter(
+            risk_supervision.get_urgency_buckets(db), urgency, risk_supervision.current_time()
+        ))
+
+    stmt = select(
+        RiskSupervision.case_number,
+        RiskSupervision.case_name,
+        RiskSupervision.case_time,
+        RiskSupervision.case_type,
+        RiskSupervision.risk_type,
+        RiskSupervision.risk_issues,
+        RiskSupervision.problem_type,
+        RiskSupervision.deadline,
+        RiskSupervision.officer_name
+    ).where(*filters)
+
+    q = q.strip() if q else None
+    matches = None
+    if q:
+        matches = search.match_subquery(
+            db, search.risk_supervision_fts, q, [RiskSupervision.case_name, RiskSupervision.risk_issues], RiskSupervision.id,
+            filters
+        )
+    if matches is not None:
+        return stmt.join(matches, matches.c.id == RiskSupervision.id).order_by(matches.c.rank, RiskSupervision.id)
+    return stmt.order_by(*risk_supervision.get_sort_clause(sort_field, sort_order))
+
+
+def dispute_management_select(
+    db: Session,
+    status: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    officer_name: Optional[str] = None,
+    sort_field: str = "event_time",
+    sort_order: str = "desc",
+    q: Optional[str] = None
+):
+    """
+    矛盾纠纷管理导出查询（与列表接口筛选一致）
+
+    Args:
+        db: 数据库会话（用于判断全文检索是否可用，查询本身由 stream_rows 执行）
+        q: 全文检索关键词，传入后与列表一致按相关度排序（最多导出最新的 search.SEARCH_MAX_MATCHES 条命中）
+    """
+    filters = dispute_management.build_filters(status, risk_level, officer_name)
+    stmt = select(
+        DisputeManagement.event_name,
+        DisputeManagement.event_type,
+        DisputeManagement.content,
+        DisputeManagement.event_time,
+        DisputeManagement.risk_level,
+        DisputeManagement.officer_name,
+        DisputeManagement.status
+    ).where(*filters)
+
+    q = q.strip() if q else None
+    matches = None
+    if q:
+        matches = search.match_subquery(
+            db, search.dispute_management_fts, q, [DisputeManagement.event_name, DisputeManagement.content], DisputeManagement.id,
+            filters
+        )
+    if matches is not None:
+        return stmt.join(matches, matches.c.id == DisputeManagement.id).order_by(matches.c.rank, DisputeManagement.id)
+    return stmt.order_by(*dispute_management.get_sort_clause(sort_field, sort_order))
+
+
+def police_alert_select(
+    alert_type: Optional[str] = None,
+    location: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """警情态势追踪导出查询（导出文件不能再导入同一数据库，见 POLICE_ALERT_HEADERS 上方说明）"""
+    filters = []
+    if alert_type:
+        filters.append(PoliceAlert.alert_type == alert_type)
+    if location:
+        filters.append(PoliceAlert.location == location)
+    if start_date:
+        filters.append(PoliceAlert.alert_date >= start_date)
+    if end_date:
+        filters.append(PoliceAlert.alert_date <= end_date)
+
+    return select(
+        PoliceAlert.alert_date,
+        PoliceAlert.alert_type,
+        PoliceAlert.location,
+        PoliceAlert.count
+    ).where(*filters).order_by(PoliceAlert.alert_date.desc(), PoliceAlert.id)
+
+
+def call_record_select(
+    call_address: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """重复报警记录导出查询（导出文件不能再导入同一数据库，见 POLICE_ALERT_HEADERS 上方说明）"""
+    filters = []
+    if call_address:
+        filters.append(CallRecord.call_address == call_address)
+    if start_date:
+        filters.append(CallRecord.call_date >= start_date)
+    if end_date:
+        filters.append(CallRecord.call_date <= end_date)
+
+    return select(
+        CallRecord.call_date,
+        CallRecord.call_address,
+        CallRecord.count
+    ).where(*filters).order_by(CallRecord.call_date.desc(), CallRecord.id)
+
+
+def count_rows(stmt) -> int:
+    """
+    统计导出查询的行数（XLSX 导出前检查行数上限）
+
+    Args:
+        stmt: Core select 语句
+
+    Returns:
+        行数
+    """
+    db = ReadSessionLocal()
+    try:
+        return db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar()
+    finally:
+        db.close()
+
+
+def stream_rows(stmt) -> Iterator[Sequence[Any]]:
+    """
+    通过服务端游标分批读取查询结果（不构建 ORM 对象）
+
+    导出响应在路由返回后才开始迭代，因此这里自行管理会话生命周期。
+
+    Args:
+        stmt: Core select 语句
+
+    Yields:
+        (序号, 列值...) 元组
+    """
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        for index, row in enumerate(result, start=1):
+            yield (index, *row)
+    finally:
+        db.close()
+
+
+def _format_csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def iter_csv(headers: List[str], rows: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    逐批生成 CSV 字节流（带 BOM，Excel 打开中文不乱码）
+
+    Args:
+        headers: 表头
+        rows: 行迭代器
+
+    Yields:
+        CSV 字节块
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    pending = 0
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow([_format_csv_value(value) for value in row])
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx(sheet_name: str, headers: List[str], rows: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    """
+    使用 openpyxl 只写模式生成 XLSX 并分块输出
+
+    只写模式逐行写入工作表临时文件，内存占用与行数无关；
+    XLSX 是 zip 容器，需写完后再整体输出：响应头先发出，但整个工作簿写完前没有任何响应体，
+    行数很多时经过反向代理可能触发读超时，此时应使用 CSV（逐批输出）或调大代理的读超时。
+    行数上限由调用方预先检查（count_rows），这里只防止统计后数据增长导致超限。
+
+    Args:
+        sheet_name: 工作表名称
+        headers: 表头
+        rows: 行迭代器
+
+    Yields:
+        XLSX 字节块
+
+    Raises:
+        ValueError: 超过 Excel 单个 sheet 的行数上限（此时响应中断，不输出不完整的文件）
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append(headers)
+    for count, row in enumerate(rows, start=2):
+        if count > XLSX_MAX_ROWS:
+            # 关闭工作表（释放临时文件），不保存不完整的文件
+            ws.close()
+            raise ValueError(f"超过 Excel 单个 sheet 的行数上限 {XLSX_MAX_ROWS}，请使用 csv 格式导出")
+        ws.append(list(row))
+
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE) as output:
+        wb.save(output)
+        output.seek(0)
+        for chunk in iter(lambda: output.read(FILE_CHUNK_SIZE), b""):
+            yield chunk
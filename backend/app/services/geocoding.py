@@ -1,17 +1,32 @@
 """地理编码服务"""
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.core.cache import GEOCODING_VERSION, bump_version
+from app.core import metrics, tracing
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.singleflight import SingleFlight
 from app.models.geocoding_cache import GeocodingCache
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 from decimal import Decimal
 from datetime import datetime
 import httpx
 import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# 并发请求同一个未缓存地址时只调用一次天地图API
+_geocode_flight = SingleFlight("geocoding")
 
+# 解析失败的地址 → 可以重试的时间（monotonic）。失败不写缓存也不递增版本，
+# 否则依赖地图数据的 ETag 每次都会变化；重试间隔内直接返回 None，之后的计算再重试
+_failed: Dict[str, float] = {}
+
+
+@tracing.traced("geocoding.get_coordinates_with_api", args=("address",))
 async def get_coordinates_with_api(
     db: Session,
     address: str,
@@ -33,28 +48,86 @@ async def get_coordinates_with_api(
         GeocodingCache.address == address
     ).first()
 
+    metrics.record_cache("geocoding", cache is not None)
     if cache:
         logger.info(f"从缓存获取坐标: {address}")
         return (cache.longitude, cache.latitude)
 
-    # 2. 缓存中没有，调用天地图API
+    # 2. 缓存中没有，调用天地图API（同一地址的并发请求只调用一次）
     if not tianditu_key:
         logger.warning("天地图API Key未配置")
         return None
 
+    return await geocode_and_cache(address, tianditu_key)
+
+
+@tracing.traced("geocoding.geocode_and_cache", args=("address",))
+async def geocode_and_cache(address: str, tianditu_key: str) -> Optional[Tuple[Decimal, Decimal]]:
+    """
+    调用天地图API获取未缓存地址的坐标并写入缓存（同一地址的并发请求只调用一次）
+
+    Args:
+        address: 地址（调用方已确认缓存中没有）
+        tianditu_key: 天地图API密钥
+
+    Returns:
+        (longitude, latitude) 或 None（解析失败且未到重试时间时不调用接口）
+    """
+    retry_at = _failed.get(address)
+    if retry_at is not None and time.monotonic() < retry_at:
+        return None
+    return await _geocode_flight.do(address, lambda: _fetch_and_save(address, tianditu_key))
+
+
+@tracing.traced("geocoding.fetch_and_save", args=("address",))
+async def _fetch_and_save(address: str, tianditu_key: str) -> Optional[Tuple[Decimal, Decimal]]:
+    """
+    调用天地图API并写入缓存（并发请求共享，使用独立的数据库会话）
+
+    Args:
+        address: 地址
+        tianditu_key: 天地图API密钥
+
+    Returns:
+        (longitude, latitude) 或 None
+    """
     try:
+        start = time.perf_counter()
         coords = await fetch_from_tianditu(address, tianditu_key)
+        metrics.record_geocoding(coords is not None, time.perf_counter() - start)
         if coords:
             # 3. 存入缓存
-            save_coordinates(db, address, coords[0], coords[1])
+            await run_in_threadpool(_save_with_session, address, coords[0], coords[1])
             logger.info(f"从天地图获取并缓存坐标: {address}")
+            _failed.pop(address, None)
             return coords
     except Exception as e:
         logger.error(f"获取坐标失败: {address}, 错误: {e}")
 
+    # 解析失败的地址不写缓存、不递增版本，记录重试时间（成功写入缓存时才递增版本）
+    _mark_failed(address)
     return None
 
 
+def _mark_failed(address: str) -> None:
+    """记录解析失败的地址（顺带清理已到重试时间的记录）"""
+    now = time.monotonic()
+    for expired in [key for key, retry_at in _failed.items() if retry_at <= now]:
+        del _failed[expired]
+    _failed[address] = now + settings.GEOCODING_RETRY_SECONDS
+
+
+@tracing.traced("geocoding.save", args=("address",))
+def _save_with_session(address: str, longitude: Decimal, latitude: Decimal) -> None:
+    """使用独立会话写入坐标缓存（在线程池中执行，不阻塞事件循环）"""
+    db = SessionLocal()
+    try:
+        save_coordinates(db, address, longitude, latitude)
+    finally:
+        db.close()
+
+
+@tracing.traced("geocoding.tianditu", args=("address",), kind=tracing.KIND_CLIENT)
 async def fetch_from_tianditu(address: str, api_key: str) -> Optional[Tuple[Decimal, Decimal]]:
     """
     从天地图API获取坐标
@@ -114,6 +187,7 @@ async def fetch_from_tianditu(address: str, api_key: str) -> Optional[Tuple[Deci
         return None
 
 
+@tracing.traced("geocoding.get_coordinates", args=("address",))
 def get_coordinates(
     db: Session,
     address: str
@@ -133,6 +207,7 @@ def get_coordinates(
         GeocodingCache.address == address
     ).first()
 
+    metrics.record_cache("geocoding", cache is not None)
     if cache:
         return (cache.longitude, cache.latitude)
 
@@ -172,6 +247,7 @@ def save_coordinates(
         }
     )
     db.execute(stmt)
+    bump_version(GEOCODING_VERSION, db)
     db.commit()
 
     cache = db.query(GeocodingCache).filter(
@@ -181,6 +257,7 @@ def save_coordinates(
     return cache
 
 
+@tracing.traced("geocoding.batch_get_coordinates")
 def batch_get_coordinates(
     db: Session,
     addresses: list
@@ -0,0 +1,375 @@
+"""数据推送服务 - 大屏通过 SSE 订阅页面数据，代替定时轮询
+
+每个订阅由“页面 + 规范化后的查询参数”确定一个频道，参数相同的连接共用一个频道。
+导入数据、修改规则（数据/规则版本递增）后，每个频道只计算并编码一次载荷，
+再发送给频道内的所有连接；内容没有变化时不发送。
+跨日、地理编码重试等不递增数据/规则版本的变化由定时检查发现，
+是否需要重新计算按频道的 ETag（与对应数据接口的 ETag 组成相同）判断。
+"""
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.core.cache import DATA_VERSION, RULES_VERSION, add_version_listener, remove_version_listener
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.core.http_cache import Conditional
+from app.core.responses import dumps
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import inspect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# 递增后立即推送的版本（只能收到本进程的递增，多进程时其他进程的导入、规则修改由定时检查发现）
+# 地理编码版本在解析地址期间逐个坐标递增，交给定时检查合并处理，避免每写入一个坐标就重算一次
+WAKE_VERSIONS = (DATA_VERSION, RULES_VERSION)
+
+# 版本连续递增（如连续修改多条规则）时等待合并的时间（秒）
+DEBOUNCE_SECONDS = 0.2
+
+# 频道参数：按名称排序的 (参数名, 值) 元组，多值参数的值为元组
+Params = Tuple[Tuple[str, Any], ...]
+
+
+class PageSpec:
+    """
+    可订阅的页面
+
+    Args:
+        path: 对应的数据接口路径（用于计算 ETag）
+        conditional: 对应数据接口的条件请求依赖
+        params: 可用查询参数及默认值；默认值为 bool / int 时按该类型解析，为 list 时可多值
+        compute: 计算推送内容的函数 (db, params) -> 响应内容，可为同步或异步函数，参数不合法时抛出 ValueError
+    """
+
+    def __init__(
+        self,
+        path: str,
+        conditional: Conditional,
+        params: Dict[str, Any],
+        compute: Callable[[Session, Dict[str, Any]], Any]
+    ):
+        self.path = path
+        self.conditional = conditional
+        self.params = params
+        self.compute = compute
+
+    def normalize(self, query_items: Iterable[Tuple[str, str]]) -> Params:
+        """
+        规范化查询参数：校验参数名、按默认值类型解析、补全默认值
+
+        Raises:
+            ValueError: 未知参数或取值类型错误
+        """
+        values: Dict[str, Any] = {}
+        for name, value in query_items:
+            if name not in self.params:
+                raise ValueError(f"未知的参数: {name}，可选参数: {', '.join(self.params)}")
+            default = self.params[name]
+            if isinstance(default, list):
+                values.setdefault(name, []).append(value)
+            elif isinstance(default, bool):
+                if value.lower() not in ("true", "false", "1", "0"):
+                    raise ValueError(f"参数 {name} 必须为 true 或 false")
+                values[name] = value.lower() in ("true", "1")
+            elif isinstance(default, int):
+                try:
+                    values[name] = int(value)
+                except ValueError:
+                    raise ValueError(f"参数 {name} 必须为整数")
+            else:
+                values[name] = value
+
+        params = []
+        for name, default in self.params.items():
+            value = values.get(name, default)
+            params.append((name, tuple(sorted(value)) if isinstance(value, list) else value))
+        return tuple(sorted(params))
+
+    def etag(self, params: Params) -> str:
+        """频道的 ETag：与用相同参数请求数据接口时的 ETag 组成相同"""
+        items: List[Tuple[str, str]] = []
+        for name, value in params:
+            if value is None:
+                continue
+            if isinstance(value, tuple):
+                items.extend((name, str(v)) for v in value)
+            elif isinstance(value, bool):
+                items.append((name, "true" if value else "false"))
+            else:
+                items.append((name, str(value)))
+        return self.conditional.compute_etag(self.path, items)
+
+
+class Subscription:
+    """一个 SSE 连接"""
+
+    def __init__(self, channel: "Channel"):
+        self.channel = channel
+        # 元素为已编码的 SSE 消息，None 表示服务关闭
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=max(settings.PUSH_QUEUE_SIZE, 1))
+
+    def offer(self, message: Optional[bytes]) -> bool:
+        """放入待发送消息；队列已满（客户端读取过慢）时丢弃最旧的一条，返回是否发生丢弃"""
+        dropped = False
+        if self.queue.full():
+            self.queue.get_nowait()
+            dropped = True
+        self.queue.put_nowait(message)
+        return dropped
+
+
+class Channel:
+    """频道：同一页面、同一组参数的所有连接共享一份载荷"""
+
+    def __init__(self, page: str, params: Params):
+        self.page = page
+        self.params = params
+        self.subscribers: Set[Subscription] = set()
+        self.etag: Optional[str] = None
+        # 载荷摘要，重新计算后内容不变时不推送
+        self.digest: Optional[str] = None
+        # 已编码的 SSE 消息，新连接直接复用
+        self.message: Optional[bytes] = None
+        self.lock = asyncio.Lock()
+
+    @property
+    def event_id(self) -> Optional[str]:
+        return self.etag.strip('"') if self.etag else None
+
+
+class PushHub:
+    """推送中心：管理频道与连接，数据变化后重新计算并广播"""
+
+    def __init__(self):
+        self.pages: Dict[str, PageSpec] = {}
+        self.channels: Dict[Tuple[str, Params], Channel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counters: Dict[str, float] = {
+            "connections_total": 0,
+            "computations": 0,
+            "compute_seconds": 0.0,
+            "broadcasts": 0,
+            "unchanged": 0,
+            "messages": 0,
+            "dropped": 0,
+            "errors": 0,
+        }
+
+    def register(self, page: str, spec: PageSpec) -> None:
+        """注册可订阅的页面"""
+        self.pages[page] = spec
+
+    # ==================== 生命周期 ====================
+
+    async def start(self) -> None:
+        """启动后台刷新任务（在应用启动时调用）"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        add_version_listener(self._on_version)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务并关闭所有连接（在应用关闭时调用）"""
+        remove_version_listener(self._on_version)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for channel in self.channels.values():
+            for subscription in channel.subscribers:
+                subscription.offer(None)
+        self._loop = None
+
+    def _on_version(self, name: str, version: int) -> None:
+        """版本变化监听（可能在线程池中调用）"""
+        loop = self._loop
+        if name in WAKE_VERSIONS and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.PUSH_CHECK_INTERVAL)
+                await asyncio.sleep(DEBOUNCE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.refresh()
+
+    # ==================== 订阅 ====================
+
+    async def subscribe(
+        self,
+        page: str,
+        query_items: Iterable[Tuple[str, str]],
+        last_event_id: Optional[str] = None
+    ) -> Subscription:
+        """
+        订阅页面数据
+
+        Args:
+            page: 页面名称
+            query_items: 查询参数（与对应数据接口一致）
+            last_event_id: 客户端重连时携带的 Last-Event-ID，与当前数据一致时不重复推送
+
+        Returns:
+            连接的订阅，消息流见 events
+
+        Raises:
+            ValueError: 页面或参数不合法
+        """
+        spec = self.pages.get(page)
+        if spec is None:
+            raise ValueError(f"不支持订阅的页面: {page}，可选页面: {', '.join(self.pages)}")
+        params = spec.normalize(query_items)
+
+        key = (page, params)
+        channel = self.channels.get(key)
+        if channel is None:
+            channel = self.channels[key] = Channel(page, params)
+        subscription = Subscription(channel)
+        channel.subscribers.add(subscription)
+        self.counters["connections_total"] += 1
+
+        try:
+            # 频道的第一个连接计算载荷；同时到达的其他连接等待后直接复用
+            await self._update(channel)
+        except Exception:
+            self.unsubscribe(subscription)
+            raise
+
+        if subscription.queue.empty() and channel.message is not None and last_event_id != channel.event_id:
+            self._send(subscription, channel.message)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """退订，频道没有连接后删除"""
+        channel = subscription.channel
+        channel.subscribers.discard(subscription)
+        if not channel.subscribers and self.channels.get((channel.page, channel.params)) is channel:
+            del self.channels[(channel.page, channel.params)]
+
+    async def events(self, subscription: Subscription) -> AsyncIterator[bytes]:
+        """连接的 SSE 消息流（连接断开时自动退订）"""
+        try:
+            yield f"retry: {settings.PUSH_HEARTBEAT_SECONDS * 1000}\n\n".encode()
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.PUSH_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    message = b": ping\n\n"
+                if message is None:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscription)
+
+    # ==================== 计算与广播 ====================
+
+    async def refresh(self) -> int:
+        """
+        重新计算 ETag 变化的频道并推送
+
+        Returns:
+            推送了新数据的频道数
+        """
+        pushed = 0
+        for channel in list(self.channels.values()):
+            try:
+                if await self._update(channel):
+                    pushed += 1
+            except Exception:
+                self.counters["errors"] += 1
+                logger.exception(f"推送数据计算失败: {channel.page} {dict(channel.params)}")
+        return pushed
+
+    async def _update(self, channel: Channel) -> bool:
+        """ETag 变化时重新计算频道载荷，内容变化时广播；返回是否广播"""
+        spec = self.pages[channel.page]
+        async with channel.lock:
+            etag = spec.etag(channel.params)
+            if etag == channel.etag:
+                return False
+
+            content = await self._compute(spec, channel.params)
+            body = dumps(content)
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            channel.etag = etag
+            if digest == channel.digest:
+                self.counters["unchanged"] += 1
+                return False
+
+            channel.digest = digest
+            channel.message = b"event: update\nid: " + channel.event_id.encode() + b"\ndata: " + body + b"\n\n"
+            for subscription in list(channel.subscribers):
+                self._send(subscription, channel.message)
+            self.counters["broadcasts"] += 1
+            return True
+
+    async def _compute(self, spec: PageSpec, params: Params) -> Any:
+        """使用独立会话计算载荷；同步函数在线程池中执行"""
+        kwargs = {name: list(value) if isinstance(value, tuple) else value for name, value in params}
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(spec.compute):
+                db = ReadSessionLocal()
+                try:
+                    return await spec.compute(db, kwargs)
+                finally:
+                    db.close()
+            return await run_in_threadpool(_compute_with_session, spec.compute, kwargs)
+        finally:
+            self.counters["computations"] += 1
+            self.counters["compute_seconds"] += time.perf_counter() - start
+
+    def _send(self, subscription: Subscription, message: bytes) -> None:
+        if subscription.offer(message):
+            self.counters["dropped"] += 1
+        self.counters["messages"] += 1
+
+    # ==================== 指标 ====================
+
+    def metrics(self) -> Dict[str, Any]:
+        """连接与扇出指标"""
+        counters = dict(self.counters)
+        computations = counters["computations"]
+        return {
+            "connections": sum(len(channel.subscribers) for channel in self.channels.values()),
+            "channels": len(self.channels),
+            **counters,
+            "compute_seconds": round(counters["compute_seconds"], 3),
+            # 每次计算平均送达的消息数
+            "fan_out": round(counters["messages"] / computations, 2) if computations else 0.0,
+            "channel_details": [
+                {
+                    "page": channel.page,
+                    "params": {name: list(value) if isinstance(value, tuple) else value
+                               for name, value in channel.params},
+                    "subscribers": len(channel.subscribers),
+                    "etag": channel.etag,
+                }
+                for channel in self.channels.values()
+            ],
+        }
+
+
+def _compute_with_session(compute: Callable[[Session, Dict[str, Any]], Any], params: Dict[str, Any]) -> Any:
+    db = ReadSessionLocal()
+    try:
+        return compute(db, params)
+    finally:
+        db.close()
+
+
+# 全局推送中心（每个进程一个，各自维护本进程的订阅连接）
+hub = PushHub()
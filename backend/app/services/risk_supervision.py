@@ -1,12 +1,310 @@
 """执法问题风险盯办服务"""
+from sqlalchemy import DateTime, Integer, and_, case, cast, func, literal, not_, or_, select
 from sqlalchemy.orm import Session
 from app.models.risk_supervision import RiskSupervision
+from app.models.risk_issue import RiskIssue
+from app.core.cache import DATA_VERSION, VersionedCache
+from app.core.database import ReadSessionLocal
+from app.services import search
 from app.services.display_rule import get_rules_by_page, apply_color_rules
-from app.utils.timezone import calc_days_remaining
-import json
+from app.utils.facets import rollup_facets
+from app.utils.fields import parse_fields
+from app.utils.pagination import encode_cursor, keyset_condition
+from app.utils.timezone import now_cst
+from datetime import datetime, timedelta
+from bisect import bisect_right
+import math
 from typing import List, Dict, Any, Tuple, Optional
 
 
+# 总数缓存（按筛选条件，导入后失效）
+_total_cache = VersionedCache(DATA_VERSION, name="risk_total")
+
+# 分面分组计数缓存（导入后失效）
+_facet_cache = VersionedCache(DATA_VERSION, name="risk_facets")
+
+# 风险问题频次缓存（按筛选条件，导入后失效）
+_issue_stats_cache = VersionedCache(DATA_VERSION, name="risk_issue_stats")
+
+# 整改期限在一天内的时刻缓存（导入后失效）
+_deadline_times_cache = VersionedCache(DATA_VERSION, name="risk_deadline_times")
+
+# 分面列（与列表筛选参数同名）
+FACET_COLUMNS = {
+    'officer_name': RiskSupervision.officer_name,
+    'case_type': RiskSupervision.case_type,
+    'problem_type': RiskSupervision.problem_type
+}
+
+# 列表可返回的字段（默认顺序）
+LIST_FIELDS = (
+    "id", "case_number", "case_name", "case_time", "case_type", "problem_type",
+    "specific_content", "deadline", "officer_name", "days_remaining"
+)
+
+# 排序字段映射（days_remaining 按整改期限排序）
+SORT_MAP = {
+    'case_number': RiskSupervision.case_number,
+    'case_time': RiskSupervision.case_time,
+    'deadline': RiskSupervision.deadline,
+    'days_remaining': RiskSupervision.deadline
+}
+
+
+# 紧急程度分档：固定的“已超期”在前、“其他”兜底，中间按剩余天数颜色规则的条件依次生成
+URGENCY_OVERDUE = "overdue"
+URGENCY_NORMAL = "normal"
+URGENCY_OPERATORS = {"<": "lt", "<=": "le", ">": "gt", ">=": "ge", "==": "eq", "eq": "eq"}
+
+# 风险问题筛选的分页查询：涉及案件占比不低于该值时，按排序索引顺序逐行检查（取满一页即停），
+# 否则先取出命中的案件再排序（占比很低时逐行检查几乎要扫描整个索引）
+ISSUE_SCAN_MIN_SHARE = 0.01
+
+
+def current_time() -> datetime:
+    """当前中国标准时间（去掉时区与微秒，与库中整改期限的存储格式一致）"""
+    return now_cst().replace(tzinfo=None, microsecond=0)
+
+
+def days_remaining_expr(now: datetime):
+    """
+    剩余天数 SQL 表达式：julianday 差值换算为秒后向上取整到天，负数表示已超期
+
+    与按整改期限排序单调一致，先换算为整数秒再做整除，避免浮点误差。
+    """
+    seconds = cast(
+        func.round((func.julianday(RiskSupervision.deadline) - func.julianday(literal(now, DateTime))) * 86400),
+        Integer
+    )
+    # SQLite 整数除法向零截断：正数补 86399 即为向上取整，非正数截断即为向上取整
+    return case((seconds > 0, (seconds + 86399) // 86400), else_=seconds // 86400)
+
+
+def get_deadline_times(db: Session) -> List[int]:
+    """获取整改期限出现过的一天内时刻（秒，升序），与 days_remaining_expr 一样按秒取整"""
+    day_start = func.julianday(func.date(RiskSupervision.deadline))
+    seconds = cast(func.round((func.julianday(RiskSupervision.deadline) - day_start) * 86400), Integer) % 86400
+    stmt = select(seconds).where(RiskSupervision.deadline.isnot(None)).distinct()
+    return sorted(db.execute(stmt).scalars())
+
+
+def time_epoch() -> str:
+    """
+    剩余天数的时间纪元（用于列表 ETag）
+
+    剩余天数只在当前时刻跨过某个整改期限的时刻（一天内）时变化，
+    纪元取“日期 + 当天已跨过的期限时刻数”，期限多为零点时即为日期。
+
+    Returns:
+        纪元字符串，剩余天数与分档不变时保持不变
+    """
+    def compute():
+        db = ReadSessionLocal()
+        try:
+            return get_deadline_times(db)
+        finally:
+            db.close()
+
+    times = _deadline_times_cache.get_or_compute("times", compute)
+    now = current_time()
+    passed = bisect_right(times, now.hour * 3600 + now.minute * 60 + now.second)
+    return f"{now.date().isoformat()}/{passed}"
+
+
+def _days_interval(operator: str, value: Any) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """将剩余天数条件转换为整数闭区间 (lo, hi)，None 表示无界；不支持的条件返回 None"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if operator == "<":
+        return None, math.ceil(value) - 1
+    if operator == "<=":
+        return None, math.floor(value)
+    if operator == ">":
+        return math.floor(value) + 1, None
+    if operator == ">=":
+        return math.ceil(value), None
+    if operator in ("==", "eq") and float(value).is_integer():
+        return int(value), int(value)
+    return None
+
+
+def _deadline_range(interval: Tuple[Optional[int], Optional[int]], now: datetime):
+    """
+    剩余天数区间对应的整改期限范围条件（可直接走 deadline 索引）
+
+    剩余天数 d = ceil(秒差 / 86400)，d <= k 等价于 deadline <= now + k 天，
+    d >= k 等价于 deadline > now + (k - 1) 天。
+    """
+    lo, hi = interval
+    conditions = []
+    if lo is not None:
+        conditions.append(RiskSupervision.deadline > now + timedelta(days=lo - 1))
+    if hi is not None:
+        conditions.append(RiskSupervision.deadline <= now + timedelta(days=hi))
+    return and_(*conditions)
+
+
+def get_urgency_buckets(db: Session) -> List[Dict[str, Any]]:
+    """
+    获取紧急程度分档定义（按剩余天数颜色规则生成，命中第一个满足的分档）
+
+    Returns:
+        [{"key", "label", "font_color", "interval"}, ...]，最后一档“其他”的 interval 为 None
+    """
+    buckets = [{"key": URGENCY_OVERDUE, "label": "已超期", "font_color": None, "interval": (None, -1)}]
+
+    for rule in get_rules_by_page(db, "risk_supervision"):
+        config = rule["rule_config"]
+        if rule["rule_type"] != "color" or config.get("field") != "days_remaining":
+            continue
+        for condition in config.get("conditions", []):
+            operator = condition.get("operator")
+            value = condition.get("value")
+            interval = _days_interval(operator, value)
+            if interval is None:
+                continue
+            key = f"{URGENCY_OPERATORS[operator]}_{value}"
+            if any(bucket["key"] == key for bucket in buckets):
+                continue
+            buckets.append({
+                "key": key,
+                "label": f"剩余{'=' if operator == 'eq' else operator}{value}天",
+                "font_color": condition.get("font_color"),
+                "interval": interval
+            })
+        break  # 只取优先级最高的一条剩余天数规则，与前端着色一致
+
+    buckets.append({"key": URGENCY_NORMAL, "label": "其他", "font_color": None, "interval": None})
+    return buckets
+
+
+def urgency_expr(buckets: List[Dict[str, Any]], now: datetime):
+    """紧急程度分档 SQL 表达式（CASE 按分档顺序命中第一个）"""
+    whens = [
+        (_deadline_range(bucket["interval"], now), bucket["key"])
+        for bucket in buckets if bucket["interval"] is not None
+    ]
+    return case(*whens, else_=URGENCY_NORMAL)
+
+
+def urgency_filter(buckets: List[Dict[str, Any]], keys: List[str], now: datetime):
+    """
+    紧急程度分档筛选条件
+
+    Raises:
+        ValueError: 分档不存在
+    """
+    known = {bucket["key"] for bucket in buckets}
+    unknown = [key for key in keys if key not in known]
+    if unknown:
+        raise ValueError(f"未知的紧急程度分档: {', '.join(unknown)}")
+
+    conditions = []
+    earlier = []
+    for bucket in buckets:
+        if bucket["interval"] is None:
+            # “其他”：不属于任何前序分档
+            if bucket["key"] in keys:
+                conditions.append(not_(or_(*earlier)) if earlier else literal(True))
+            continue
+        current = _deadline_range(bucket["interval"], now)
+        if bucket["key"] in keys:
+            conditions.append(and_(current, *[not_(condition) for condition in earlier]))
+        earlier.append(current)
+    return or_(*conditions)
+
+
+def build_filters(
+    case_type: Optional[str] = None,
+    problem_type: Optional[str] = None,
+    officer_name: Optional[str] = None,
+    issue: Optional[str] = None
+) -> List[Any]:
+    """
+    构建列表筛选条件（列表与导出共用）
+
+    Returns:
+        SQLAlchemy 条件表达式列表
+    """
+    filters = []
+    if case_type:
+        filters.append(RiskSupervision.case_type == case_type)
+    if problem_type:
+        filters.append(RiskSupervision.problem_type == problem_type)
+    if officer_name:
+        filters.append(RiskSupervision.officer_name == officer_name)
+    if issue:
+        # 走风险明细 (issue, risk_id) 覆盖索引
+        filters.append(RiskSupervision.id.in_(
+            select(RiskIssue.risk_id).where(RiskIssue.issue == issue)
+        ))
+    return filters
+
+
+def issue_exists(issue: str):
+    """风险问题筛选（关联子查询：外层按排序索引扫描，逐行在 (issue, risk_id) 索引上检查）"""
+    return select(RiskIssue.risk_id).where(
+        RiskIssue.issue == issue, RiskIssue.risk_id == RiskSupervision.id
+    ).exists()
+
+
+def _issue_share(db: Session, issue: str) -> float:
+    """风险问题涉及的案件占全部案件的比例（导入后失效）"""
+    def compute():
+        total = db.query(func.count()).select_from(RiskSupervision).scalar()
+        if not total:
+            return {}
+        rows = db.query(RiskIssue.issue, func.count(RiskIssue.risk_id)).group_by(RiskIssue.issue).all()
+        return {issue: count / total for issue, count in rows}
+
+    return _issue_stats_cache.get_or_compute("shares", compute).get(issue, 0.0)
+
+
+def get_issues_by_risk_ids(db: Session, risk_ids: List[int]) -> Dict[int, List[str]]:
+    """批量读取案件的风险问题（保持导入时的顺序）"""
+    issues: Dict[int, List[str]] = {risk_id: [] for risk_id in risk_ids}
+    if not risk_ids:
+        return issues
+    rows = (
+        db.query(RiskIssue.risk_id, RiskIssue.issue)
+        .filter(RiskIssue.risk_id.in_(risk_ids))
+        .order_by(RiskIssue.risk_id, RiskIssue.position)
+        .all()
+    )
+    for risk_id, issue in rows:
+        issues[risk_id].append(issue)
+    return issues
+
+
+def get_sort_column(sort_field: str):
+    """获取排序列"""
+    return SORT_MAP.get(sort_field, RiskSupervision.deadline)
+
+
+def get_sort_clause(sort_field: str, sort_order: str) -> Tuple[Any, Any]:
+    """获取排序表达式（排序值相同时按 id 决胜，保证游标分页顺序稳定）"""
+    sort_column = get_sort_column(sort_field)
+    if sort_order == "desc":
+        return sort_column.desc(), RiskSupervision.id.desc()
+    return sort_column.asc(), RiskSupervision.id.asc()
+
+
+def list_columns(now: datetime) -> Dict[str, Any]:
+    """列表字段 -> 列表达式（specific_content 来自风险明细表，为 None）"""
+    return {
+        "id": RiskSupervision.id,
+        "case_number": RiskSupervision.case_number,
+        "case_name": RiskSupervision.case_name,
+        "case_time": RiskSupervision.case_time,
+        "case_type": RiskSupervision.case_type,
+        "problem_type": RiskSupervision.problem_type,
+        "specific_content": None,
+        "deadline": RiskSupervision.deadline,
+        "officer_name": RiskSupervision.officer_name,
+        "days_remaining": days_remaining_expr(now)
+    }
+
+
 def list_risk_supervision(
     db: Session,
     page: int = 1,
@@ -16,14 +314,20 @@ def list_risk_supervision(
     officer_name: Optional[str] = None,
     sort_field: str = "days_remaining",
     sort_order: str = "asc",
-    include_rules: bool = True
-) -> Tuple[List[Dict[str, Any]], int, List[Dict[str, Any]]]:
+    include_rules: bool = True,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    q: Optional[str] = None,
+    urgency: Optional[List[str]] = None,
+    issue: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[int], List[Dict[str, Any]], Optional[str]]:
     """
     获取执法问题风险盯办列表
 
     Args:
         db: 数据库会话
-        page: 页码
+        page: 页码（未传游标时使用 OFFSET 分页）
         page_size: 每页数量
         case_type: 案件类型筛选
         problem_type: 问题类型筛选
@@ -31,96 +335,261 @@ def list_risk_supervision(
         sort_field: 排序字段
         sort_order: 排序方向 (asc/desc)
         include_rules: 是否包含规则
+        cursor: 上一页返回的 next_cursor，传入后按 (排序列, id) 游标分页
+        include_total: 是否返回总数（按筛选条件缓存，导入后失效）
+        q: 全文检索关键词，传入后按相关度排序并返回高亮（highlights），使用页码分页；
+           命中超过 search.SEARCH_MAX_MATCHES 时只返回最新的这些命中（总数同样以此为上限）
+        urgency: 紧急程度分档筛选（分档 key 列表，见 get_urgency_buckets）
+        issue: 风险问题筛选
+        fields: 返回字段（逗号分隔，见 LIST_FIELDS），为空时返回全部字段
 
     Returns:
-        (items, total, rules)
+        (items, total, rules, next_cursor)
+
+    Raises:
+        ValueError: 游标无效、检索时传入游标、分档或字段不存在
     """
-    # 构建查询
-    query = db.query(RiskSupervision)
+    # 构建查询（剩余天数由 SQL 计算）
+    now = current_time()
+    fields = parse_fields(fields, LIST_FIELDS)
+    base_filters = build_filters(case_type, problem_type, officer_name)
+    if urgency:
+        base_filters.append(urgency_filter(get_urgency_buckets(db), urgency, now))
+    filters = base_filters + build_filters(issue=issue)
 
-    # 筛选条件
-    if case_type:
-        query = query.filter(RiskSupervision.case_type == case_type)
-    if problem_type:
-        query = query.filter(RiskSupervision.problem_type == problem_type)
-    if officer_name:
-        query = query.filter(RiskSupervision.officer_name == officer_name)
+    # 全文检索
+    q = q.strip() if q else None
+    matches = None
+    if q:
+        if cursor:
+            raise ValueError("关键词检索按相关度排序，不支持游标分页")
+        matches = search.match_subquery(
+            db, search.risk_supervision_fts, q, [RiskSupervision.case_name, RiskSupervision.risk_issues], RiskSupervision.id,
+            filters
+        )
+
+    def apply_filters(stmt, conditions=filters):
+        if matches is not None:
+            stmt = stmt.join(matches, matches.c.id == RiskSupervision.id)
+        return stmt.where(*conditions)
+
+    # 分页查询的风险问题筛选：常见问题改为关联子查询，沿排序索引取满一页即停，避免对全部命中行临时排序
+    page_filters = filters
+    if issue and matches is None and _issue_share(db, issue) >= ISSUE_SCAN_MIN_SHARE:
+        page_filters = base_filters + [issue_exists(issue)]
 
     # 查询总数
-    total = query.count()
-
-    # 排序
-    sort_map = {
-        'case_number': RiskSupervision.case_number,
-        'case_time': RiskSupervision.case_time,
-        'deadline': RiskSupervision.deadline,
-        'days_remaining': RiskSupervision.deadline
-    }
+    total = None
+    count_stmt = apply_filters(select(func.count()).select_from(RiskSupervision))
+    if include_total and urgency:
+        # 分档随时间推移变化，不缓存
+        total = db.execute(count_stmt).scalar()
+    elif include_total:
+        total = _total_cache.get_or_compute(
+            (case_type, problem_type, officer_name, issue, q),
+            lambda: db.execute(count_stmt).scalar()
+        )
 
-    sort_column = sort_map.get(sort_field, RiskSupervision.deadline)
+    # 列投影：请求的字段在前（结果行按位置直接组装为 dict），内部使用的列在后
+    columns = list_columns(now)
+    names = [name for name in fields if columns[name] is not None]
+    sort_column = get_sort_column(sort_field)
+    internal = [RiskSupervision.id, sort_column]
+    if q:
+        internal += [RiskSupervision.case_name, RiskSupervision.risk_issues]
+    stmt = apply_filters(select(*[columns[name].label(name) for name in names], *internal), page_filters)
 
-    if sort_order == "desc":
-        query = query.order_by(sort_column.desc())
+    # 排序（检索时按相关度）
+    if matches is not None:
+        stmt = stmt.order_by(matches.c.rank, RiskSupervision.id)
+    else:
+        stmt = stmt.order_by(*get_sort_clause(sort_field, sort_order))
+
+    # 分页：游标优先，多取一条判断是否还有下一页
+    if cursor:
+        stmt = stmt.where(keyset_condition(sort_column, RiskSupervision.id, cursor, sort_order))
     else:
-        query = query.order_by(sort_column.asc())
+        stmt = stmt.offset((page - 1) * page_size)
+    rows = db.execute(stmt.limit(page_size + 1)).all()
 
-    # 分页
-    offset = (page - 1) * page_size
-    items_db = query.offset(offset).limit(page_size).all()
+    n = len(names)
+    next_cursor = None
+    if len(rows) > page_size and matches is None:
+        last = rows[page_size - 1]
+        next_cursor = encode_cursor(last[n + 1], last[n])
+    rows = rows[:page_size]
 
     # 获取规则（不再在后端应用，由前端统一处理）
     rules = []
     if include_rules:
         rules = get_rules_by_page(db, "risk_supervision")
 
-    # 转换数据（返回纯数据，不应用样式）
-    items = []
-    for item in items_db:
-        # 解析 risk_issues JSON
-        try:
-            specific_content = json.loads(item.risk_issues)
-        except:
-            specific_content = [item.risk_issues]
+    # 组装数据（返回纯数据，不应用样式）
+    items = [dict(zip(names, row)) for row in rows]
 
-        # 计算剩余天数
-        days_remaining = calc_days_remaining(item.deadline)
+    if "specific_content" in fields:
+        issues_by_id = get_issues_by_risk_ids(db, [row[n] for row in rows])
+        for item, row in zip(items, rows):
+            item["specific_content"] = issues_by_id[row[n]]
 
-        # 构建数据项（纯数据，无样式）
-        item_data = {
-            "id": item.id,
-            "case_number": item.case_number,
-            "case_name": item.case_name,
-            "case_time": item.case_time,
-            "case_type": item.case_type,
-            "problem_type": item.problem_type,
-            "specific_content": specific_content,
-            "deadline": item.deadline,
-            "officer_name": item.officer_name,
-            "days_remaining": days_remaining
-        }
+    # 检索命中高亮（名称全文、问题内容取摘要）
+    if q:
+        for item, row in zip(items, rows):
+            item["highlights"] = {
+                "case_name": search.highlight(row[n + 2], q),
+                "risk_issues": search.highlight(row[n + 3], q, snippet=True)
+            }
 
-        items.append(item_data)
+    return items, total, rules, next_cursor
 
-    return items, total, rules
 
+def get_urgency_summary(
+    db: Session,
+    case_type: Optional[str] = None,
+    problem_type: Optional[str] = None,
+    officer_name: Optional[str] = None,
+    issue: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    按紧急程度分档统计数量（一次分组查询，只读取 deadline 索引）
 
-def get_officer_options(db: Session) -> List[str]:
-    """获取去重的警员列表"""
-    officers = (
-        db.query(RiskSupervision.officer_name)
-        .distinct()
-        .order_by(RiskSupervision.officer_name.asc())
+    Args:
+        db: 数据库会话
+        case_type: 案件类型筛选
+        problem_type: 问题类型筛选
+        officer_name: 责任民警筛选
+        issue: 风险问题筛选
+
+    Returns:
+        [{"key", "label", "font_color", "count"}, ...]，按分档顺序，数量为 0 的分档也返回
+    """
+    now = current_time()
+    buckets = get_urgency_buckets(db)
+    bucket = urgency_expr(buckets, now).label("bucket")
+    rows = (
+        db.query(bucket, func.count())
+        .filter(*build_filters(case_type, problem_type, officer_name, issue))
+        .group_by(bucket)
         .all()
     )
-    return [o[0] for o in officers]
+    counts = dict(rows)
+    return [
+        {"key": b["key"], "label": b["label"], "font_color": b["font_color"], "count": counts.get(b["key"], 0)}
+        for b in buckets
+    ]
+
+
+def get_issue_stats(
+    db: Session,
+    case_type: Optional[str] = None,
+    problem_type: Optional[str] = None,
+    officer_name: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    风险问题频次统计（SQL 分组计数，按筛选条件缓存，导入后失效）
+
+    Args:
+        db: 数据库会话
+        case_type: 案件类型筛选
+        problem_type: 问题类型筛选
+        officer_name: 责任民警筛选
+
+    Returns:
+        [{"issue": 风险问题, "count": 案件数}, ...]，按数量降序
+    """
+    def compute():
+        query = db.query(RiskIssue.issue, func.count(RiskIssue.risk_id).label("count"))
+        filters = build_filters(case_type, problem_type, officer_name)
+        if filters:
+            query = query.join(RiskSupervision, RiskSupervision.id == RiskIssue.risk_id).filter(*filters)
+        rows = (
+            query.group_by(RiskIssue.issue)
+            .order_by(func.count(RiskIssue.risk_id).desc(), RiskIssue.issue)
+            .all()
+        )
+        return [{"issue": issue, "count": count} for issue, count in rows]
+
+    return _issue_stats_cache.get_or_compute((case_type, problem_type, officer_name), compute)
+
+
+def _facet_combos(
+    db: Session,
+    q: Optional[str] = None,
+    issue: Optional[str] = None,
+    urgency: Optional[List[str]] = None
+) -> List[Tuple[Any, ...]]:
+    """
+    按全部分面列分组计数（一次扫描，导入后失效）
+
+    关键词、风险问题与紧急程度不是分面列，作为公共条件折入分组查询
+    （命中超过 search.SEARCH_MAX_MATCHES 时按最新的这些命中统计）。
+
+    Raises:
+        ValueError: 分档不存在
+    """
+    q = q.strip() if q else None
+    filters = build_filters(issue=issue)
+    if urgency:
+        filters.append(urgency_filter(get_urgency_buckets(db), urgency, current_time()))
+
+    def compute():
+        columns = list(FACET_COLUMNS.values())
+        stmt = select(*columns, func.count()).select_from(RiskSupervision)
+        if q:
+            matches = search.match_subquery(
+                db, search.risk_supervision_fts, q, [RiskSupervision.case_name, RiskSupervision.risk_issues], RiskSupervision.id,
+                filters
+            )
+            stmt = stmt.join(matches, matches.c.id == RiskSupervision.id)
+        rows = db.execute(stmt.where(*filters).group_by(*columns)).all()
+        return [tuple(row) for row in rows]
+
+    if urgency:
+        # 分档随时间推移变化，不缓存
+        return compute()
+    return _facet_cache.get_or_compute(("combos", issue, q), compute)
+
+
+def get_facets(
+    db: Session,
+    case_type: Optional[str] = None,
+    problem_type: Optional[str] = None,
+    officer_name: Optional[str] = None,
+    q: Optional[str] = None,
+    issue: Optional[str] = None,
+    urgency: Optional[List[str]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    获取筛选分面及各取值数量（在其他已选条件下统计）
+
+    Args:
+        db: 数据库会话
+        case_type: 案件类型筛选
+        problem_type: 问题类型筛选
+        officer_name: 责任民警筛选
+        q: 全文检索关键词（与列表一致，所有分面均按其统计）
+        issue: 风险问题筛选（所有分面均按其统计）
+        urgency: 紧急程度分档筛选（所有分面均按其统计）
+
+    Returns:
+        {分面名称: [{"value": 取值, "count": 数量}, ...]}
+
+    Raises:
+        ValueError: 分档不存在
+    """
+    selected = {
+        'officer_name': {officer_name} if officer_name else None,
+        'case_type': {case_type} if case_type else None,
+        'problem_type': {problem_type} if problem_type else None
+    }
+    return rollup_facets(_facet_combos(db, q, issue, urgency), list(FACET_COLUMNS), selected)
+
+
+def get_officer_options(db: Session) -> List[str]:
+    """获取去重的警员列表"""
+    return [option["value"] for option in get_facets(db)["officer_name"]]
 
 
 def get_case_type_options(db: Session) -> List[str]:
     """获取去重的案件类型列表"""
-    case_types = (
-        db.query(RiskSupervision.case_type)
-        .distinct()
-        .order_by(RiskSupervision.case_type.asc())
-        .all()
-    )
-    return [c[0] for c in case_types]
+    return [option["value"] for option in get_facets(db)["case_type"]]
@@ -0,0 +1,273 @@
+"""全文检索服务 - SQLite FTS5 + 中文二元分词
+
+FTS5 自带的 unicode61 分词器会把连续汉字当作一个词，无法按片段检索。
+这里在写入索引前把汉字串切成重叠的二元组（“盗窃案” -> “盗窃 窃案 案”），
+检索时把关键词同样切分后作为短语查询，即可匹配任意位置的中文片段。
+索引表只保存分词结果，高亮与摘要基于原文在 Python 中生成。
+"""
+from sqlalchemy import and_, column, literal, or_, select, table
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Any, Iterable, List, Optional, Sequence
+import html
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# 索引表定义：表名 -> (源表, 索引列, bm25 列权重)
+FTS_TABLES = {
+    "t_risk_supervision_fts": ("t_risk_supervision", ("case_name", "risk_issues"), (2.0, 1.0)),
+    "t_dispute_management_fts": ("t_dispute_management", ("event_name", "content"), (2.0, 1.0)),
+}
+
+# 供查询拼接的轻量表对象（rowid 即源表 id，rank 为 bm25 得分，越小越相关）
+risk_supervision_fts = table(
+    "t_risk_supervision_fts", column("rowid"), column("rank"), column("t_risk_supervision_fts")
+)
+dispute_management_fts = table(
+    "t_dispute_management_fts", column("rowid"), column("rank"), column("t_dispute_management_fts")
+)
+
+# 汉字（含扩展 A 区与兼容区）
+CJK_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+")
+
+# 每次检索最多返回的命中数：按 id 从新到旧取满上限即停，只对这些命中计算 bm25 排序。
+# 宽泛关键词（命中数万行）的排序开销因此有界；命中超过上限时列表、总数、导出都只包含最新的这些行
+SEARCH_MAX_MATCHES = 2000
+
+# 摘要前后保留的字符数
+SNIPPET_CONTEXT = 20
+
+# 单条语句绑定参数上限内的分块大小
+SYNC_CHUNK = 500
+
+_fts_available: Optional[bool] = None
+
+
+def tokenize(value: Optional[str]) -> str:
+    """
+    将文本切分为 FTS 索引用的词序列
+
+    汉字串输出重叠二元组并在末尾补上最后一个字（便于单字前缀检索），
+    其余字符原样保留，由 unicode61 按空白与标点切分。
+
+    Args:
+        value: 原文
+
+    Returns:
+        空格分隔的词序列
+    """
+    if not value:
+        return ""
+
+    def split_cjk(match: re.Match) -> str:
+        run = match.group(0)
+        tokens = [run[i:i + 2] for i in range(len(run) - 1)]
+        tokens.append(run[-1])
+        return f" {' '.join(tokens)} "
+
+    return CJK_PATTERN.sub(split_cjk, str(value)).strip()
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """
+    将用户关键词转换为 FTS5 MATCH 表达式
+
+    空白分隔的多个关键词之间为 AND；每个关键词切分后作为短语匹配，
+    单个汉字使用前缀匹配；混合关键词以单个汉字结尾时（如 A区），短语末词使用前缀匹配。
+
+    Args:
+        q: 用户输入
+
+    Returns:
+        MATCH 表达式，关键词为空时返回 None
+    """
+    terms = []
+    for term in q.split():
+        if len(term) == 1 and CJK_PATTERN.fullmatch(term):
+            terms.append(f'"{term}"*')
+            continue
+        tokens = tokenize(term).split()
+        prefix = False
+        if len(tokens) > 1 and CJK_PATTERN.fullmatch(tokens[-1]) and len(tokens[-1]) == 1:
+            if CJK_PATTERN.fullmatch(term):
+                # 去掉为单字检索补上的末字，避免短语末尾多出一个词
+                tokens = tokens[:-1]
+            else:
+                # 混合关键词的末字可能是单独的汉字（A区 -> A 区），保留并按前缀匹配
+                prefix = True
+        if tokens:
+            phrase = " ".join(tokens).replace('"', '""')
+            terms.append(f'"{phrase}"*' if prefix else f'"{phrase}"')
+    return " AND ".join(terms) if terms else None
+
+
+def highlight(value: Optional[str], q: str, snippet: bool = False) -> Optional[str]:
+    """
+    在原文中标记关键词（<mark>），可选截取命中位置附近的摘要
+
+    Args:
+        value: 原文
+        q: 用户关键词
+        snippet: 是否只返回命中位置附近的片段
+
+    Returns:
+        已转义并带 <mark> 标记的文本
+    """
+    if value is None:
+        return None
+    terms = [re.escape(term) for term in q.split() if term]
+    if not terms:
+        return html.escape(value)
+    pattern = re.compile("|".join(terms), re.IGNORECASE)
+
+    start, end = 0, len(value)
+    if snippet:
+        match = pattern.search(value)
+        if match:
+            start = max(0, match.start() - SNIPPET_CONTEXT)
+            end = min(len(value), match.end() + SNIPPET_CONTEXT)
+        else:
+            end = min(len(value), SNIPPET_CONTEXT * 2)
+
+    fragment = value[start:end]
+    parts = []
+    last = 0
+    for match in pattern.finditer(fragment):
+        parts.append(html.escape(fragment[last:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        last = match.end()
+    parts.append(html.escape(fragment[last:]))
+
+    result = "".join(parts)
+    if start > 0:
+        result = "…" + result
+    if end < len(value):
+        result = result + "…"
+    return result
+
+
+def is_available(conn: Connection) -> bool:
+    """当前 SQLite 是否编译了 FTS5"""
+    global _fts_available
+    if _fts_available is None:
+        try:
+            conn.exec_driver_sql("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            conn.exec_driver_sql("DROP TABLE temp.fts5_probe")
+            _fts_available = True
+        except Exception:
+            logger.warning("SQLite 未启用 FTS5，全文检索将回退为 LIKE 查询")
+            _fts_available = False
+    return _fts_available
+
+
+def create_fts_tables(conn: Connection) -> None:
+    """创建 FTS5 索引表并从源表全量构建"""
+    if not is_available(conn):
+        return
+    for fts_name, (source, columns, weights) in FTS_TABLES.items():
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name} "
+            f"USING fts5({', '.join(columns)}, tokenize='unicode61')"
+        )
+        conn.exec_driver_sql(
+            f"INSERT INTO {fts_name}({fts_name}, rank) VALUES ('rank', 'bm25({', '.join(map(str, weights))})')"
+        )
+        rebuild_fts(conn, fts_name)
+
+
+def rebuild_fts(conn: Connection, fts_name: str) -> None:
+    """全量重建指定索引表"""
+    source, columns, _ = FTS_TABLES[fts_name]
+    conn.exec_driver_sql(f"DELETE FROM {fts_name}")
+    rows = conn.exec_driver_sql(f"SELECT id, {', '.join(columns)} FROM {source}")
+    _insert_rows(conn, fts_name, columns, rows)
+
+
+def _insert_rows(conn, fts_name: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+    placeholders = ", ".join(["?"] * (len(columns) + 1))
+    sql = f"INSERT INTO {fts_name}(rowid, {', '.join(columns)}) VALUES ({placeholders})"
+    batch = []
+    for row in rows:
+        batch.append((row[0], *[tokenize(value) for value in row[1:]]))
+        if len(batch) >= SYNC_CHUNK:
+            conn.exec_driver_sql(sql, batch)
+            batch = []
+    if batch:
+        conn.exec_driver_sql(sql, batch)
+
+
+def sync_rows(db: Session, fts_name: str, ids: List[int]) -> None:
+    """
+    按 id 同步索引（导入写入新增或变更行后调用）
+
+    Args:
+        db: 数据库会话
+        fts_name: 索引表名
+        ids: 源表 id 列表
+    """
+    conn = db.connection()
+    if not ids or not is_available(conn):
+        return
+    source, columns, _ = FTS_TABLES[fts_name]
+    for i in range(0, len(ids), SYNC_CHUNK):
+        chunk = ids[i:i + SYNC_CHUNK]
+        placeholders = ", ".join(["?"] * len(chunk))
+        conn.exec_driver_sql(f"DELETE FROM {fts_name} WHERE rowid IN ({placeholders})", tuple(chunk))
+        rows = conn.exec_driver_sql(
+            f"SELECT id, {', '.join(columns)} FROM {source} WHERE id IN ({placeholders})", tuple(chunk)
+        ).fetchall()
+        _insert_rows(conn, fts_name, columns, rows)
+
+
+def match_subquery(
+    db: Session,
+    fts_table,
+    q: str,
+    fallback_columns: Sequence[Any],
+    id_column,
+    filters: Sequence[Any] = ()
+):
+    """
+    构建检索子查询：返回 (id, rank)
+
+    只取满足筛选条件的最新 SEARCH_MAX_MATCHES 条命中（FTS5 按 rowid 倒序输出，取满即停），
+    bm25 只对这些命中计算。FTS5 不可用时回退为 LIKE（rank 恒为 0）。
+
+    Args:
+        db: 数据库会话
+        fts_table: risk_supervision_fts / dispute_management_fts
+        q: 用户关键词
+        fallback_columns: 回退 LIKE 查询的源表列
+        id_column: 源表 id 列
+        filters: 源表上的其他筛选条件（在截取上限前应用）
+
+    Returns:
+        子查询（列 id、rank），关键词为空时返回 None
+    """
+    match = build_match_query(q)
+    if match is None:
+        return None
+
+    if is_available(db.connection()):
+        match_column = fts_table.c[fts_table.name]
+        stmt = select(
+            fts_table.c.rowid.label("id"),
+            fts_table.c.rank.label("rank")
+        ).where(match_column.op("MATCH")(match))
+        if filters:
+            stmt = stmt.join(id_column.table, id_column == fts_table.c.rowid).where(*filters)
+        return stmt.order_by(fts_table.c.rowid.desc()).limit(SEARCH_MAX_MATCHES).subquery()
+
+    conditions = [
+        or_(*[col.contains(term, autoescape=True) for col in fallback_columns])
+        for term in q.split()
+    ]
+    return (
+        select(id_column.label("id"), literal(0).label("rank"))
+        .where(and_(*conditions), *filters)
+        .order_by(id_column.desc())
+        .limit(SEARCH_MAX_MATCHES)
+        .subquery()
+    )
@@ -1,14 +1,28 @@
 """警情态势服务 - 简化版"""
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import DATA_VERSION, GEOCODING_VERSION, RULES_VERSION, get_version
+from app.core.database import ReadSessionLocal
+from app.core import tracing
+from app.core.singleflight import SingleFlight
 from app.models.police_alert import PoliceAlert
 from app.models.call_record import CallRecord
 from app.models.geocoding_cache import GeocodingCache
 from app.services import geocoding
-from app.services.display_rule import get_rules_by_page, apply_color_rules
+from app.services.display_rule import get_compiled_rules, get_rules_by_table, apply_color_rules_batch
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple
 
+# 并发的相同态势请求只计算一次
+_situation_flight = SingleFlight("situation")
+
+# 态势页面的表格（各自配置显示规则）
+SITUATION_TABLES = (
+    "policeClassification", "theftTraditional", "telecomFraud", "viceCases",
+    "disputeCases", "fightCases", "gamblingCases", "repeatAlarms",
+)
+
 
 def get_time_range(time_period: str = "month") -> Tuple[datetime, datetime, datetime, datetime]:
     """
@@ -64,6 +78,15 @@ def get_time_range(time_period: str = "month") -> Tuple[datetime, datetime, date
     return current_start, current_end, prev_start, yoy_start
 
 
+def time_epoch() -> str:
+    """
+    统计基准日期（用于态势数据 ETag）
+
+    各时间范围均按日期比较，日期变化前统计结果不变。
+    """
+    return datetime.now().date().isoformat()
+
+
 def calculate_ratio(current: int, previous: int) -> str:
     """
     计算同比/环比
@@ -85,6 +108,7 @@ def calculate_ratio(current: int, previous: int) -> str:
         return f"{ratio:.1f}%"
 
 
+@tracing.traced("situation.police_classification", args=("time_period",))
 def get_police_classification(db: Session, time_period: str = "month", apply_rules: bool = True) -> Tuple[List[List], List[Dict]]:
     """
     获取警情分类同环比分析
@@ -157,25 +181,18 @@ def get_police_classification(db: Session, time_period: str = "month", apply_rul
     # 应用显示规则
     row_styles = []
     if apply_rules:
-        rules = get_rules_by_page(db, "situation")
-        for row_index, row in enumerate(result):
-            item_data = {
-                "name": row[0],
-                "count": row[1],
-                "yoy": row[2],
-                "mom": row[3]
-            }
-            style = apply_color_rules(item_data, rules)
-            if style.get("font_color") or style.get("style_token"):
-                row_styles.append({
-                    "row_index": row_index,
-                    "font_color": style.get("font_color"),
-                    "style_token": style.get("style_token")
-                })
+        rules = get_compiled_rules(db, "situation")
+        row_styles = apply_color_rules_batch({
+            "name": [row[0] for row in result],
+            "count": [row[1] for row in result],
+            "yoy": [row[2] for row in result],
+            "mom": [row[3] for row in result]
+        }, rules)
 
     return result, row_styles
 
 
+@tracing.traced("situation.location_distribution", args=("alert_type", "time_period"))
 def get_location_distribution(
     db: Session,
     alert_type: str,
@@ -213,6 +230,7 @@ def get_location_distribution(
     return [[location, int(count)] for location, count in results]
 
 
+@tracing.traced("situation.repeat_alarms")
 def get_repeat_alarms(db: Session, limit: int = 5) -> List[List]:
     """
     获取重复报警统计（按地点统计）
@@ -287,13 +305,14 @@ def get_communities_with_stats(db: Session) -> List[Dict]:
     return result
 
 
-async def get_situation_data(
+@tracing.traced("situation.collect_tables", args=("time_period",))
+def collect_situation_tables(
     db: Session,
     time_period: str = "month",
     alert_types: List[str] = None
-) -> Dict[str, Any]:
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """
-    获取警情态势页面所有数据
+    查询态势页面的全部表格数据与地图标记（同步数据库查询，应在线程池中执行）
 
     Args:
         db: 数据库会话
@@ -301,7 +320,7 @@ async def get_situation_data(
         alert_types: 地图显示的警情类型列表，默认为 ['偷盗', '诈骗']
 
     Returns:
-        完整的态势数据（包含地图数据和每个表格的显示规则）
+        (不含 mapData 的态势数据, 地图标记行（未缓存坐标的地点 coords 为 None）)
     """
     # 警情分类总览（纯数据，不应用规则）
     police_classification, _ = get_police_classification(db, time_period, apply_rules=False)
@@ -317,24 +336,20 @@ async def get_situation_data(
     # 重复报警
     repeat_alarms = get_repeat_alarms(db)
 
-    # 地图数据（带经纬度）
+    # 地图标记（先取缓存坐标）
     if alert_types is None:
         alert_types = ['偷盗', '诈骗']
-    map_data = await get_map_data(db, alert_types, time_period)
+    map_rows = get_map_rows(db, alert_types, time_period)
 
-    # 为每个表格获取独立的显示规则
+    # 为每个表格获取独立的显示规则（一次读取页面内全部表格的规则）
+    with tracing.span("situation.display_rules"):
+        rules_by_table = get_rules_by_table(db, "situation")
     display_rules = {
-        "policeClassification": get_rules_by_page(db, "situation", "policeClassification"),
-        "theftTraditional": get_rules_by_page(db, "situation", "theftTraditional"),
-        "telecomFraud": get_rules_by_page(db, "situation", "telecomFraud"),
-        "viceCases": get_rules_by_page(db, "situation", "viceCases"),
-        "disputeCases": get_rules_by_page(db, "situation", "disputeCases"),
-        "fightCases": get_rules_by_page(db, "situation", "fightCases"),
-        "gamblingCases": get_rules_by_page(db, "situation", "gamblingCases"),
-        "repeatAlarms": get_rules_by_page(db, "situation", "repeatAlarms")
+        table_code: rules_by_table.get(table_code, [])
+        for table_code in SITUATION_TABLES
     }
 
-    return {
+    tables = {
         'policeClassification': police_classification,
         'theftTraditional': theft_traditional,
         'telecomFraud': telecom_fraud,
@@ -343,18 +358,78 @@ async def get_situation_data(
         'fightCases': fight_cases,
         'gamblingCases': gambling_cases,
         'repeatAlarms': repeat_alarms,
-        'mapData': map_data,
         'displayRules': display_rules
     }
+    return tables, map_rows
+
+
+@tracing.traced("situation.get_data", args=("time_period",))
+async def get_situation_data(
+    db: Session,
+    time_period: str = "month",
+    alert_types: List[str] = None
+) -> Dict[str, Any]:
+    """
+    获取警情态势页面所有数据
+
+    数据库查询全部在线程池中执行，事件循环上只保留地理编码接口的网络请求，
+    查询期间不阻塞其他请求。
+
+    Args:
+        db: 数据库会话
+        time_period: 时间维度 (week/month/year)
+        alert_types: 地图显示的警情类型列表，默认为 ['偷盗', '诈骗']
+
+    Returns:
+        完整的态势数据（包含地图数据和每个表格的显示规则）
+    """
+    tables, map_rows = await run_in_threadpool(collect_situation_tables, db, time_period, alert_types)
 
+    # 地图数据（带经纬度，未缓存的地点调用地理编码接口）
+    map_data = await resolve_map_rows(map_rows)
 
-async def get_map_data(
+    display_rules = tables.pop('displayRules')
+    return {**tables, 'mapData': map_data, 'displayRules': display_rules}
+
+
+async def get_situation_data_shared(time_period: str = "month", alert_types: List[str] = None) -> Dict[str, Any]:
+    """
+    获取警情态势页面所有数据（合并并发的相同请求）
+
+    参数相同（警情类型不计顺序与重复）、数据版本与统计基准日期相同的并发请求只计算一次，
+    结果由所有等待者共享（调用方不应修改）。计算使用独立的数据库会话。
+
+    Args:
+        time_period: 时间维度 (week/month/year)
+        alert_types: 地图显示的警情类型列表，默认为 ['偷盗', '诈骗']
+
+    Returns:
+        完整的态势数据，与 get_situation_data 相同
+    """
+    types_key = tuple(sorted(set(alert_types))) if alert_types is not None else None
+    key = (
+        time_period, types_key, time_epoch(),
+        get_version(DATA_VERSION), get_version(RULES_VERSION), get_version(GEOCODING_VERSION)
+    )
+
+    async def compute():
+        db = ReadSessionLocal()
+        try:
+            return await get_situation_data(db, time_period, alert_types)
+        finally:
+            db.close()
+
+    return await _situation_flight.do(key, compute)
+
+
+@tracing.traced("situation.map_rows", args=("time_period",))
+def get_map_rows(
     db: Session,
     alert_types: List[str],
     time_period: str = "month"
 ) -> List[Dict[str, Any]]:
     """
-    获取地图标记数据（带经纬度和缓存逻辑）
+    查询地图标记及缓存的经纬度（同步数据库查询）
 
     Args:
         db: 数据库会话
@@ -362,22 +437,10 @@ async def get_map_data(
         time_period: 时间维度
 
     Returns:
-        [
-            {
-                'location': '地点名称',
-                'alertType': '警情类型',
-                'count': 数量,
-                'lng': 经度,
-                'lat': 纬度
-            },
-            ...
-        ]
+        [{'location': 地点, 'alertType': 警情类型, 'count': 数量, 'coords': (经度, 纬度) 或 None}, ...]
     """
     current_start, current_end, _, _ = get_time_range(time_period)
 
-    # 天地图 API Key（写死 - 服务器端）
-    tianditu_key = "6244a8e0c7b2d0632b98bf5a2e4571c6"
-
     # 查询指定类型的警情数据
     results = db.query(
         PoliceAlert.location,
@@ -392,22 +455,46 @@ async def get_map_data(
         PoliceAlert.alert_type
     ).all()
 
-    # 处理每个地点，获取经纬度
+    # 先从缓存查询坐标
+    return [
+        {
+            'location': location,
+            'alertType': alert_type,
+            'count': int(count),
+            'coords': geocoding.get_coordinates(db, location)
+        }
+        for location, alert_type, count in results
+    ]
+
+
+@tracing.traced("situation.resolve_map_rows")
+async def resolve_map_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    补全未缓存坐标的地点并生成地图标记（地理编码接口的网络请求在事件循环上执行）
+
+    Args:
+        rows: get_map_rows 的结果
+
+    Returns:
+        [{'location', 'alertType', 'count', 'lng', 'lat'}, ...]，无法获取坐标的地点不返回
+    """
+    # 天地图 API Key（写死 - 服务器端）
+    tianditu_key = "6244a8e0c7b2d0632b98bf5a2e4571c6"
+
     map_data = []
-    for location, alert_type, count in results:
-        # 先从缓存查询
-        coords = geocoding.get_coordinates(db, location)
+    for row in rows:
+        coords = row['coords']
 
         # 如果缓存中没有，调用天地图 API
         if not coords and tianditu_key:
-            coords = await geocoding.get_coordinates_with_api(db, location, tianditu_key)
+            coords = await geocoding.geocode_and_cache(row['location'], tianditu_key)
 
         # 如果有坐标，添加到结果中
         if coords:
             map_data.append({
-                'location': location,
-                'alertType': alert_type,
-                'count': int(count),
+                'location': row['location'],
+                'alertType': row['alertType'],
+                'count': row['count'],
                 'lng': float(coords[0]),
                 'lat': float(coords[1])
             })
@@ -0,0 +1,249 @@
+"""分块上传服务 - 落盘暂存、断点续传、校验和验证"""
+from app.core.config import settings
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+import weakref
+
+# 上传 ID 仅允许 uuid4 十六进制，避免路径穿越
+UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# 计算校验和时的读取块大小
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# 各上传会话的写入锁（同一会话的分块串行写入，无人持有时自动释放）
+_chunk_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+class UploadError(Exception):
+    """上传错误（携带 HTTP 状态码）"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _upload_dir() -> str:
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    return settings.UPLOAD_DIR
+
+
+def _meta_path(upload_id: str) -> str:
+    return os.path.join(_upload_dir(), f"{upload_id}.json")
+
+
+def data_path(upload_id: str) -> str:
+    """获取上传暂存文件路径"""
+    return os.path.join(_upload_dir(), f"{upload_id}.part")
+
+
+def _write_meta(meta: Dict[str, Any]) -> None:
+    # 先写临时文件再替换，避免中断时留下半截元数据
+    path = _meta_path(meta["upload_id"])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _received_bytes(upload_id: str) -> int:
+    path = data_path(upload_id)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def create_upload(filename: str, total_size: int, checksum: str) -> Dict[str, Any]:
+    """
+    创建上传会话
+
+    Args:
+        filename: 原始文件名
+        total_size: 文件总字节数
+        checksum: 文件 sha256（十六进制）
+
+    Returns:
+        上传状态
+    """
+    if not filename.endswith(('.xlsx', '.xls')):
+        raise UploadError(400, "只支持 Excel 文件")
+    if total_size <= 0:
+        raise UploadError(400, "文件大小无效")
+    if total_size > settings.UPLOAD_MAX_TOTAL_SIZE:
+        raise UploadError(413, f"文件超过大小限制 {settings.UPLOAD_MAX_TOTAL_SIZE} 字节")
+    if not re.fullmatch(r"[0-9a-fA-F]{64}", checksum or ""):
+        raise UploadError(400, "checksum 必须为 sha256 十六进制字符串")
+
+    upload_id = uuid.uuid4().hex
+    meta = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "total_size": total_size,
+        "checksum": checksum.lower(),
+        "created_at": datetime.now().isoformat()
+    }
+    _write_meta(meta)
+    # 创建空的暂存文件
+    open(data_path(upload_id), "wb").close()
+
+    return get_upload_status(upload_id)
+
+
+def get_upload(upload_id: str) -> Dict[str, Any]:
+    """
+    读取上传会话元数据
+
+    Raises:
+        UploadError: 上传会话不存在
+    """
+    if not UPLOAD_ID_PATTERN.match(upload_id or ""):
+        raise UploadError(404, "上传会话不存在")
+    path = _meta_path(upload_id)
+    if not os.path.exists(path):
+        raise UploadError(404, "上传会话不存在")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_upload_status(upload_id: str) -> Dict[str, Any]:
+    """
+    获取上传进度（客户端断线后据此从 received 处续传）
+
+    Returns:
+        {upload_id, filename, total_size, received, chunk_size, completed}
+    """
+    meta = get_upload(upload_id)
+    received = _received_bytes(upload_id)
+    return {
+        "upload_id": upload_id,
+        "filename": meta["filename"],
+        "total_size": meta["total_size"],
+        "received": received,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+        "completed": received == meta["total_size"]
+    }
+
+
+async def write_chunk(upload_id: str, offset: int, stream: AsyncIterator[bytes]) -> Dict[str, Any]:
+    """
+    写入一个分块，边接收边检查大小限制
+
+    分块先完整接收到内存（不超过 UPLOAD_CHUNK_SIZE），再在会话写入锁内确认偏移并写入文件，
+    接收中断或超限时暂存文件不受影响。客户端重试与原请求并发写入同一偏移时，
+    后写入的请求确认偏移不匹配返回 409，已确认的数据不会被覆盖或截断。
+
+    Args:
+        upload_id: 上传会话 ID
+        offset: 分块在文件中的起始偏移，必须等于已接收字节数
+        stream: 请求体字节流
+
+    Returns:
+        上传进度
+    """
+    meta = await run_in_threadpool(get_upload, upload_id)
+    received = await run_in_threadpool(_received_bytes, upload_id)
+    if offset != received:
+        raise UploadError(409, f"偏移量不匹配，应从 {received} 处续传")
+
+    limit = min(meta["total_size"] - offset, settings.UPLOAD_CHUNK_SIZE)
+    chunk = bytearray()
+    async for data in stream:
+        if len(chunk) + len(data) > limit:
+            raise UploadError(413, "分块超过剩余文件大小或分块大小限制")
+        chunk += data
+
+    lock = _chunk_locks.get(upload_id)
+    if lock is None:
+        lock = _chunk_locks[upload_id] = asyncio.Lock()
+    async with lock:
+        await run_in_threadpool(_write_at, upload_id, offset, bytes(chunk))
+
+    return await run_in_threadpool(get_upload_status, upload_id)
+
+
+def _write_at(upload_id: str, offset: int, chunk: bytes) -> None:
+    """确认已接收字节数等于偏移后写入分块（在线程池中执行）"""
+    path = data_path(upload_id)
+    if not os.path.exists(path):
+        raise UploadError(404, "上传会话不存在")
+    with open(path, "r+b") as f:
+        received = f.seek(0, os.SEEK_END)
+        if received != offset:
+            raise UploadError(409, f"偏移量不匹配，应从 {received} 处续传")
+        try:
+            f.write(chunk)
+            f.flush()
+        except BaseException:
+            # 写入失败时丢弃本次分块，保证续传偏移与已确认数据一致
+            f.truncate(offset)
+            raise
+
+
+def verify_upload(upload_id: str) -> str:
+    """
+    校验上传文件的完整性
+
+    Returns:
+        暂存文件路径
+
+    Raises:
+        UploadError: 文件未传完或校验和不一致
+    """
+    meta = get_upload(upload_id)
+    path = data_path(upload_id)
+    received = _received_bytes(upload_id)
+    if received != meta["total_size"]:
+        raise UploadError(409, f"文件未上传完成：{received}/{meta['total_size']}")
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    if digest.hexdigest() != meta["checksum"]:
+        raise UploadError(422, "文件校验和不一致，请重新上传")
+
+    return path
+
+
+def cleanup_stale_uploads(max_age_hours: float) -> int:
+    """
+    清理长时间未更新的上传会话（客户端放弃的续传会话，启动时调用）
+
+    Args:
+        max_age_hours: 会话最后一次写入距今超过该小时数时删除
+
+    Returns:
+        删除的会话数
+    """
+    directory = settings.UPLOAD_DIR
+    if not os.path.isdir(directory):
+        return 0
+    deadline = time.time() - max_age_hours * 3600
+    removed = set()
+    for name in os.listdir(directory):
+        upload_id = name.split(".", 1)[0]
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            # 暂存文件与元数据（含写入中断留下的 .tmp）都以最后修改时间判断
+            if os.path.getmtime(path) < deadline:
+                os.remove(path)
+                removed.add(upload_id)
+        except OSError:
+            continue
+    return len(removed)
+
+
+def delete_upload(upload_id: Optional[str]) -> None:
+    """删除上传会话及暂存文件"""
+    get_upload(upload_id)
+    for path in (data_path(upload_id), _meta_path(upload_id)):
+        if os.path.exists(path):
+            os.remove(path)
@@ -1,4 +1,7 @@
 """共享常量定义"""
+import json
+import re
+from typing import List
 
 # ==================== 执法问题盯办 ====================
 
@@ -46,6 +49,9 @@ DISPUTE_STATUS_OPTIONS = ["待化解", "待关注", "调解中", "已调解"]
 
 # ==================== 工具函数 ====================
 
+# 风险问题分隔符（样例数据以逗号拼接，兼容中文逗号、顿号、分号）
+RISK_ISSUE_SEPARATORS = re.compile(r"[,，、;；\n]")
+
 def normalize_problem_type(value) -> tuple[str, bool]:
     """
     标准化问题类型值
@@ -61,3 +67,35 @@ def normalize_problem_type(value) -> tuple[str, bool]:
         return normalized, False
 
     return PROBLEM_TYPE_DEFAULT, True
+
+
+def parse_risk_issues(value) -> List[str]:
+    """
+    解析风险问题字段：JSON 数组或分隔符拼接的字符串
+
+    Returns:
+        去除空白与重复后的风险问题列表（保持原顺序）
+    """
+    if value is None:
+        return []
+    text = str(value).strip()
+    if not text:
+        return []
+
+    items = None
+    if text.startswith("["):
+        try:
+            parsed = json.loads(text)
+            if isinstance(parsed, list):
+                items = [str(item) for item in parsed if item is not None]
+        except ValueError:
+            pass
+    if items is None:
+        items = RISK_ISSUE_SEPARATORS.split(text)
+
+    result = []
+    for item in items:
+        item = item.strip()
+        if item and item not in result:
+            result.append(item)
+    return result
@@ -0,0 +1,46 @@
+"""分面统计工具函数"""
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+
+def rollup_facets(
+    combos: Sequence[Tuple[Any, ...]],
+    facet_names: Sequence[str],
+    selected: Dict[str, Optional[Collection[Any]]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    由分组计数结果汇总各分面的取值与数量
+
+    combos 为一次 GROUP BY 全部分面列得到的 (分面值..., 数量) 行，
+    每个分面的数量按“除自身外的其他已选条件”统计，便于在已筛选状态下切换取值。
+
+    Args:
+        combos: 分组计数行，列顺序与 facet_names 一致，最后一列为数量
+        facet_names: 分面名称
+        selected: 分面名称 -> 允许的取值集合（None 表示未筛选）
+
+    Returns:
+        {分面名称: [{"value": 取值, "count": 数量}, ...]}，取值升序，
+        当前条件下数量为 0 的取值也会返回
+    """
+    counts: Dict[str, Dict[Any, int]] = {name: {} for name in facet_names}
+
+    for row in combos:
+        values, count = row[:-1], row[-1]
+        # 不满足的条件位置：全部满足计入所有分面，只有一个不满足仅计入该分面
+        misses = [
+            i for i, name in enumerate(facet_names)
+            if selected.get(name) is not None and values[i] not in selected[name]
+        ]
+        for i, name in enumerate(facet_names):
+            bucket = counts[name]
+            bucket.setdefault(values[i], 0)
+            if not misses or misses == [i]:
+                bucket[values[i]] += count
+
+    return {
+        name: [
+            {"value": value, "count": count}
+            for value, count in sorted(counts[name].items(), key=lambda item: (item[0] is None, item[0] or ""))
+        ]
+        for name in facet_names
+    }
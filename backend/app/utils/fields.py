@@ -0,0 +1,33 @@
+"""列表字段投影工具函数"""
+from typing import List, Optional, Sequence
+
+
+def parse_fields(fields: Optional[str], available: Sequence[str]) -> List[str]:
+    """
+    解析稀疏字段参数（逗号分隔）
+
+    Args:
+        fields: 请求的字段，如 "id,case_name,deadline"；为空时返回全部字段
+        available: 可选字段（默认顺序）
+
+    Returns:
+        去重后的字段列表（按请求顺序）
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if not fields:
+        return list(available)
+
+    result = []
+    for name in fields.split(","):
+        name = name.strip()
+        if name and name not in result:
+            result.append(name)
+
+    unknown = [name for name in result if name not in available]
+    if unknown:
+        raise ValueError(f"未知的字段: {', '.join(unknown)}，可选字段: {', '.join(available)}")
+    if not result:
+        return list(available)
+    return result
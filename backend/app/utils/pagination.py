@@ -0,0 +1,68 @@
+"""游标（keyset）分页工具函数"""
+from sqlalchemy import DateTime, literal, tuple_
+from datetime import datetime
+from typing import Any, Tuple
+import base64
+import json
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """
+    编码分页游标
+
+    Args:
+        sort_value: 当前页最后一行的排序字段值
+        row_id: 当前页最后一行的 id
+
+    Returns:
+        URL 安全的游标字符串
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column) -> Tuple[Any, int]:
+    """
+    解码分页游标
+
+    Args:
+        cursor: 游标字符串
+        sort_column: 排序列（用于还原值类型）
+
+    Returns:
+        (sort_value, row_id)
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if isinstance(sort_column.type, DateTime):
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+
+def keyset_condition(sort_column, id_column, cursor: str, sort_order: str):
+    """
+    构建“位于游标之后”的条件：(sort_column, id) 行值比较，可直接走 (sort_column, id) 索引
+
+    Args:
+        sort_column: 排序列
+        id_column: 主键列（排序值相同时的决胜列）
+        cursor: 游标字符串
+        sort_order: 排序方向 (asc/desc)
+
+    Returns:
+        SQLAlchemy 条件表达式
+    """
+    sort_value, row_id = decode_cursor(cursor, sort_column)
+    key = tuple_(sort_column, id_column)
+    bound = tuple_(literal(sort_value, sort_column.type), literal(row_id, id_column.type))
+    if sort_order == "desc":
+        return key < bound
+    return key > bound
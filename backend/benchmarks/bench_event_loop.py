@@ -0,0 +1,138 @@
+"""事件循环阻塞基准：/situation 负载下其他接口的尾延迟
+
+在同一个事件循环中运行应用（与单进程 uvicorn 一致），若干并发任务持续请求 /situation，
+同时按固定间隔探测 /api/health 与纠纷列表，统计探测请求的延迟分位数。
+
+对比两种模式：
+- threadpool：当前实现，态势数据库查询在线程池中执行
+- inline：模拟改造前，态势数据库查询直接在事件循环上执行
+
+在临时数据库中用 generate_synthetic_data 生成合成数据（坐标缓存预先填充，不调用地理编码接口）。
+各并发任务使用不同的参数组合，避免被并发请求合并掩盖。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_event_loop.py
+    python benchmarks/bench_event_loop.py --alerts 300000 --concurrency 8 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PERIODS = ["week", "month", "year"]
+TYPE_COMBOS = ["偷盗,诈骗", "偷盗", "诈骗", "纠纷", "偷盗,纠纷", "诈骗,纠纷", "偷盗,诈骗,纠纷", "涉黄,涉赌"]
+PROBES = [
+    ("/api/health", "健康检查"),
+    ("/api/v1/data/dispute-management?page_size=20&include_total=false", "纠纷列表"),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="事件循环阻塞基准")
+    parser.add_argument("--alerts", type=int, default=150000, help="合成警情抽样条数（合并后行数略少）")
+    parser.add_argument("--locations", type=int, default=400, help="地点数量")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发请求 /situation 的任务数")
+    parser.add_argument("--duration", type=float, default=8.0, help="每种模式的持续时间（秒）")
+    parser.add_argument("--interval", type=float, default=0.01, help="探测请求间隔（秒）")
+    return parser.parse_args()
+
+
+def seed(engine, alerts: int, locations: int):
+    """生成两年的合成警情、重复报警、盯办、纠纷与坐标缓存，返回警情行数"""
+    from generate_synthetic_data import SyntheticDataset, load_sqlite
+
+    dataset = SyntheticDataset(seed=7, years=2, alerts=alerts, locations=locations)
+    return load_sqlite(engine, dataset)["police_alert"]
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run_mode(app, duration: float, concurrency: int, interval: float):
+    """运行一种模式，返回 (各探测接口延迟毫秒列表, 态势请求完成数)"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    latencies = {path: [] for path, _ in PROBES}
+    completed = 0
+    stop = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def load(worker: int):
+            nonlocal completed
+            params = {
+                "time_period": PERIODS[worker % len(PERIODS)],
+                "alert_types": TYPE_COMBOS[worker % len(TYPE_COMBOS)],
+            }
+            while time.perf_counter() < stop:
+                response = await client.get("/api/v1/data/situation", params=params)
+                response.raise_for_status()
+                completed += 1
+
+        async def probe(path: str):
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies[path].append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(interval)
+
+        await asyncio.gather(
+            *(load(i) for i in range(concurrency)),
+            *(probe(path) for path, _ in PROBES)
+        )
+    return latencies, completed
+
+
+def main():
+    args = parse_args()
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["DEBUG"] = "False"
+
+    from app.core.database import engine
+    from app.core.init_db import init_database
+    from app.services import situation
+    import main as app_main
+
+    init_database()
+    rows = seed(engine, args.alerts, args.locations)
+    print(f"合成警情 {rows:,} 行，地点 {args.locations} 个；并发 {args.concurrency}，每种模式 {args.duration:.0f} 秒")
+
+    async def inline(func, *args, **kwargs):
+        # 模拟改造前：同步查询直接在事件循环上执行
+        return func(*args, **kwargs)
+
+    threadpool = situation.run_in_threadpool
+    modes = [
+        ("空载", 0, threadpool),
+        ("inline", args.concurrency, inline),
+        ("threadpool", args.concurrency, threadpool),
+    ]
+
+    print(f"{'模式':<12}{'探测接口':<10}{'次数':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'态势 次/秒':>12}")
+    for name, concurrency, runner in modes:
+        situation.run_in_threadpool = runner
+        try:
+            latencies, completed = asyncio.run(run_mode(app_main.app, args.duration, concurrency, args.interval))
+        finally:
+            situation.run_in_threadpool = threadpool
+        for probe_path, label in PROBES:
+            values = latencies[probe_path]
+            print(
+                f"{name:<12}{label:<10}{len(values):>6}{statistics.median(values):>9.1f}"
+                f"{percentile(values, 0.95):>9.1f}{percentile(values, 0.99):>9.1f}{max(values):>9.1f}"
+                f"{completed / args.duration:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""列表接口行投影微基准
+
+对比改造前的 ORM 实体加载（query(Model) 后逐字段复制为 dict）与
+当前的 Core 列投影（select 指定列、结果行直接组装为 dict），
+在不同每页数量下统计每秒处理的行数。
+
+默认在临时 SQLite 数据库中用 generate_synthetic_data 生成合成数据，也可通过 DATABASE_URL 指定已有数据库。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_list_projection.py
+    python benchmarks/bench_list_projection.py --rows 50000 --repeat 300
+    DATABASE_URL=sqlite:///./data.db python benchmarks/bench_list_projection.py --no-seed
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAGE_SIZES = [10, 20, 50, 100]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="列表接口行投影微基准")
+    parser.add_argument("--rows", type=int, default=20000, help="合成数据行数（每张表）")
+    parser.add_argument("--repeat", type=int, default=200, help="每种每页数量的调用次数")
+    parser.add_argument("--no-seed", action="store_true", help="不生成合成数据，直接使用 DATABASE_URL 指定的数据库")
+    return parser.parse_args()
+
+
+def seed(engine, rows: int):
+    """生成合成的盯办与纠纷数据（案件编号以 BENCH 开头，可追加到已有数据库）"""
+    from generate_synthetic_data import SyntheticDataset, load_sqlite
+
+    dataset = SyntheticDataset(
+        seed=42, years=1, alerts=0, calls=0, cases=rows, disputes=rows, officers=30, case_prefix="BENCH"
+    )
+    load_sqlite(engine, dataset)
+
+
+def legacy_risk_page(db, page, page_size):
+    """改造前实现：加载 ORM 实体后逐字段复制"""
+    from app.models.risk_supervision import RiskSupervision
+    from app.services import risk_supervision
+
+    now = risk_supervision.current_time()
+    rows = (
+        db.query(RiskSupervision, risk_supervision.days_remaining_expr(now).label("days_remaining"))
+        .order_by(*risk_supervision.get_sort_clause("days_remaining", "asc"))
+        .offset((page - 1) * page_size)
+        .limit(page_size + 1)
+        .all()
+    )[:page_size]
+    issues_by_id = risk_supervision.get_issues_by_risk_ids(db, [item.id for item, _ in rows])
+    return [
+        {
+            "id": item.id,
+            "case_number": item.case_number,
+            "case_name": item.case_name,
+            "case_time": item.case_time,
+            "case_type": item.case_type,
+            "problem_type": item.problem_type,
+            "specific_content": issues_by_id[item.id],
+            "deadline": item.deadline,
+            "officer_name": item.officer_name,
+            "days_remaining": days_remaining
+        }
+        for item, days_remaining in rows
+    ]
+
+
+def legacy_dispute_page(db, page, page_size):
+    """改造前实现：加载 ORM 实体后逐字段复制并逐行应用样式"""
+    from app.models.dispute_management import DisputeManagement
+    from app.services import dispute_management
+    from app.services.display_rule import apply_color_rules
+
+    items = (
+        db.query(DisputeManagement)
+        .filter(*dispute_management.build_filters())
+        .order_by(*dispute_management.get_sort_clause("event_time", "desc"))
+        .offset((page - 1) * page_size)
+        .limit(page_size + 1)
+        .all()
+    )[:page_size]
+    result = []
+    for item in items:
+        item_data = {
+            "id": item.id,
+            "event_name": item.event_name,
+            "event_type": item.event_type,
+            "content": item.content,
+            "event_time": item.event_time,
+            "risk_level": item.risk_level,
+            "officer_name": item.officer_name,
+            "status": item.status
+        }
+        item_data["style"] = apply_color_rules({"risk_level": item.risk_level}, [])
+        result.append(item_data)
+    return result
+
+
+def measure(func, page_size: int, repeat: int, pages: int) -> float:
+    """调用 repeat 次（页码轮换），返回每秒行数"""
+    from app.core.database import SessionLocal
+
+    rows = 0
+    elapsed = 0.0
+    for i in range(repeat):
+        # 每次调用使用新会话，与请求级会话一致（身份映射不跨请求复用）
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            rows += len(func(db, i % pages + 1, page_size))
+            elapsed += time.perf_counter() - start
+        finally:
+            db.close()
+    return rows / elapsed if elapsed else 0.0
+
+
+def main():
+    args = parse_args()
+    if not args.no_seed:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["DEBUG"] = "False"
+
+    from app.core.database import engine
+    from app.core.init_db import init_database
+    from app.services import risk_supervision, dispute_management
+
+    init_database()
+    if not args.no_seed:
+        seed(engine, args.rows)
+
+    def current_risk_page(db, page, page_size):
+        return risk_supervision.list_risk_supervision(
+            db, page, page_size, include_rules=False, include_total=False
+        )[0]
+
+    def current_dispute_page(db, page, page_size):
+        return dispute_management.list_dispute_management(
+            db, page, page_size, include_rules=False, include_total=False
+        )[0]
+
+    cases = [
+        ("盯办列表", legacy_risk_page, current_risk_page),
+        ("纠纷列表", legacy_dispute_page, current_dispute_page),
+    ]
+
+    print(f"{'列表':<8}{'每页':>6}{'ORM 加载 行/秒':>18}{'列投影 行/秒':>16}{'提升':>8}")
+    for name, legacy, current in cases:
+        for page_size in PAGE_SIZES:
+            pages = 20
+            # 预热（编译缓存、页缓存）
+            measure(legacy, page_size, 5, pages)
+            measure(current, page_size, 5, pages)
+            before = measure(legacy, page_size, args.repeat, pages)
+            after = measure(current, page_size, args.repeat, pages)
+            ratio = after / before if before else 0.0
+            print(f"{name:<8}{page_size:>6}{before:>18,.0f}{after:>16,.0f}{ratio:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
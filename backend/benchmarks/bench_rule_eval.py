@@ -0,0 +1,96 @@
+"""显示规则计算基准：逐行 style_for 与按列批量 assign
+
+构造与内置规则同类的规则集（数值阈值、等值、集合），在随机数据列上比较两种计算方式的耗时，
+并逐行校验批量结果与逐行结果一致（含空值、字符串与数值混合等不可比较的取值）。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_rule_eval.py
+    python benchmarks/bench_rule_eval.py --rows 100000 --repeat 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RULES = [
+    {
+        "table_code": None, "rule_type": "color", "rule_name": "剩余天数",
+        "rule_config": {"field": "days_remaining", "conditions": [
+            {"operator": "<", "value": 3, "font_color": "#f5222d"},
+            {"operator": "<=", "value": 5, "font_color": "#faad14"},
+            {"operator": ">", "value": 30, "style_token": "muted"},
+        ]},
+        "priority": 1, "description": None,
+    },
+    {
+        "table_code": None, "rule_type": "color", "rule_name": "风险等级",
+        "rule_config": {"field": "risk_level", "conditions": [
+            {"operator": "eq", "value": "高", "font_color": "#f5222d"},
+            {"operator": "in", "values": ["中", "较高"], "font_color": "#faad14"},
+        ]},
+        "priority": 2, "description": None,
+    },
+    {
+        "table_code": None, "rule_type": "color", "rule_name": "数量",
+        "rule_config": {"field": "count", "conditions": [
+            {"operator": ">=", "value": 100, "style_token": "highlight"},
+            {"operator": "==", "value": 0, "style_token": "dim"},
+        ]},
+        "priority": 3, "description": None,
+    },
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="显示规则计算基准")
+    parser.add_argument("--rows", type=int, default=20000, help="行数")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数")
+    return parser.parse_args()
+
+
+def make_columns(rows: int):
+    rng = random.Random(42)
+    days = [rng.choice([None, "3", rng.randint(-5, 60), rng.random() * 40]) for _ in range(rows)]
+    levels = [rng.choice(["高", "中", "较高", "低", None]) for _ in range(rows)]
+    counts = [rng.choice([0, rng.randint(1, 200), None]) for _ in range(rows)]
+    return {"days_remaining": days, "risk_level": levels, "count": counts}
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    args = parse_args()
+    from app.services.display_rule import RuleSet
+
+    rule_set = RuleSet(RULES)
+    columns = make_columns(args.rows)
+    items = [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    # 一致性校验
+    assigned = rule_set.assign(columns)
+    for row_index, item in enumerate(items):
+        expected = rule_set.style_for(item)
+        style_index = assigned[row_index]
+        actual = rule_set.styles[style_index] if style_index >= 0 else (None, None)
+        assert (expected["font_color"], expected["style_token"]) == actual, (row_index, item, expected, actual)
+
+    row_wise = timed(lambda: [rule_set.style_for(item) for item in items], args.repeat)
+    assign = timed(lambda: rule_set.assign(columns), args.repeat)
+    batch = timed(lambda: rule_set.row_styles(columns), args.repeat)
+    print(f"{args.rows:,} 行，{len(rule_set.styles)} 个条件，结果一致")
+    print(f"逐行 style_for:  {row_wise:9.2f} ms")
+    print(f"按列 assign:     {assign:9.2f} ms  ({row_wise / assign:.1f}x)")
+    print(f"按列 row_styles: {batch:9.2f} ms  ({row_wise / batch:.1f}x，含生成样式列表)")
+
+
+if __name__ == "__main__":
+    main()
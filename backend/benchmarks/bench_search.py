@@ -0,0 +1,101 @@
+"""列表关键词检索基准
+
+对盯办、纠纷列表分别用宽泛关键词（命中数千至数万行）检索，统计单次请求耗时：
+"含总数" 每次清空总数缓存，包含 COUNT 查询；"不含总数" 对应 include_total=False 的翻页请求。
+命中超过 search.SEARCH_MAX_MATCHES 时只对最新的这些命中计算 bm25，表中同时列出实际返回的总数。
+
+默认在临时 SQLite 数据库中用 generate_synthetic_data 生成合成数据，也可通过 DATABASE_URL 指定已有数据库。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --rows 100000 --repeat 50
+    DATABASE_URL=sqlite:///./data.db python benchmarks/bench_search.py --no-seed
+    python benchmarks/bench_search.py --terms 沈家门 纠纷
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 合成数据中高频出现的关键词
+TERMS = ["文书未开具", "沈家门", "调解", "盗窃", "纠纷"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="列表关键词检索基准")
+    parser.add_argument("--rows", type=int, default=100000, help="合成数据行数（每张表）")
+    parser.add_argument("--repeat", type=int, default=20, help="每个关键词的调用次数")
+    parser.add_argument("--terms", nargs="+", default=TERMS, help="检索关键词")
+    parser.add_argument("--no-seed", action="store_true", help="不生成合成数据，直接使用 DATABASE_URL 指定的数据库")
+    return parser.parse_args()
+
+
+def seed(engine, rows: int):
+    """生成合成的盯办与纠纷数据（案件编号以 BENCH 开头，可追加到已有数据库）"""
+    from generate_synthetic_data import SyntheticDataset, load_sqlite
+
+    dataset = SyntheticDataset(
+        seed=42, years=1, alerts=0, calls=0, cases=rows, disputes=rows, officers=30, case_prefix="BENCH"
+    )
+    load_sqlite(engine, dataset)
+
+
+def measure(func, repeat: int) -> float:
+    """预热一次后调用 repeat 次，返回平均耗时（毫秒）"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    args = parse_args()
+    if not args.no_seed:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["DEBUG"] = "False"
+
+    from app.core.database import ReadSessionLocal, engine
+    from app.core.init_db import init_database
+    from app.services import dispute_management, risk_supervision, search
+
+    init_database()
+    if not args.no_seed:
+        seed(engine, args.rows)
+
+    with engine.connect() as conn:
+        mode = "FTS5" if search.is_available(conn) else "LIKE 回退"
+    print(f"检索方式: {mode}，命中上限: {search.SEARCH_MAX_MATCHES}\n")
+
+    cases = [
+        ("盯办列表", risk_supervision.list_risk_supervision, risk_supervision._total_cache),
+        ("纠纷列表", dispute_management.list_dispute_management, dispute_management._total_cache),
+    ]
+
+    print(f"{'列表':<8}{'关键词':<10}{'总数':>8}{'含总数 ms':>12}{'不含总数 ms':>14}")
+    db = ReadSessionLocal()
+    try:
+        for name, list_page, total_cache in cases:
+            for term in args.terms:
+                def with_total():
+                    total_cache.clear()
+                    return list_page(db, q=term, include_rules=False)
+
+                def without_total():
+                    return list_page(db, q=term, include_rules=False, include_total=False)
+
+                total = with_total()[1]
+                first = measure(with_total, args.repeat)
+                more = measure(without_total, args.repeat)
+                print(f"{name:<8}{term:<10}{total:>8}{first:>12.1f}{more:>14.1f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
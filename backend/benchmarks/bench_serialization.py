@@ -0,0 +1,145 @@
+"""响应序列化与压缩基准
+
+对最大的几个接口载荷（态势数据、每页 100 行的盯办与纠纷列表、规则列表）比较：
+- 编码耗时：FastAPI 默认路径（jsonable_encoder + 标准库 json）与 orjson
+- 载荷大小：原始 JSON、gzip、brotli（未安装 brotli 时跳过）
+
+在数据库副本上运行（不修改原库）：缺少坐标缓存的地点写入合成坐标，避免调用地理编码接口；
+可用 --rows 追加合成的盯办与纠纷数据。
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --rows 20000 --repeat 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="响应序列化与压缩基准")
+    parser.add_argument("--rows", type=int, default=0, help="追加的合成盯办/纠纷行数（每张表）")
+    parser.add_argument("--repeat", type=int, default=200, help="每种编码的重复次数")
+    return parser.parse_args()
+
+
+def copy_database() -> str:
+    """复制 DATABASE_URL 指向的 SQLite 数据库到临时目录，返回新的连接串"""
+    from app.core.config import settings
+
+    source = settings.DATABASE_URL.replace("sqlite:///", "", 1)
+    target = os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+    if os.path.exists(source):
+        shutil.copyfile(source, target)
+    return f"sqlite:///{target}"
+
+
+def fill_geocoding_cache(engine):
+    """为没有坐标缓存的地点写入合成坐标（围绕市中心散布）"""
+    with engine.begin() as conn:
+        locations = [row[0] for row in conn.exec_driver_sql(
+            "SELECT DISTINCT location FROM t_police_alert "
+            "WHERE location NOT IN (SELECT address FROM t_geocoding_cache)"
+        )]
+        if not locations:
+            return
+        conn.exec_driver_sql(
+            "INSERT INTO t_geocoding_cache (address, longitude, latitude, created_at) VALUES (?, ?, ?, datetime('now'))",
+            [(location, 121.5 + (i % 50) * 0.002, 29.9 + (i // 50) * 0.002) for i, location in enumerate(locations)]
+        )
+
+
+def build_payloads():
+    """调用服务函数生成各接口的响应载荷（与接口返回的 dict 相同）"""
+    from app.core.database import SessionLocal
+    from app.services import risk_supervision, dispute_management, situation
+
+    db = SessionLocal()
+    try:
+        situation_data = asyncio.run(situation.get_situation_data(db, "year", ["偷盗", "诈骗", "纠纷"]))
+        risk_items, risk_total, risk_rules, risk_cursor = risk_supervision.list_risk_supervision(db, page_size=100)
+        dispute_items, dispute_total, dispute_rules, dispute_cursor = dispute_management.list_dispute_management(
+            db, page_size=100
+        )
+        from app.api.admin import get_rules
+        rules_payload = asyncio.run(get_rules(db))
+    finally:
+        db.close()
+
+    return [
+        ("/situation?time_period=year", {"code": 200, "data": situation_data}),
+        ("/risk-supervision?page_size=100", {"code": 200, "data": {
+            "total": risk_total, "items": risk_items, "rules": risk_rules, "next_cursor": risk_cursor
+        }}),
+        ("/dispute-management?page_size=100", {"code": 200, "data": {
+            "total": dispute_total, "items": dispute_items, "rules": dispute_rules, "next_cursor": dispute_cursor
+        }}),
+        ("/admin/rules", rules_payload),
+    ]
+
+
+def timed(func, repeat: int) -> float:
+    """平均耗时（微秒）"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    args = parse_args()
+    os.environ["DEBUG"] = "False"
+    os.environ["DATABASE_URL"] = copy_database()
+
+    from fastapi.encoders import jsonable_encoder
+    from app.core.config import settings
+    from app.core.database import engine
+    from app.core.init_db import init_database
+    from app.core.responses import dumps
+
+    init_database()
+    fill_geocoding_cache(engine)
+    if args.rows:
+        from bench_list_projection import seed
+        seed(engine, args.rows)
+
+    def default_encode(payload):
+        # FastAPI 默认：jsonable_encoder 转换后由 JSONResponse 编码
+        return json.dumps(
+            jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+
+    print(f"{'接口':<36}{'JSON 字节':>10}{'gzip':>9}{'brotli':>9}{'默认编码 μs':>14}{'orjson μs':>12}{'提升':>8}")
+    for name, payload in build_payloads():
+        body = dumps(payload)
+        assert json.loads(body) == json.loads(default_encode(payload)), f"{name} 编码结果不一致"
+
+        gzip_size = len(zlib.compress(body, settings.GZIP_COMPRESS_LEVEL, wbits=31))
+        brotli_size = len(brotli.compress(body, quality=settings.BROTLI_QUALITY)) if brotli else None
+
+        before = timed(lambda: default_encode(payload), args.repeat)
+        after = timed(lambda: dumps(payload), args.repeat)
+        print(
+            f"{name:<36}{len(body):>10,}{gzip_size:>9,}"
+            f"{(f'{brotli_size:,}' if brotli_size else '-'):>9}"
+            f"{before:>14,.1f}{after:>12,.1f}{before / after:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""SQLite 存储配置基准：写入期间的并发读取吞吐
+
+在合成数据库上，若干读线程持续执行大屏查询（警情分类汇总、纠纷列表首页），
+同时一个写线程按导入的方式分批写入警情（每批一个事务），统计读取吞吐、延迟分位数与锁等待报错。
+
+对比两种配置（各在独立子进程中运行，配置在导入应用模块前通过环境变量设置）：
+- legacy：改造前的默认值（回滚日志、synchronous=FULL、无内存映射、默认页缓存）
+- tuned：当前默认的存储配置（WAL 等），读取走只读连接池
+
+用法（在 backend 目录下）:
+    python benchmarks/bench_storage_profile.py
+    python benchmarks/bench_storage_profile.py --readers 8 --duration 15 --batch 20000
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILES = {
+    "legacy": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_MMAP_SIZE": "0",
+        "SQLITE_CACHE_SIZE": "-2000",
+        "SQLITE_TEMP_STORE": "DEFAULT",
+        "SQLITE_BUSY_TIMEOUT": "5000",
+    },
+    "tuned": {},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SQLite 存储配置基准")
+    parser.add_argument("--alerts", type=int, default=150000, help="初始合成警情行数")
+    parser.add_argument("--readers", type=int, default=4, help="读线程数")
+    parser.add_argument("--duration", type=float, default=8.0, help="每种配置的持续时间（秒）")
+    parser.add_argument("--batch", type=int, default=10000, help="每个写事务的行数")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--database", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def prepare(alerts: int) -> str:
+    """建库并生成初始数据，返回数据库路径"""
+    from bench_event_loop import seed
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from app.core.database import engine
+    from app.core.init_db import init_database
+
+    init_database()
+    seed(engine, alerts, 400)
+    engine.dispose()
+    return path
+
+
+def run_worker(args) -> dict:
+    """在当前进程中运行一种配置（环境变量已设置），返回统计结果"""
+    from app.core.database import ReadSessionLocal, engine
+    from app.services import dispute_management, situation
+
+    stop = time.perf_counter() + args.duration
+    latencies = []
+    errors = []
+    write_errors = []
+    written = [0, 0]  # 行数、事务数
+    lock = threading.Lock()
+
+    def reader(worker: int):
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            db = ReadSessionLocal()
+            try:
+                if worker % 2 == 0:
+                    situation.get_police_classification(db, "year", apply_rules=False)
+                else:
+                    dispute_management.list_dispute_management(db, page_size=20, include_total=False)
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+            finally:
+                db.close()
+
+    def writer():
+        today = date.today()
+        offset = 0
+        while time.perf_counter() < stop:
+            rows = [
+                (today - timedelta(days=(offset + i) % 365), "偷盗", f"写入地点{offset + i}号", 1)
+                for i in range(args.batch)
+            ]
+            offset += args.batch
+            try:
+                with engine.begin() as conn:
+                    conn.exec_driver_sql(
+                        "INSERT INTO t_police_alert (alert_date, alert_type, location, count) VALUES (?, ?, ?, ?)", rows
+                    )
+            except Exception as e:
+                with lock:
+                    write_errors.append(str(getattr(e, "orig", e)))
+                continue
+            written[0] += len(rows)
+            written[1] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(args.readers)]
+    threads.append(threading.Thread(target=writer, daemon=True))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "reads": len(latencies),
+        "reads_per_second": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p99": percentile(latencies, 0.99) if latencies else 0.0,
+        "max": max(latencies) if latencies else 0.0,
+        "errors": len(errors),
+        "rows_per_second": written[0] / elapsed,
+        "transactions": written[1],
+        "write_errors": len(write_errors),
+        "write_error_sample": write_errors[0] if write_errors else None,
+    }
+
+
+def main():
+    args = parse_args()
+    os.environ["DEBUG"] = "False"
+
+    if args.worker:
+        os.environ["DATABASE_URL"] = f"sqlite:///{args.database}"
+        print(json.dumps(run_worker(args)))
+        return
+
+    source = prepare(args.alerts)
+    print(f"初始警情 {args.alerts:,} 行；读线程 {args.readers}，写事务每批 {args.batch:,} 行，每种配置 {args.duration:.0f} 秒")
+    print(f"{'配置':<8}{'读取次数':>8}{'读取/秒':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'读报错':>7}{'写入行/秒':>11}{'写事务':>7}{'写报错':>7}")
+
+    for name, overrides in PROFILES.items():
+        # 每种配置使用初始数据的副本
+        path = os.path.join(os.path.dirname(source), f"{name}.db")
+        shutil.copyfile(source, path)
+        env = dict(os.environ, **overrides)
+        command = [
+            sys.executable, os.path.abspath(__file__), "--worker", name, "--database", path,
+            "--readers", str(args.readers), "--duration", str(args.duration), "--batch", str(args.batch)
+        ]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:<8}{result['reads']:>8}{result['reads_per_second']:>9.1f}{result['p50']:>9.1f}"
+            f"{result['p99']:>9.1f}{result['max']:>9.1f}{result['errors']:>7}"
+            f"{result['rows_per_second']:>11.0f}{result['transactions']:>7}{result['write_errors']:>7}"
+        )
+        if result["write_error_sample"]:
+            print(f"{'':<8}写入报错示例: {result['write_error_sample']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""数据推送订阅检查
+
+按前端 subscribePageData（frontend/src/utils/push.js）拼接查询参数的方式订阅 /stream，
+检查连接返回 200，且首条推送与用相同参数（含列表页码）请求数据接口的响应一致。
+
+用法（在 backend 目录下）:
+    python benchmarks/check_push_stream.py
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/check_push_stream.py
+
+存在不符合预期的订阅时以非零状态码退出。
+"""
+import asyncio
+import json
+import os
+import sys
+from urllib.parse import urlencode
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app
+
+STREAM_PATH = "/api/v1/data/stream"
+
+# 与 Cases.vue / Disputes.vue 一致的每页数量
+PAGE_SIZE = 6
+
+# (说明, 订阅的页面, 数据接口路径, 前端传入的参数)
+CHECKS = [
+    ("态势", "situation", "/api/v1/data/situation",
+     {"time_period": "month", "alert_types": "偷盗,诈骗"}),
+    ("盯办-第 1 页", "risk-supervision", "/api/v1/data/risk-supervision",
+     {"page": 1, "page_size": PAGE_SIZE, "sort_field": "days_remaining", "sort_order": "asc"}),
+    ("盯办-第 2 页", "risk-supervision", "/api/v1/data/risk-supervision",
+     {"page": 2, "page_size": PAGE_SIZE, "sort_field": "days_remaining", "sort_order": "asc"}),
+    ("纠纷-第 2 页", "dispute-management", "/api/v1/data/dispute-management",
+     {"page": 2, "page_size": PAGE_SIZE, "sort_field": "event_time", "sort_order": "desc"}),
+]
+
+
+def frontend_query(channel: str, params: dict) -> str:
+    """与 subscribePageData 相同：先放 channel，再按顺序追加非空参数"""
+    items = [("channel", channel)]
+    for key, value in params.items():
+        if value is None or value == "":
+            continue
+        values = value if isinstance(value, list) else [value]
+        items += [(key, str(v)) for v in values]
+    return urlencode(items)
+
+
+async def first_event(query: str, timeout: float = 10.0):
+    """
+    以 ASGI 调用打开订阅，读到第一条 update 消息后断开
+
+    Returns:
+        (状态码, 首条推送的 data，无推送时为 None 或错误响应体)
+    """
+    status = None
+    body = b""
+    done = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, body
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body += message.get("body", b"")
+            if status != 200 or b"event: update" in body and body.endswith(b"\n\n"):
+                done.set()
+            if not message.get("more_body", False):
+                done.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": STREAM_PATH, "raw_path": STREAM_PATH.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"testserver")],
+        "server": ("testserver", 80), "client": ("127.0.0.1", 0),
+    }
+    task = asyncio.create_task(app(scope, receive, send))
+    try:
+        await asyncio.wait_for(done.wait(), timeout)
+    finally:
+        done.set()
+        await asyncio.wait_for(task, timeout)
+
+    if status != 200:
+        return status, body.decode(errors="replace")
+    for block in body.split(b"\n\n"):
+        lines = block.split(b"\n")
+        if b"event: update" in lines:
+            data = b"".join(line[len(b"data: "):] for line in lines if line.startswith(b"data: "))
+            return status, json.loads(data)
+    return status, None
+
+
+def main() -> int:
+    failures = 0
+    with TestClient(app) as client:
+        for title, channel, path, params in CHECKS:
+            query = frontend_query(channel, params)
+            status, pushed = asyncio.run(first_event(query))
+            if status != 200:
+                print(f"[失败] {title}: {STREAM_PATH}?{query} 返回 {status} {pushed}")
+                failures += 1
+                continue
+
+            expected = client.get(path, params=params).json()
+            if pushed != expected:
+                print(f"[失败] {title}: 首条推送与 {path} 的响应不一致")
+                failures += 1
+                continue
+            print(f"[通过] {title}: {STREAM_PATH}?{query}")
+
+    print(f"\n共 {len(CHECKS)} 项，失败 {failures} 项")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
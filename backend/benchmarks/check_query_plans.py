@@ -0,0 +1,136 @@
+"""EXPLAIN QUERY PLAN 检查
+
+调用列表与态势服务函数，截获其实际执行的 SQL，逐条执行 EXPLAIN QUERY PLAN，
+检查是否命中预期索引、是否出现全表扫描或临时排序。
+部分索引的选择依赖 ANALYZE 统计信息，请针对已导入数据的数据库运行。
+
+用法（在 backend 目录下）:
+    python benchmarks/check_query_plans.py
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/check_query_plans.py
+
+存在不符合预期的查询计划时以非零状态码退出。
+"""
+import os
+import re
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app.core.cache import DATA_VERSION, bump_version
+from app.core.database import engine, SessionLocal
+from app.core.init_db import init_database
+from app.services import risk_supervision, dispute_management, situation
+
+# 允许全表扫描的小表（规则配置表只有几十行）
+SCAN_ALLOWED_TABLES = {"t_display_rule"}
+
+# (说明, 调用函数, 主查询必须使用的索引)
+# 态势与“统计”类查询按聚合值排序，分组结果的临时排序不可避免，只检查是否命中索引
+CHECKS = [
+    ("盯办-默认排序", lambda db: risk_supervision.list_risk_supervision(db, include_rules=False),
+     "ix_t_risk_supervision_deadline"),
+    ("盯办-案件类型筛选", lambda db: risk_supervision.list_risk_supervision(db, case_type="刑事", include_rules=False),
+     "idx_risk_case_type_deadline"),
+    ("盯办-问题类型筛选", lambda db: risk_supervision.list_risk_supervision(db, problem_type="其它", include_rules=False),
+     "idx_risk_problem_type_deadline"),
+    ("盯办-责任民警筛选", lambda db: risk_supervision.list_risk_supervision(db, officer_name="张警官", include_rules=False),
+     "idx_risk_officer_deadline"),
+    ("盯办-案发时间倒序", lambda db: risk_supervision.list_risk_supervision(db, sort_field="case_time", sort_order="desc", include_rules=False),
+     "idx_risk_case_time"),
+    ("盯办-紧急程度分档统计", lambda db: risk_supervision.get_urgency_summary(db),
+     "ix_t_risk_supervision_deadline"),
+    ("盯办-紧急程度分档筛选", lambda db: risk_supervision.list_risk_supervision(db, urgency=["lt_3"], include_rules=False),
+     "ix_t_risk_supervision_deadline"),
+    ("盯办-风险问题筛选", lambda db: risk_supervision.list_risk_supervision(db, issue="文书未开具", include_rules=False),
+     "idx_risk_issue_issue_risk"),
+    ("盯办-风险问题频次统计", lambda db: risk_supervision.get_issue_stats(db),
+     "idx_risk_issue_issue_risk"),
+    ("纠纷-默认筛选", lambda db: dispute_management.list_dispute_management(db, include_rules=False),
+     "idx_dispute_open_event_time"),
+    ("纠纷-默认筛选按类型排序", lambda db: dispute_management.list_dispute_management(db, sort_field="event_type", include_rules=False),
+     "idx_dispute_open_event_type"),
+    ("纠纷-处置进度筛选", lambda db: dispute_management.list_dispute_management(db, status="已调解", include_rules=False),
+     "idx_dispute_status_event_time"),
+    ("态势-警情分类", lambda db: situation.get_police_classification(db, "month", apply_rules=False),
+     "idx_police_alert_type_date_location"),
+    ("态势-地点分布", lambda db: situation.get_location_distribution(db, "偷盗", "month"),
+     "idx_police_alert_type_date_location"),
+    ("态势-重复报警", lambda db: situation.get_repeat_alarms(db),
+     "idx_call_record_address_date_count"),
+]
+
+
+def capture_statements(func):
+    """执行函数并截获其发出的 SQL 语句"""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    db = SessionLocal()
+    try:
+        func(db)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(statement, parameters):
+    """执行 EXPLAIN QUERY PLAN，返回计划明细行"""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def problems_in(plan, check_sort):
+    """找出计划中的全表扫描与临时排序（小表查询的排序不检查）"""
+    problems = []
+    if any(re.search(rf"\b{table}\b", line) for table in SCAN_ALLOWED_TABLES for line in plan):
+        check_sort = False
+    for line in plan:
+        match = re.match(r"SCAN (\w+)$", line)
+        if match and match.group(1) not in SCAN_ALLOWED_TABLES:
+            problems.append(line)
+        if check_sort and "USE TEMP B-TREE FOR ORDER BY" in line:
+            problems.append(line)
+    return problems
+
+
+def main():
+    init_database()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    failed = 0
+
+    for name, func, expected_index in CHECKS:
+        # 清空总数等版本缓存，保证计数查询也被检查
+        bump_version(DATA_VERSION)
+        statements = capture_statements(func)
+
+        plans = [explain(statement, parameters) for statement, parameters in statements]
+        used = any(expected_index in line for plan in plans for line in plan)
+        check_sort = not (name.startswith("态势") or name.endswith("统计"))
+        problems = [line for plan in plans for line in problems_in(plan, check_sort)]
+
+        ok = used and not problems
+        failed += 0 if ok else 1
+        print(f"[{'OK' if ok else 'FAIL'}] {name}（预期索引 {expected_index}）")
+        for statement, plan in zip(statements, plans):
+            for line in plan:
+                print(f"       {line}")
+        if not used:
+            print(f"       未使用预期索引 {expected_index}")
+        for line in problems:
+            print(f"       问题: {line}")
+
+    print(f"\n共 {len(CHECKS)} 项检查，失败 {failed} 项")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
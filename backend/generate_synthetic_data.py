@@ -0,0 +1,680 @@
+"""生成大规模合成数据用于压测与容量测试
+
+按随机种子、历史年数与各表行数、地点数量生成可复现的合成数据：
+- 地点按街道/乡镇聚集，警情、重复报警、案件与纠纷的地点分布均为长尾（Zipf，--skew 控制集中程度），
+  各警情子类有各自的高发地点，同时共享全局热点
+- 警情子类按实际构成加权（偷盗、纠纷、通讯网络诈骗多，杀人、绑架等极少），
+  日警情量带周末、季节与逐年增长的波动
+- 同日同类型同地点的警情、同日同地点的重复报警与导入一样合并累加
+- 纠纷处置进度随事发时间变化（越早的事件越多已调解）
+- 每个地点生成坐标（各街道中心附近），作为地理编码缓存，态势接口无需调用地理编码接口
+
+输出格式：
+- sqlite：直接批量写入数据库（含风险明细、全文索引、坐标缓存与 ANALYZE），用于基准与容量测试
+- xlsx：与导入模板相同的 sheet 与列（另附“坐标缓存”sheet，导入时忽略），流式写入，用于测试导入；
+  单个 sheet 不能超过 Excel 的 1048576 行
+- csv：每个 sheet 一个 CSV（UTF-8 BOM），行数不受限制，可生成数 GB 的数据
+
+sqlite 格式写入 --database 指定的数据库（未指定时为 DATABASE_URL 配置），目标表已有数据时
+按导入规则合并（警情、重复报警次数累加，案件编号、纠纷与坐标重复时跳过）。
+xlsx / csv 格式指定 --database 时，同时把坐标缓存写入该数据库，导入生成的文件后无需地理编码。
+服务的查询缓存只在导入接口中失效，直接写入数据库后请重启服务。
+
+用法（在 backend 目录下）:
+    python generate_synthetic_data.py --format sqlite --database ./loadtest.db --years 3 --alerts 2000000 --locations 5000
+    python generate_synthetic_data.py --format xlsx --output ./synthetic.xlsx --years 1 --alerts 500000 --database ./data.db
+    python generate_synthetic_data.py --format csv --output ./synthetic_csv --years 10 --alerts 50000000 --locations 50000
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.alert_category import ALERT_CATEGORY_DATA, SUB_TYPE_TO_ALERT_TYPE
+from app.utils.constants import (
+    PROBLEM_TYPE_OPTIONS, CASE_TYPE_OPTIONS, RISK_TYPE_OPTIONS,
+    RISK_ISSUE_OPTIONS, RISK_LEVEL_OPTIONS, DISPUTE_STATUS_OPTIONS
+)
+
+# Excel 单个 sheet 的最大行数（含表头）
+XLSX_MAX_ROWS = 1048576
+
+# 批量写入数据库时每个事务的行数
+BATCH_ROWS = 50000
+
+# 案件与纠纷每次生成的行数
+CHUNK_ROWS = 20000
+
+# 各 sheet 的列（与导入模板一致）
+SHEETS = {
+    "执法问题盯办": ["序号", "案件编号", "案件名称", "案发时间", "案件类型", "风险类型", "风险问题", "问题类型", "整改期限", "责任民警"],
+    "矛盾纠纷管理": ["序号", "事件名称", "事件类型", "事件内容", "事发时间", "风险等级", "责任民警", "处置进度"],
+    "警情态势追踪": ["序号", "日期", "警情父类", "警情子类", "地点", "次数"],
+    "重复报警记录": ["序号", "日期", "报警地点", "次数"],
+    "坐标缓存": ["地址", "经度", "纬度"],
+}
+
+# 街道/乡镇及其中心坐标（地点在中心附近分布）
+AREAS = [
+    ("沈家门街道", 122.300, 29.950), ("东港街道", 122.330, 29.960), ("朱家尖街道", 122.390, 29.900),
+    ("展茅街道", 122.250, 30.010), ("勾山街道", 122.270, 29.970), ("六横镇", 122.130, 29.730),
+    ("桃花镇", 122.280, 29.810), ("虾峙镇", 122.260, 29.750), ("东极镇", 122.680, 30.180),
+    ("普陀山镇", 122.390, 30.010),
+]
+# 各街道的人口权重（地点数量按此分配）
+AREA_WEIGHTS = [30, 25, 10, 8, 8, 6, 5, 4, 1, 3]
+
+PLACE_NAMES = [
+    "东港", "和平", "海韵", "新城", "金鹰", "半升洞", "鲁家峙", "滨港", "海洲", "兴港",
+    "莲花", "桃湾", "松山", "芦花", "碧海", "渔港", "南岙", "北岙", "平阳", "大岙",
+]
+PLACE_SUFFIXES = ["小区", "花园", "社区", "新村", "商城", "市场"]
+
+# 警情子类权重（未列出的子类权重为 1）
+SUB_TYPE_WEIGHTS = {
+    "偷盗类": 300, "其它诈骗": 60, "抢夺": 15, "抢劫": 5,
+    "通讯网络诈骗": 180,
+    "涉黄类": 20, "涉黄": 20,
+    "涉赌类": 25, "涉赌": 25,
+    "打架斗殴": 120, "家庭暴力": 40, "伤害": 30, "强奸": 2, "杀人": 0.3,
+    "劫持": 0.5, "绑架": 0.5, "限制人身自由": 3,
+    "纠纷": 350,
+}
+
+CASE_TYPE_WEIGHTS = {"刑事": 3, "行政": 2, "治安": 5}
+CASE_NAME_SUFFIXES = {
+    "刑事": ["盗窃案", "诈骗案", "故意伤害案", "抢夺案", "帮助信息网络犯罪活动案"],
+    "行政": ["无证经营案", "非法营运案", "违法建设案"],
+    "治安": ["殴打他人案", "赌博案", "卖淫嫖娼案", "寻衅滋事案", "故意损毁财物案"],
+}
+DISPUTE_TYPE_WEIGHTS = {"邻里矛盾": 35, "家庭矛盾": 25, "劳资纠纷": 12, "物业纠纷": 18, "其他": 10}
+RISK_LEVEL_WEIGHTS = {"高": 1, "中": 3, "低": 6}
+SURNAMES = "张李王赵刘陈杨黄周吴徐孙胡朱高林何郭马罗梁宋郑谢韩唐冯于董萧程曹袁邓许傅沈曾彭吕苏卢蒋蔡贾丁魏薛叶阎余潘杜戴夏钟汪田任姜范方石姚谭廖邹熊金陆郝孔白崔康毛邱秦江史顾侯邵孟龙万段雷钱汤尹黎易常武乔贺赖龚文"
+GIVEN_NAMES = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华建国海燕波宁辉鹏飞红梅"
+
+DISPUTE_CONTENTS = [
+    "居民{a}某与{b}某因楼上漏水问题产生纠纷，双方情绪激动，需要及时调解处理。",
+    "业主{a}某长期占用{place}公共停车位，引发其他业主不满，物业协调未果。",
+    "商铺租户{a}某与房东{b}某因租金上涨问题产生分歧，双方协商未果，需要调解介入。",
+    "{place}邻居{a}某与{b}某因装修噪音问题产生矛盾，多次沟通无果，申请调解。",
+    "{place}业主因宠物饲养问题产生纠纷，需要社区介入协调。",
+    "{a}某家庭成员因财产分割问题产生争议，情绪激烈，需要调解。",
+    "员工{a}某与企业因工资发放问题产生劳资纠纷，申请调解。",
+    "{place}物业公司与业主{a}某因物业费收取问题产生纠纷，需要协调处理。",
+]
+
+
+def zipf_weights(size: int, skew: float) -> np.ndarray:
+    """
+    长尾分布权重（第 k 名的权重与 1/k^skew 成正比，已归一化）
+
+    Args:
+        size: 数量
+        skew: 集中程度（0 为均匀分布，越大越集中于前几名）
+
+    Returns:
+        按名次排列的权重数组
+    """
+    weights = 1.0 / np.arange(1, size + 1, dtype=np.float64) ** skew
+    return weights / weights.sum()
+
+
+def _cdf(weights: np.ndarray) -> np.ndarray:
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    return cdf
+
+
+def _draw(rng: np.random.Generator, cdf: np.ndarray, size: int) -> np.ndarray:
+    """按累积分布抽样（比 rng.choice(p=...) 每次重算累积分布快，适合大量小批次抽样）"""
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), len(cdf) - 1)
+
+
+def _aggregate(keys: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """按键合并次数（与导入的同键累加一致）"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts).astype(np.int64)
+
+
+def _format_datetime(value: datetime) -> str:
+    # 与 SQLAlchemy 在 SQLite 中存储 DateTime 的格式一致
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+class SyntheticDataset:
+    """
+    合成数据集（同样的参数与种子生成相同的数据，各表使用独立的随机流，调整某一表的行数不影响其他表）
+
+    Args:
+        seed: 随机种子
+        years: 历史年数（截至 end）
+        alerts: 警情抽样条数（同日同类型同地点合并后行数略少）
+        locations: 地点数量
+        calls: 重复报警抽样条数（默认为警情的 1/10）
+        cases: 执法问题盯办案件数
+        disputes: 矛盾纠纷数
+        officers: 民警人数
+        skew: 地点、民警等分布的集中程度
+        end: 数据截止日期（默认今天）
+        case_prefix: 案件编号前缀
+    """
+
+    def __init__(self, seed: int = 7, years: float = 2.0, alerts: int = 150000, locations: int = 400,
+                 calls: Optional[int] = None, cases: int = 5000, disputes: int = 5000, officers: int = 60,
+                 skew: float = 1.1, end: Optional[date] = None, case_prefix: str = "A330903"):
+        if years <= 0:
+            raise ValueError("历史年数必须大于 0")
+        if locations <= 0 or officers <= 0:
+            raise ValueError("地点数量与民警人数必须大于 0")
+        self.seed = seed
+        self.alerts = alerts
+        self.calls = alerts // 10 if calls is None else calls
+        self.cases = cases
+        self.disputes = disputes
+        self.skew = skew
+        self.case_prefix = case_prefix
+        self.end = end or date.today()
+        self.days = max(1, int(round(years * 365)))
+        self.start = self.end - timedelta(days=self.days - 1)
+        self.created_at = datetime.now().replace(microsecond=0)
+        self.day_factors = self._day_factors()
+
+        self.sub_types = [child for category in ALERT_CATEGORY_DATA for child in category["children"]]
+        self.parents = [category["parent"] for category in ALERT_CATEGORY_DATA for _ in category["children"]]
+        self.alert_types = sorted(set(SUB_TYPE_TO_ALERT_TYPE.get(sub, sub) for sub in self.sub_types))
+        self._sub_to_type = np.array(
+            [self.alert_types.index(SUB_TYPE_TO_ALERT_TYPE.get(sub, sub)) for sub in self.sub_types]
+        )
+
+        rng = self._rng(0)
+        self.locations = self._build_locations(rng, locations)
+        self.officers = self._build_officers(rng, officers)
+
+    def _rng(self, stream: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, stream])
+
+    @staticmethod
+    def _build_locations(rng: np.random.Generator, size: int) -> List[Tuple[str, float, float]]:
+        """地点名称与坐标（按街道人口权重分配，名称不重复，顺序打乱后名次即热度）"""
+        area_index = _draw(rng, _cdf(np.array(AREA_WEIGHTS, dtype=np.float64)), size)
+        per_area: Dict[int, int] = {}
+        places = []
+        for index in area_index:
+            name, lon, lat = AREAS[index]
+            # 同一街道内按 地名 × 后缀 × 楼号 依次编号，保证名称唯一
+            k = per_area.get(index, 0)
+            per_area[index] = k + 1
+            place = PLACE_NAMES[k % len(PLACE_NAMES)] + PLACE_SUFFIXES[k // len(PLACE_NAMES) % len(PLACE_SUFFIXES)]
+            building = k // (len(PLACE_NAMES) * len(PLACE_SUFFIXES)) + 1
+            places.append((f"{name}{place}{building}号楼", lon, lat))
+        offsets = rng.normal(0, 0.008, size=(size, 2))
+        order = rng.permutation(size)
+        return [
+            (places[i][0], round(float(places[i][1] + offsets[i][0]), 6), round(float(places[i][2] + offsets[i][1]), 6))
+            for i in order
+        ]
+
+    @staticmethod
+    def _build_officers(rng: np.random.Generator, size: int) -> List[str]:
+        """民警姓名（姓 + 一至两字名，不重复）"""
+        names: Dict[str, None] = {}
+        while len(names) < size:
+            given = "".join(GIVEN_NAMES[i] for i in rng.integers(0, len(GIVEN_NAMES), rng.integers(1, 3)))
+            names.setdefault(SURNAMES[rng.integers(0, len(SURNAMES))] + given)
+        return list(names)
+
+    def _day_factors(self) -> np.ndarray:
+        """各日警情量系数（周末、夏季偏高，逐年增长约 8%，均值为 1）"""
+        dates = [self.start + timedelta(days=i) for i in range(self.days)]
+        weekend = np.array([1.15 if d.weekday() >= 5 else 1.0 for d in dates])
+        day_of_year = np.array([d.timetuple().tm_yday for d in dates], dtype=np.float64)
+        season = 1 + 0.2 * np.sin(2 * np.pi * (day_of_year - 105) / 365)
+        growth = 1 + 0.08 * np.arange(self.days) / 365
+        factors = weekend * season * growth
+        return factors / factors.mean()
+
+    def _location_cdfs(self, rng: np.random.Generator, kinds: int) -> List[np.ndarray]:
+        """各类别的地点累积分布：一半权重为全局热点，一半为该类别自己的热点"""
+        weights = zipf_weights(len(self.locations), self.skew)
+        return [_cdf(0.5 * weights + 0.5 * weights[rng.permutation(len(weights))]) for _ in range(kinds)]
+
+    def iter_alerts(self, by_sub_type: bool = True) -> Iterator[List[Tuple[str, str, str, str, int]]]:
+        """
+        按日生成警情
+
+        Args:
+            by_sub_type: True 时按警情子类合并（对应导入模板），False 时按数据库 alert_type 合并
+
+        Yields:
+            每日的 (日期, 警情父类, 警情子类或 alert_type, 地点, 次数) 列表
+        """
+        rng = self._rng(1)
+        sub_cdf = _cdf(np.array([SUB_TYPE_WEIGHTS.get(sub, 1.0) for sub in self.sub_types]))
+        location_cdfs = self._location_cdfs(rng, len(self.sub_types))
+        size = len(self.locations)
+        means = self.day_factors * self.alerts / self.days
+
+        for offset, mean in enumerate(means):
+            n = rng.poisson(mean)
+            if n == 0:
+                continue
+            subs = _draw(rng, sub_cdf, n)
+            places = np.empty(n, dtype=np.int64)
+            for sub in np.unique(subs):
+                mask = subs == sub
+                places[mask] = _draw(rng, location_cdfs[sub], int(mask.sum()))
+            counts = rng.geometric(0.7, n)
+            kinds = subs if by_sub_type else self._sub_to_type[subs]
+            keys, totals = _aggregate(kinds * size + places, counts)
+
+            day = (self.start + timedelta(days=offset)).isoformat()
+            rows = []
+            for key, total in zip(keys.tolist(), totals.tolist()):
+                kind, place = divmod(key, size)
+                if by_sub_type:
+                    rows.append((day, self.parents[kind], self.sub_types[kind], self.locations[place][0], total))
+                else:
+                    rows.append((day, "", self.alert_types[kind], self.locations[place][0], total))
+            yield rows
+
+    def iter_calls(self) -> Iterator[List[Tuple[str, str, int]]]:
+        """
+        按日生成重复报警（比警情更集中于少数地点，每条至少 2 次）
+
+        Yields:
+            每日的 (日期, 报警地点, 次数) 列表
+        """
+        rng = self._rng(2)
+        weights = zipf_weights(len(self.locations), self.skew + 0.3)
+        cdf = _cdf(weights[rng.permutation(len(weights))])
+        means = self.day_factors * self.calls / self.days
+
+        for offset, mean in enumerate(means):
+            n = rng.poisson(mean)
+            if n == 0:
+                continue
+            keys, totals = _aggregate(_draw(rng, cdf, n), rng.geometric(0.5, n) + 1)
+            day = (self.start + timedelta(days=offset)).isoformat()
+            yield [(day, self.locations[key][0], total) for key, total in zip(keys.tolist(), totals.tolist())]
+
+    def _random_times(self, rng: np.random.Generator, size: int) -> List[datetime]:
+        """历史范围内的随机时间（近期更多，与警情量逐年增长一致），精确到分钟"""
+        days = _draw(rng, _cdf(self.day_factors), size)
+        minutes = rng.integers(7 * 60, 22 * 60, size)
+        start = datetime.combine(self.start, datetime.min.time())
+        return [start + timedelta(days=int(d), minutes=int(m)) for d, m in zip(days, minutes)]
+
+    def _sample_issues(self, rng: np.random.Generator, size: int) -> List[str]:
+        """每个案件 1-3 个不重复的风险问题（按长尾权重无放回抽样）"""
+        log_weights = np.log(zipf_weights(len(RISK_ISSUE_OPTIONS), 0.8))
+        keys = log_weights + rng.gumbel(size=(size, len(RISK_ISSUE_OPTIONS)))
+        order = np.argsort(-keys, axis=1)
+        lengths = rng.choice([1, 2, 3], size, p=[0.5, 0.35, 0.15])
+        return [",".join(RISK_ISSUE_OPTIONS[i] for i in row[:k]) for row, k in zip(order.tolist(), lengths.tolist())]
+
+    def iter_cases(self) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        分批生成执法问题盯办案件
+
+        Yields:
+            (案件编号, 案件名称, 案发时间, 案件类型, 风险类型, 风险问题, 问题类型, 整改期限, 责任民警) 列表
+        """
+        rng = self._rng(3)
+        location_cdf = _cdf(zipf_weights(len(self.locations), self.skew))
+        officer_cdf = _cdf(zipf_weights(len(self.officers), self.skew * 0.6))
+        case_type_cdf = _cdf(np.array([CASE_TYPE_WEIGHTS.get(option, 1) for option in CASE_TYPE_OPTIONS], dtype=np.float64))
+        risk_type_cdf = _cdf(zipf_weights(len(RISK_TYPE_OPTIONS), 1.0))
+        problem_cdf = _cdf(zipf_weights(len(PROBLEM_TYPE_OPTIONS), 0.7))
+
+        for begin in range(0, self.cases, CHUNK_ROWS):
+            size = min(CHUNK_ROWS, self.cases - begin)
+            times = self._random_times(rng, size)
+            places = _draw(rng, location_cdf, size)
+            officers = _draw(rng, officer_cdf, size)
+            case_types = _draw(rng, case_type_cdf, size)
+            risk_types = _draw(rng, risk_type_cdf, size)
+            problems = _draw(rng, problem_cdf, size)
+            issues = self._sample_issues(rng, size)
+            suffixes = rng.integers(0, 1 << 30, size)
+            terms = rng.integers(3, 61, size)
+
+            rows = []
+            for i in range(size):
+                case_type = CASE_TYPE_OPTIONS[case_types[i]]
+                names = CASE_NAME_SUFFIXES.get(case_type, ["案"])
+                case_time = times[i]
+                rows.append((
+                    f"{self.case_prefix}{case_time:%Y%m}{begin + i:08d}",
+                    self.locations[places[i]][0] + names[suffixes[i] % len(names)],
+                    case_time,
+                    case_type,
+                    RISK_TYPE_OPTIONS[risk_types[i]],
+                    issues[i],
+                    PROBLEM_TYPE_OPTIONS[problems[i]],
+                    datetime.combine(case_time.date() + timedelta(days=int(terms[i])), datetime.min.time()),
+                    self.officers[officers[i]],
+                ))
+            yield rows
+
+    def iter_disputes(self) -> Iterator[List[Tuple[Any, ...]]]:
+        """
+        分批生成矛盾纠纷
+
+        Yields:
+            (事件名称, 事件类型, 事件内容, 事发时间, 风险等级, 责任民警, 处置进度) 列表
+        """
+        rng = self._rng(4)
+        location_cdf = _cdf(zipf_weights(len(self.locations), self.skew))
+        officer_cdf = _cdf(zipf_weights(len(self.officers), self.skew * 0.6))
+        event_types = list(DISPUTE_TYPE_WEIGHTS)
+        event_type_cdf = _cdf(np.array(list(DISPUTE_TYPE_WEIGHTS.values()), dtype=np.float64))
+        level_cdf = _cdf(np.array([RISK_LEVEL_WEIGHTS.get(option, 1) for option in RISK_LEVEL_OPTIONS], dtype=np.float64))
+        end = datetime.combine(self.end, datetime.max.time())
+
+        for begin in range(0, self.disputes, CHUNK_ROWS):
+            size = min(CHUNK_ROWS, self.disputes - begin)
+            times = self._random_times(rng, size)
+            places = _draw(rng, location_cdf, size)
+            officers = _draw(rng, officer_cdf, size)
+            kinds = _draw(rng, event_type_cdf, size)
+            levels = _draw(rng, level_cdf, size)
+            templates = rng.integers(0, len(DISPUTE_CONTENTS), size)
+            names = rng.integers(0, len(SURNAMES), (size, 2))
+            progress = rng.random(size)
+
+            rows = []
+            for i in range(size):
+                place = self.locations[places[i]][0]
+                event_time = times[i]
+                content = DISPUTE_CONTENTS[templates[i]].format(
+                    a=SURNAMES[names[i][0]], b=SURNAMES[names[i][1]], place=place
+                )
+                rows.append((
+                    place + event_types[kinds[i]],
+                    event_types[kinds[i]],
+                    content[:150],
+                    event_time,
+                    RISK_LEVEL_OPTIONS[levels[i]],
+                    self.officers[officers[i]],
+                    self._dispute_status((end - event_time).days, progress[i]),
+                ))
+            yield rows
+
+    @staticmethod
+    def _dispute_status(age_days: int, draw: float) -> str:
+        """处置进度：事发越久已调解的比例越高"""
+        settled = min(0.95, 0.1 + age_days / 60)
+        if draw < settled:
+            return DISPUTE_STATUS_OPTIONS[-1]
+        pending = DISPUTE_STATUS_OPTIONS[:-1]
+        return pending[int((draw - settled) / (1 - settled) * len(pending)) % len(pending)]
+
+
+def _batched(chunks: Iterator[List[Any]], size: int = BATCH_ROWS) -> Iterator[List[Any]]:
+    """把按日或按块生成的行合并为固定大小的批次"""
+    batch: List[Any] = []
+    for chunk in chunks:
+        batch.extend(chunk)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_geocoding_cache(engine, dataset: SyntheticDataset) -> int:
+    """
+    写入各地点的坐标缓存（地址已存在时跳过）
+
+    Returns:
+        新增行数
+    """
+    created_at = _format_datetime(dataset.created_at)
+    inserted = 0
+    for begin in range(0, len(dataset.locations), BATCH_ROWS):
+        with engine.begin() as conn:
+            inserted += conn.exec_driver_sql(
+                "INSERT INTO t_geocoding_cache (address, longitude, latitude, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(address) DO NOTHING",
+                [(name, lon, lat, created_at) for name, lon, lat in dataset.locations[begin:begin + BATCH_ROWS]]
+            ).rowcount
+    return inserted
+
+
+def load_sqlite(engine, dataset: SyntheticDataset, analyze: bool = True) -> Dict[str, int]:
+    """
+    批量写入数据库（调用前需已建表）
+
+    每批一个事务，避免超大事务使 WAL 无限增长。合并规则与导入一致：警情与重复报警次数累加，
+    案件编号、纠纷（事件名称 + 事发时间 + 责任民警）与坐标已存在时跳过。
+
+    Args:
+        engine: 写引擎
+        dataset: 合成数据集
+        analyze: 写入后是否执行 ANALYZE
+
+    Returns:
+        各表写入行数
+    """
+    from app.services import search
+    from app.services.data_import import compute_row_hash, sync_risk_issues
+
+    counts = {"police_alert": 0, "call_record": 0, "risk_supervision": 0, "dispute_management": 0}
+    created_at = _format_datetime(dataset.created_at)
+
+    for batch in _batched(dataset.iter_alerts(by_sub_type=False)):
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO t_police_alert (alert_date, alert_type, location, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(alert_date, alert_type, location) DO UPDATE SET count = count + excluded.count",
+                [(day, alert_type, location, count) for day, _, alert_type, location, count in batch]
+            )
+        counts["police_alert"] += len(batch)
+
+    for batch in _batched(dataset.iter_calls()):
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO t_call_record (call_date, call_address, count) VALUES (?, ?, ?) "
+                "ON CONFLICT(call_date, call_address) DO UPDATE SET count = count + excluded.count",
+                batch
+            )
+        counts["call_record"] += len(batch)
+
+    with engine.connect() as conn:
+        last_risk_id = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM t_risk_supervision").scalar()
+    for batch in _batched(dataset.iter_cases()):
+        rows = []
+        for row in batch:
+            values = list(row)
+            for index in (2, 7):
+                values[index] = _format_datetime(values[index])
+            # 哈希与导入的字段顺序一致，重复导入同样的数据时识别为未变化
+            rows.append((*values, compute_row_hash(row), created_at, created_at))
+        with engine.begin() as conn:
+            counts["risk_supervision"] += conn.exec_driver_sql(
+                "INSERT INTO t_risk_supervision (case_number, case_name, case_time, case_type, risk_type, risk_issues, "
+                "problem_type, deadline, officer_name, row_hash, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(case_number) DO NOTHING",
+                rows
+            ).rowcount
+            new_rows = conn.exec_driver_sql(
+                "SELECT id, risk_issues FROM t_risk_supervision WHERE id > ?", (last_risk_id,)
+            ).fetchall()
+            if new_rows:
+                sync_risk_issues(conn, new_rows)
+                last_risk_id = max(risk_id for risk_id, _ in new_rows)
+
+    for batch in _batched(dataset.iter_disputes()):
+        rows = []
+        for row in batch:
+            values = list(row)
+            values[3] = _format_datetime(values[3])
+            rows.append((*values, compute_row_hash(row), created_at, created_at))
+        with engine.begin() as conn:
+            counts["dispute_management"] += conn.exec_driver_sql(
+                "INSERT INTO t_dispute_management (event_name, event_type, content, event_time, risk_level, "
+                "officer_name, status, row_hash, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(event_name, event_time, officer_name) DO NOTHING",
+                rows
+            ).rowcount
+
+    counts["geocoding_cache"] = load_geocoding_cache(engine, dataset)
+
+    with engine.begin() as conn:
+        if search.is_available(conn):
+            for fts_name in search.FTS_TABLES:
+                search.rebuild_fts(conn, fts_name)
+        if analyze:
+            conn.exec_driver_sql("ANALYZE")
+    return counts
+
+
+def _sheet_rows(dataset: SyntheticDataset) -> Iterator[Tuple[str, Iterator[List[Any]]]]:
+    """各 sheet 的数据行（不含序号列）"""
+    def cases():
+        for chunk in dataset.iter_cases():
+            yield [
+                (number, name, f"{case_time:%Y-%m-%d %H:%M}", case_type, risk_type, issues, problem, f"{deadline:%Y-%m-%d}", officer)
+                for number, name, case_time, case_type, risk_type, issues, problem, deadline, officer in chunk
+            ]
+
+    def disputes():
+        for chunk in dataset.iter_disputes():
+            yield [
+                (name, kind, content, f"{event_time:%Y-%m-%d %H:%M}", level, officer, status)
+                for name, kind, content, event_time, level, officer, status in chunk
+            ]
+
+    yield "执法问题盯办", cases()
+    yield "矛盾纠纷管理", disputes()
+    yield "警情态势追踪", dataset.iter_alerts(by_sub_type=True)
+    yield "重复报警记录", dataset.iter_calls()
+    yield "坐标缓存", iter([dataset.locations])
+
+
+def write_xlsx(dataset: SyntheticDataset, path: str) -> Dict[str, int]:
+    """
+    流式写入 Excel（write_only 模式，内存占用与行数无关）
+
+    Returns:
+        各 sheet 行数
+
+    Raises:
+        ValueError: 某个 sheet 超过 Excel 行数上限
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    counts = {}
+    for sheet, chunks in _sheet_rows(dataset):
+        worksheet = workbook.create_sheet(sheet)
+        headers = SHEETS[sheet]
+        worksheet.append(headers)
+        numbered = headers[0] == "序号"
+        count = 0
+        for chunk in chunks:
+            if count + len(chunk) >= XLSX_MAX_ROWS:
+                # 关闭已写入的 sheet（释放临时文件），不保存不完整的文件
+                for opened in workbook.worksheets:
+                    if not opened.closed:
+                        opened.close()
+                raise ValueError(f"{sheet} 超过 Excel 单个 sheet 的行数上限 {XLSX_MAX_ROWS}，请使用 csv 格式或减少行数")
+            for row in chunk:
+                count += 1
+                worksheet.append([count, *row] if numbered else list(row))
+        counts[sheet] = count
+    workbook.save(path)
+    return counts
+
+
+def write_csv(dataset: SyntheticDataset, directory: str) -> Dict[str, int]:
+    """
+    每个 sheet 写入一个 CSV 文件（UTF-8 BOM，Excel 可直接打开）
+
+    Returns:
+        各 sheet 行数
+    """
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for sheet, chunks in _sheet_rows(dataset):
+        headers = SHEETS[sheet]
+        numbered = headers[0] == "序号"
+        count = 0
+        with open(os.path.join(directory, f"{sheet}.csv"), "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            for chunk in chunks:
+                writer.writerows(
+                    [(count + i, *row) for i, row in enumerate(chunk, 1)] if numbered else chunk
+                )
+                count += len(chunk)
+        counts[sheet] = count
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="生成大规模合成数据（压测与容量测试）")
+    parser.add_argument("--format", choices=["sqlite", "xlsx", "csv"], default="sqlite", help="输出格式")
+    parser.add_argument("--output", help="xlsx 文件路径或 csv 目录")
+    parser.add_argument("--database", help="SQLite 数据库文件路径（默认使用 DATABASE_URL 配置）")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    parser.add_argument("--years", type=float, default=2.0, help="历史年数")
+    parser.add_argument("--alerts", type=int, default=150000, help="警情抽样条数（合并后行数略少）")
+    parser.add_argument("--calls", type=int, default=None, help="重复报警抽样条数（默认为警情的 1/10）")
+    parser.add_argument("--cases", type=int, default=5000, help="执法问题盯办案件数")
+    parser.add_argument("--disputes", type=int, default=5000, help="矛盾纠纷数")
+    parser.add_argument("--locations", type=int, default=400, help="地点数量")
+    parser.add_argument("--officers", type=int, default=60, help="民警人数")
+    parser.add_argument("--skew", type=float, default=1.1, help="分布集中程度（0 为均匀分布）")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="数据截止日期（YYYY-MM-DD，默认今天）")
+    args = parser.parse_args()
+    if args.format != "sqlite" and not args.output:
+        parser.error("xlsx / csv 格式需要指定 --output")
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.database:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(args.database)}"
+
+    dataset = SyntheticDataset(
+        seed=args.seed, years=args.years, alerts=args.alerts, locations=args.locations, calls=args.calls,
+        cases=args.cases, disputes=args.disputes, officers=args.officers, skew=args.skew, end=args.end
+    )
+    print(f"时间范围: {dataset.start} ~ {dataset.end}（{dataset.days} 天），地点 {len(dataset.locations)} 个")
+
+    start = time.perf_counter()
+    if args.format == "sqlite" or args.database:
+        from app.core.database import engine
+        from app.core.init_db import init_database
+        init_database()
+
+    if args.format == "sqlite":
+        counts = load_sqlite(engine, dataset)
+        target = engine.url.database
+    else:
+        writer = write_xlsx if args.format == "xlsx" else write_csv
+        try:
+            counts = writer(dataset, args.output)
+        except ValueError as e:
+            sys.exit(f"✗ {e}")
+        if args.database:
+            counts["坐标缓存（数据库）"] = load_geocoding_cache(engine, dataset)
+        target = args.output
+
+    print(f"✓ 已生成合成数据: {target}（{time.perf_counter() - start:.1f} 秒）")
+    for name, count in counts.items():
+        print(f"  - {name}: {count} 条")
+
+
+if __name__ == "__main__":
+    main()
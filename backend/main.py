@@ -1,14 +1,25 @@
 """警情态势演示系统后端API"""
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.database import engine, read_engine
+from app.core import loop_monitor, metrics, query_profiler, request_profiler, tracing
+from app.core.http_cache import NotModified, not_modified_handler
+from app.core.responses import ORJSONResponse, ORJSONRoute
 from app.core.init_db import init_database
+from app.services import push, upload
 import os
 import sys
 
 
+# 事件循环延迟监测（未显式配置时随调试模式启用）
+LOOP_MONITOR_ENABLED = (
+    settings.DEBUG if settings.LOOP_MONITOR_ENABLED is None else settings.LOOP_MONITOR_ENABLED
+)
 
 
 @asynccontextmanager
@@ -18,8 +29,23 @@ async def lifespan(app: FastAPI):
     print("正在初始化数据库...")
     init_database()
     print("数据库初始化完成")
+    removed = upload.cleanup_stale_uploads(settings.UPLOAD_SESSION_TTL_HOURS)
+    if removed:
+        print(f"已清理 {removed} 个过期的上传会话")
+    await push.hub.start()
+    if LOOP_MONITOR_ENABLED:
+        await loop_monitor.start(
+            interval_ms=settings.LOOP_MONITOR_INTERVAL_MS,
+            threshold_ms=settings.LOOP_BLOCK_THRESHOLD_MS,
+            window=settings.LOOP_MONITOR_WINDOW,
+            size=settings.LOOP_BLOCK_LOG_SIZE
+        )
     yield
-    # 关闭时执行（如需要）
+    # 关闭时执行
+    await loop_monitor.stop()
+    await push.hub.stop()
+    tracing.shutdown()
+    metrics.mark_process_dead()
 
 
 # 创建FastAPI应用
@@ -28,8 +54,10 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="警情态势演示系统后端API",
     debug=settings.DEBUG,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
+app.router.route_class = ORJSONRoute
 
 # 配置CORS
 app.add_middleware(
@@ -40,6 +68,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩（按 Accept-Encoding 协商 brotli / gzip）
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_COMPRESS_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY
+)
+
+# 按请求统计 SQL 查询（Server-Timing 响应头、慢查询记录）
+if settings.QUERY_PROFILER_ENABLED:
+    query_profiler.install(
+        [engine, read_engine],
+        slow_ms=settings.SLOW_QUERY_MS,
+        repeat_threshold=settings.QUERY_REPEAT_THRESHOLD,
+        size=settings.SLOW_QUERY_LOG_SIZE
+    )
+    app.add_middleware(query_profiler.QueryProfilerMiddleware)
+
+# 监控指标（各路由请求数与耗时、处理中的请求数、SQL 语句数与耗时）
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(engine, "write")
+    if read_engine is not engine:
+        metrics.instrument_engine(read_engine, "read")
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# 链路追踪（按采样比例为请求创建根 span，服务函数与 SQL 语句记为子 span）
+if tracing.install(
+    settings.TRACE_EXPORTER,
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    service_name=settings.TRACE_SERVICE_NAME,
+    queue_size=settings.TRACE_QUEUE_SIZE,
+    file_path=settings.TRACE_FILE,
+    endpoint=settings.TRACE_OTLP_ENDPOINT
+):
+    if settings.TRACE_DB_SPANS:
+        tracing.instrument_engines([engine, read_engine])
+    app.add_middleware(tracing.TracingMiddleware)
+
+# 按需请求剖析（携带剖析令牌的请求，在最外层计入全部中间件的耗时）
+if settings.PROFILING_TOKEN:
+    request_profiler.install(
+        settings.PROFILING_TOKEN,
+        directory=settings.PROFILE_DIR,
+        keep=settings.PROFILE_KEEP,
+        interval_ms=settings.PROFILE_SAMPLE_INTERVAL_MS
+    )
+    app.add_middleware(request_profiler.RequestProfilerMiddleware)
+
+# 条件请求命中时返回 304
+app.add_exception_handler(NotModified, not_modified_handler)
+
 
 # 注册路由
 from app.api import data, admin
@@ -47,6 +126,17 @@ from app.api import data, admin
 app.include_router(data.router, prefix="/api/v1/data", tags=["数据"])
 app.include_router(admin.router, prefix="/api/v1", tags=["管理后台"])
 
+
+# 监控指标（须在挂载前端静态文件之前注册）
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        """Prometheus 指标"""
+        if not metrics.AVAILABLE:
+            raise HTTPException(status_code=503, detail="未安装 prometheus_client，无法输出监控指标")
+        content, content_type = metrics.render()
+        return Response(content, media_type=content_type)
+
 # 挂载静态文件（前端）
 # 静态文件在可执行文件同级目录下
 if getattr(sys, 'frozen', False):
@@ -89,5 +179,7 @@ if __name__ == "__main__":
         "main:app" if not is_packaged else app,
         host="0.0.0.0",
         port=8000,
-        reload=False if is_packaged else settings.DEBUG
+        reload=False if is_packaged else settings.DEBUG,
+        # SSE 推送连接不会主动结束，关闭时最多等待 5 秒后断开
+        timeout_graceful_shutdown=5
     )
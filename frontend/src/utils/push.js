@@ -0,0 +1,38 @@
+/**
+ * 数据推送订阅（SSE）
+ *
+ * 订阅页面数据后，导入数据或修改规则时由服务端推送最新数据，无需定时轮询。
+ * 推送内容与对应数据接口的响应相同；连接断开后浏览器会自动重连。
+ */
+
+const STREAM_URL = '/api/v1/data/stream'
+
+/**
+ * 订阅页面数据
+ * @param {string} channel - 订阅的页面（situation / risk-supervision / dispute-management）
+ * @param {Object} params - 查询参数（与数据接口一致，含列表页码 page；空值忽略，数组为多值参数）
+ * @param {Function} onData - 收到推送时的回调，参数为解析后的响应
+ * @returns {Function} 取消订阅
+ */
+export const subscribePageData = (channel, params, onData) => {
+  const query = new URLSearchParams({ channel })
+  Object.entries(params).forEach(([key, value]) => {
+    if (value === undefined || value === null || value === '') return
+    if (Array.isArray(value)) {
+      value.forEach(v => query.append(key, v))
+    } else {
+      query.append(key, value)
+    }
+  })
+
+  const source = new EventSource(`${STREAM_URL}?${query}`)
+  source.addEventListener('update', (event) => {
+    try {
+      onData(JSON.parse(event.data))
+    } catch (err) {
+      console.error('处理推送数据失败:', err)
+    }
+  })
+
+  return () => source.close()
+}